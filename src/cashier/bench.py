@@ -0,0 +1,250 @@
+"""A module providing a benchmark suite for the register."""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from collections.abc import Callable, Iterator
+from io import StringIO
+from pathlib import Path
+from typing import Final
+
+from cashier.purchase.bill import Bill
+from cashier.purchase.container import PurchasedItem
+from cashier.register import (
+    DI_BUY,
+    DI_TERM,
+    create_register,
+    decide_if_taxed,
+    run_batch,
+)
+
+_TAXED_NAMES: Final[tuple[str, ...]] = (
+    "music CD",
+    "bottle of perfume",
+    "pair of shoes",
+    "box of pens",
+)
+_EXEMPT_NAMES: Final[tuple[str, ...]] = (
+    "book",
+    "box of chocolates",
+    "packet of headache pills",
+    "chocolate bar",
+)
+
+
+def generate_transcript(
+    items: int,
+    /,
+    items_per_bill: int = 10,
+    imported_ratio: float = 0.3,
+    exempt_ratio: float = 0.3,
+    seed: int = 0,
+) -> Iterator[str]:
+    """To generate a synthetic transcript.
+
+    Args:
+        items: The amount of item lines.
+        items_per_bill: The amount of item lines per purchase.
+        imported_ratio: The share of imported items.
+        exempt_ratio: The share of items exempt from the basic sales taxes.
+        seed: The seed of the random generator.
+
+    Yields:
+        The lines of the transcript, terminated by the finishing input.
+    """
+    rnd = random.Random(seed)  # noqa: S311
+    for item_i in range(items):
+        if item_i and not item_i % max(items_per_bill, 1):
+            yield DI_BUY
+        name = rnd.choice(_EXEMPT_NAMES if rnd.random() < exempt_ratio else _TAXED_NAMES)
+        imported = "imported " if rnd.random() < imported_ratio else ""
+        yield (
+            f"{rnd.randint(1, 5)} {imported}{name}"
+            + f" at {rnd.randint(0, 99)}.{rnd.randint(0, 99):02d}"
+        )
+    yield DI_TERM
+
+
+def _measure(func: Callable[[], int], repeat: int, /) -> dict[str, float]:
+    """To measure the best run of a benchmark.
+
+    Args:
+        func: The benchmark, returning the amount of processed operations.
+        repeat: The amount of runs.
+
+    Returns:
+        The best time in seconds, the amount of operations
+        and the operations per second.
+    """
+    best, ops = float("inf"), 0
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        ops = func()
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": best, "ops": ops, "ops_per_s": ops / best if best > 0 else 0.0}
+
+
+def run_suite(
+    items: int,
+    /,
+    repeat: int = 3,
+    imported_ratio: float = 0.3,
+    exempt_ratio: float = 0.3,
+    seed: int = 0,
+) -> dict[str, dict[str, float]]:
+    """To run all benchmarks on a synthetic transcript.
+
+    Args:
+        items: The amount of item lines.
+        repeat: The amount of runs per benchmark, the best one is reported.
+        imported_ratio: The share of imported items.
+        exempt_ratio: The share of items exempt from the basic sales taxes.
+        seed: The seed of the random generator.
+
+    Returns:
+        The measurements per benchmark.
+    """
+    lines = list(
+        generate_transcript(
+            items, imported_ratio=imported_ratio, exempt_ratio=exempt_ratio, seed=seed
+        )
+    )
+    transcript = "\n".join(lines) + "\n"
+    in_form, out_form, tax_calc = create_register(None)
+    item_lines = [line for line in lines if line not in (DI_BUY, DI_TERM)]
+    p_items: list[PurchasedItem] = [
+        p_item
+        for line in item_lines
+        if (p_item := in_form.analyse_input(line)[1]) is not None
+    ]
+    taxed_f = decide_if_taxed(set())
+
+    def _parse() -> int:
+        for line in item_lines:
+            in_form.analyse_input(line)
+        return len(item_lines)
+
+    def _exempt() -> int:
+        for p_item in p_items:
+            taxed_f(p_item.name)
+        return len(p_items)
+
+    def _tax() -> int:
+        for p_item in p_items:
+            tax_calc.tax(p_item)
+        return len(p_items)
+
+    def _bill() -> int:
+        bill = Bill(out_form, tax_calc)
+        for p_item in p_items:
+            bill.add_item(p_item)
+        bill.write_to(StringIO())
+        return len(p_items)
+
+    def _replay() -> int:
+        return run_batch(None, StringIO(transcript), StringIO()).lines
+
+    return {
+        name: _measure(func, repeat)
+        for name, func in (
+            ("parse", _parse),
+            ("exempt", _exempt),
+            ("tax", _tax),
+            ("bill", _bill),
+            ("replay", _replay),
+        )
+    }
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+    /,
+) -> list[str]:
+    """To compare benchmark results with a baseline.
+
+    Args:
+        results: The current measurements per benchmark.
+        baseline: The measurements of the baseline per benchmark.
+        threshold: The tolerated relative loss of throughput.
+
+    Returns:
+        The names of the benchmarks, which regressed beyond the threshold.
+    """
+    regressions: list[str] = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None or not base["ops_per_s"]:
+            continue
+        change = res["ops_per_s"] / base["ops_per_s"] - 1
+        print(f"{name}: {change:+.1%}", file=sys.stderr)
+        if change < -threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    """To run the benchmark suite from the command line."""
+    arg_parser = argparse.ArgumentParser(
+        prog="cashier-bench",
+        description="A benchmark suite for parsing, taxing, billing and replaying.",
+    )
+    arg_parser.add_argument("-n", "--items", type=int, default=100_000, metavar="int")
+    arg_parser.add_argument("-r", "--repeat", type=int, default=3, metavar="int")
+    arg_parser.add_argument("--imported", type=float, default=0.3, metavar="float")
+    arg_parser.add_argument("--exempt", type=float, default=0.3, metavar="float")
+    arg_parser.add_argument("--seed", type=int, default=0, metavar="int")
+    arg_parser.add_argument(
+        "-l", "--label", type=str, default="", help="a label, e.g. the commit id."
+    )
+    arg_parser.add_argument(
+        "-o", "--output", type=str, default=None, help="the JSON result file."
+    )
+    arg_parser.add_argument(
+        "-c", "--compare", type=str, default=None, help="a JSON baseline file."
+    )
+    arg_parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="the tolerated relative loss of throughput.",
+        metavar="float",
+    )
+    args = arg_parser.parse_args(args=sys.argv[1:])
+    results = run_suite(
+        args.items,
+        repeat=args.repeat,
+        imported_ratio=args.imported,
+        exempt_ratio=args.exempt,
+        seed=args.seed,
+    )
+    report = {
+        "meta": {
+            "label": args.label,
+            "python": platform.python_version(),
+            "items": args.items,
+            "imported": args.imported,
+            "exempt": args.exempt,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    out_str = json.dumps(report, indent=2)
+    if args.output is None:
+        print(out_str)
+    else:
+        Path(args.output).write_text(out_str + "\n")
+    if args.compare is not None:
+        with Path(args.compare).open("r") as fh_r:
+            baseline = json.load(fh_r)
+        if regressions := compare(results, baseline["results"], args.threshold):
+            print(f"regressions: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""A module providing hot-reloadable register configurations."""
+import signal
+import threading
+import tomllib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Final, final
+
+from cashier.purchase.formatter import InFormatter, OutFormatter
+from cashier.purchase.tax_calculator import TaxCalculator
+from cashier.register import create_register
+
+# default sales taxes: imported, basic
+_D_TAXES: Final[tuple[float, float]] = (0.05, 0.1)
+# import sales taxes, basic sales taxes, exemption file, rule file, region
+_Settings = tuple[float, float, None | Path, None | Path, None | str]
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class ConfigSnapshot:
+    """An immutable configuration of a register."""
+
+    version: int = field()
+    """The version of the configuration, increased with every reload."""
+    import_taxes: float = field()
+    """Sales taxes for imported items."""
+    basic_taxes: float = field()
+    """Basic sales taxes."""
+    tax_file: None | Path = field()
+    """The optional file containing the names of not-taxed items."""
+    rule_file: None | Path = field()
+    """The optional file with the tax rules of several regions."""
+    region: None | str = field()
+    """The region of the tax rules, None for the one of the rule file."""
+    in_form: InFormatter = field(repr=False, compare=False)
+    """The input formatter deciding the exemptions."""
+    out_form: OutFormatter = field(repr=False, compare=False)
+    """The output formatter."""
+    tax_calc: TaxCalculator = field(repr=False, compare=False)
+    """The calculator for the sales taxes."""
+
+
+def _read_config(config_file: Path, /) -> _Settings:
+    """To read a configuration file.
+
+    The TOML file may contain ``import_taxes``, ``basic_taxes``,
+    ``exemption_file``, ``rule_file`` and ``region``, the files are
+    relative to the configuration file.
+
+    Args:
+        config_file: The configuration file.
+
+    Returns:
+        The import sales taxes, the basic sales taxes, the exemption file,
+        the rule file and the region of the rules.
+
+    Raises:
+        TypeError: If a value has the wrong type.
+    """
+    with config_file.open("rb") as fh_r:
+        data = tomllib.load(fh_r)
+    taxes: list[float] = []
+    for key, default in zip(("import_taxes", "basic_taxes"), _D_TAXES, strict=True):
+        value = data.get(key, default)
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            raise TypeError(f"{key} has to be a number.")
+        taxes.append(float(value))
+    paths: list[None | Path] = []
+    for key in ("exemption_file", "rule_file"):
+        path = data.get(key)
+        if path is not None and not isinstance(path, str):
+            raise TypeError(f"{key} has to be a string.")
+        paths.append(None if path is None else config_file.parent / path)
+    region = data.get("region")
+    if region is not None and not isinstance(region, str):
+        raise TypeError("region has to be a string.")
+    return taxes[0], taxes[1], paths[0], paths[1], region
+
+
+@final
+class ConfigStore:
+    """Holds the current configuration of long-running registers.
+
+    Reading the snapshot is a plain attribute access, a reload builds
+    a complete new snapshot and swaps the reference afterwards. Thus
+    pricing never waits for a reload, and purchases keep the snapshot
+    they started with. Reloads are triggered explicitly, by a file
+    watcher or by ``SIGHUP``, which the watcher thread services.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items,
+            used if the configuration file doesn't name one.
+        config_file: The optional TOML configuration file.
+    """
+
+    def __init__(self, tax_file: None | Path, /, config_file: None | Path = None) -> None:
+        """To initialise the class."""
+        super().__init__()
+        self.__tax_file: None | Path = tax_file
+        self.__config_file: None | Path = config_file
+        self.__reload_lock: threading.Lock = threading.Lock()
+        self.__stop: threading.Event = threading.Event()
+        # set by the signal handler, wakes the watcher thread
+        self.__requested: threading.Event = threading.Event()
+        self.__watcher: None | threading.Thread = None
+        settings = self._settings()
+        self.__snapshot: ConfigSnapshot = self._build(
+            0, *(settings or (*_D_TAXES, tax_file, None, None))
+        )
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """The current configuration."""
+        return self.__snapshot
+
+    def register(self) -> tuple[InFormatter, OutFormatter, TaxCalculator]:
+        """To return the register of the current configuration.
+
+        Returns:
+            The input formatter, the output formatter and the tax calculator.
+        """
+        snapshot = self.__snapshot
+        return snapshot.in_form, snapshot.out_form, snapshot.tax_calc
+
+    @staticmethod
+    def _build(
+        version: int,
+        import_taxes: float,
+        basic_taxes: float,
+        tax_file: None | Path,
+        rule_file: None | Path,
+        region: None | str,
+        /,
+    ) -> ConfigSnapshot:
+        """To build a configuration snapshot.
+
+        Args:
+            version: The version of the snapshot.
+            import_taxes: Sales taxes for imported items.
+            basic_taxes: Basic sales taxes.
+            tax_file: The optional file containing the names of not-taxed items.
+            rule_file: The optional file with the tax rules of several regions.
+            region: The region of the tax rules.
+
+        Returns:
+            The snapshot containing a new register.
+        """
+        in_form, out_form, tax_calc = create_register(
+            tax_file,
+            import_taxes=import_taxes,
+            normal_taxes=basic_taxes,
+            rule_file=rule_file,
+            region=region,
+        )
+        return ConfigSnapshot(
+            version=version,
+            import_taxes=import_taxes,
+            basic_taxes=basic_taxes,
+            tax_file=tax_file,
+            rule_file=rule_file,
+            region=region,
+            in_form=in_form,
+            out_form=out_form,
+            tax_calc=tax_calc,
+        )
+
+    def _stamp(self) -> tuple[int, ...]:
+        """To collect the modification times of the watched files.
+
+        Returns:
+            The modification times in nanoseconds, -1 for missing files.
+        """
+        stamps: list[int] = []
+        for path in (
+            self.__config_file,
+            self.__snapshot.tax_file,
+            self.__snapshot.rule_file,
+        ):
+            try:
+                stamps.append(-1 if path is None else path.stat().st_mtime_ns)
+            except OSError:
+                stamps.append(-1)
+        return tuple(stamps)
+
+    def _settings(self) -> None | _Settings:
+        """To read the settings of the configuration file.
+
+        Returns:
+            The import sales taxes, the basic sales taxes, the exemption file,
+            the rule file and the region or None if there is no valid
+            configuration file.
+        """
+        if self.__config_file is None:
+            return None
+        try:
+            import_taxes, basic_taxes, tax_file, rule_file, region = _read_config(
+                self.__config_file
+            )
+        except (OSError, tomllib.TOMLDecodeError, TypeError) as ex_n:
+            print(f"configuration not loaded: {ex_n}")
+            return None
+        return (
+            import_taxes,
+            basic_taxes,
+            self.__tax_file if tax_file is None else tax_file,
+            rule_file,
+            region,
+        )
+
+    def reload(self) -> bool:
+        """To read the configuration file and to publish a new snapshot.
+
+        An invalid configuration is reported and the current snapshot is kept.
+
+        Returns:
+            Whether a new snapshot was published.
+        """
+        with self.__reload_lock:
+            settings = self._settings()
+            if settings is None:
+                return False
+            try:
+                snapshot = self._build(self.__snapshot.version + 1, *settings)
+            except (OSError, tomllib.TOMLDecodeError, TypeError, ValueError) as ex_n:
+                print(f"configuration not loaded: {ex_n}")
+                return False
+            self.__snapshot = snapshot
+            return True
+
+    def _watch(self, interval: float, stamp: tuple[int, ...], /) -> None:
+        """To reload the configuration whenever a watched file changes.
+
+        Reloads requested by ``SIGHUP`` are serviced immediately.
+
+        Args:
+            interval: The time between two checks in seconds.
+            stamp: The modification times of the watched files at the start.
+        """
+        while not self.__stop.is_set():
+            requested = self.__requested.wait(interval)
+            self.__requested.clear()
+            if self.__stop.is_set():
+                break
+            if requested or self._stamp() != stamp:
+                self.reload()
+                stamp = self._stamp()
+
+    def watch(self, interval: float = 1.0, /) -> None:
+        """To start a background thread polling the watched files.
+
+        The configuration file, the current exemption file and the current
+        rule file are watched.
+
+        Args:
+            interval: The time between two checks in seconds.
+        """
+        if self.__watcher is not None:
+            return
+        self.__stop.clear()
+        self.__watcher = threading.Thread(
+            target=self._watch,
+            args=(interval, self._stamp()),
+            name="config-watcher",
+            daemon=True,
+        )
+        self.__watcher.start()
+
+    def stop(self) -> None:
+        """To stop the background thread polling the watched files."""
+        if self.__watcher is None:
+            return
+        self.__stop.set()
+        self.__requested.set()
+        self.__watcher.join()
+        self.__watcher = None
+        self.__requested.clear()
+
+    def reload_on_signal(self) -> bool:
+        """To reload the configuration whenever the process receives ``SIGHUP``.
+
+        The signal handler only requests the reload, which the watcher thread
+        performs, thus a signal arriving during a reload can't deadlock on
+        the reload lock. The watcher thread is started if it doesn't run.
+
+        Returns:
+            Whether the signal handler was installed, which is not possible
+            on platforms without ``SIGHUP``.
+        """
+        sig_hup = getattr(signal, "SIGHUP", None)
+        if sig_hup is None:
+            return False
+        signal.signal(sig_hup, lambda *_: self.__requested.set())
+        self.watch()
+        return True
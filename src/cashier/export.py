@@ -0,0 +1,471 @@
+"""A module exporting finished purchases into columnar files."""
+import importlib
+import struct
+import sys
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from decimal import Decimal
+from enum import StrEnum
+from pathlib import Path
+from types import ModuleType
+from typing import Any, BinaryIO, Final, final
+
+from cashier.purchase.bill import Bill
+from cashier.purchase.columnar_bill import ColumnarBill
+
+# file layout: header, row groups until the end of the file
+_MAGIC: Final[bytes] = b"CSHXCOL2"
+# magic, decimal places of the prices and sales taxes
+_HEADER: Final[struct.Struct] = struct.Struct("<8sI")
+# row group: amount of rows, amount of dictionary names, size of the UTF-8 names,
+# amount of rows stored as text
+_GROUP: Final[struct.Struct] = struct.Struct("<IIII")
+# array type codes of the 64-bit and 32-bit integer columns
+_I64: Final[str] = "q"
+_I32: Final[str] = "i"
+# range of the 64-bit integer columns
+_I64_MIN: Final[int] = -(2**63)
+_I64_MAX: Final[int] = 2**63 - 1
+
+
+class ExportEngine(StrEnum):
+    """Available writers of the columnar export."""
+
+    PARQUET = "parquet"
+    """Apache Parquet written with ``pyarrow``."""
+    BINARY = "binary"
+    """A compact columnar layout written with the standard library."""
+
+
+def _load_pyarrow() -> None | tuple[ModuleType, ModuleType]:
+    """To import the optional ``pyarrow`` package.
+
+    Returns:
+        The ``pyarrow`` and ``pyarrow.parquet`` modules or None if they are
+        not installed.
+    """
+    try:
+        return (
+            importlib.import_module("pyarrow"),
+            importlib.import_module("pyarrow.parquet"),
+        )
+    except ImportError:
+        return None
+
+
+def _le_bytes(col: "array[int]", /) -> bytes:
+    """To serialise an integer column in little-endian byte order.
+
+    Args:
+        col: The column.
+
+    Returns:
+        The bytes of the column.
+    """
+    if sys.byteorder == "big":
+        col = array(col.typecode, col)
+        col.byteswap()
+    return col.tobytes()
+
+
+def _from_le_bytes(typecode: str, data: bytes, /) -> "array[int]":
+    """To deserialise an integer column stored in little-endian byte order.
+
+    Args:
+        typecode: The array type code of the column.
+        data: The bytes of the column.
+
+    Returns:
+        The column.
+    """
+    col = array(typecode, data)
+    if sys.byteorder == "big":
+        col.byteswap()
+    return col
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class ExportRowGroup:
+    """The columns of one row group read from an exported file."""
+
+    bill_id: list[int] = field()
+    """The numbers of the purchases."""
+    item_id: list[int] = field()
+    """The ids of the items within their purchases."""
+    name: list[str] = field()
+    """The names of the items."""
+    imported: list[bool] = field()
+    """Whether the items are imported."""
+    taxed: list[bool] = field()
+    """Whether the basic sales taxes apply to the items."""
+    cnt: list[int] = field()
+    """The amounts of the items."""
+    price: list[Decimal] = field()
+    """The prices of the items."""
+    sales_taxes: list[Decimal] = field()
+    """The sales taxes of the items."""
+
+    def __len__(self) -> int:
+        """To return the amount of rows.
+
+        Returns:
+            The amount of rows.
+        """
+        return len(self.bill_id)
+
+
+@final
+class BillExporter:
+    """Exports finished purchases item by item into a columnar file.
+
+    Rows are buffered column by column and written as a row group whenever
+    ``row_group_size`` rows are buffered, thus the memory use doesn't depend
+    on the amount of exported purchases. The names of each row group are
+    dictionary-encoded. Prices and sales taxes are stored as integers scaled
+    by ``10 ** scale``. Rows whose amount, price or sales taxes don't fit into
+    these 64-bit columns, e.g. prices with more than ``scale`` decimal places,
+    keep these three values exactly as text instead. Parquet files are written
+    if ``pyarrow`` is installed, otherwise a compact binary layout readable
+    with ``read_row_groups``.
+
+    Args:
+        path: The exported file.
+        engine: The writer, defaults to Parquet if ``pyarrow`` is installed.
+        row_group_size: The maximal amount of buffered rows.
+        scale: The amount of decimal places stored for prices and sales taxes.
+
+    Raises:
+        ValueError: If Parquet is requested, but ``pyarrow`` is not installed.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        /,
+        engine: None | ExportEngine = None,
+        row_group_size: int = 65_536,
+        scale: int = 4,
+    ) -> None:
+        """To initialise the class."""
+        super().__init__()
+        self.__arrow: None | tuple[ModuleType, ModuleType] = (
+            None if engine is ExportEngine.BINARY else _load_pyarrow()
+        )
+        if engine is ExportEngine.PARQUET and self.__arrow is None:
+            raise ValueError("Parquet export requires pyarrow.")
+        self.__row_group_size: int = max(row_group_size, 1)
+        self.__scale: int = scale
+        self.__factor: int = 10**scale
+        self.__rows: int = 0
+        # buffered row group: dictionary of the names, scaled decimal values
+        self.__name_ids: dict[str, int] = {}
+        self.__scaled: dict[Decimal, int] = {}
+        self.__cols: tuple[array[int], ...] = self._new_columns()
+        # buffered rows stored as text: their positions, amount, price, sales taxes
+        self.__text_rows: array[int] = array(_I64)
+        self.__text_vals: list[str] = []
+        self.__fh_w: None | BinaryIO = None
+        self.__pq_writer: Any = None
+        if self.__arrow is None:
+            self.__fh_w = path.open("wb")
+            self.__fh_w.write(_HEADER.pack(_MAGIC, scale))
+        else:
+            self.__pq_writer = self.__arrow[1].ParquetWriter(str(path), self._schema())
+
+    @property
+    def engine(self) -> ExportEngine:
+        """The writer of the exported file."""
+        return ExportEngine.BINARY if self.__arrow is None else ExportEngine.PARQUET
+
+    @property
+    def rows(self) -> int:
+        """The amount of exported rows, including the buffered ones."""
+        return self.__rows
+
+    @staticmethod
+    def _new_columns() -> "tuple[array[int], ...]":
+        """To create the empty columns of a row group.
+
+        Returns:
+            The columns: bill id, item id, name id, imported, taxed, amount,
+            scaled price, scaled sales taxes.
+        """
+        return (
+            array(_I64),
+            array(_I64),
+            array(_I32),
+            array("B"),
+            array("B"),
+            array(_I64),
+            array(_I64),
+            array(_I64),
+        )
+
+    def _schema(self) -> Any:
+        """To create the Parquet schema.
+
+        Returns:
+            The ``pyarrow`` schema of the exported columns.
+        """
+        if self.__arrow is None:
+            raise RuntimeError("pyarrow is not loaded.")
+        pa_m = self.__arrow[0]
+        decimal_t = pa_m.decimal128(38, self.__scale)
+        return pa_m.schema(
+            [
+                ("bill_id", pa_m.int64()),
+                ("item_id", pa_m.int64()),
+                ("name", pa_m.dictionary(pa_m.int32(), pa_m.string())),
+                ("imported", pa_m.bool_()),
+                ("taxed", pa_m.bool_()),
+                ("cnt", pa_m.int64()),
+                ("price", decimal_t),
+                ("sales_taxes", decimal_t),
+                ("cnt_text", pa_m.string()),
+                ("price_text", pa_m.string()),
+                ("sales_taxes_text", pa_m.string()),
+            ]
+        )
+
+    def _scale(self, value: Decimal, /) -> None | int:
+        """To scale a price or sales taxes to an integer.
+
+        Args:
+            value: The price or sales taxes.
+
+        Returns:
+            The value multiplied by ``10 ** scale`` or None if it has more
+            decimal places than ``scale`` or exceeds 64 bits.
+        """
+        scaled = self.__scaled.get(value)
+        if scaled is None:
+            num, den = value.as_integer_ratio()
+            scaled, rem = divmod(num * self.__factor, den)
+            if rem or not _I64_MIN <= scaled <= _I64_MAX:
+                return None
+            self.__scaled[value] = scaled
+        return scaled
+
+    def add_bill(self, bill_id: int, bill: Bill | ColumnarBill, /) -> int:
+        """To export the items of a finished purchase.
+
+        Args:
+            bill_id: The number of the purchase.
+            bill: The finished purchase.
+
+        Returns:
+            The amount of exported items.
+        """
+        bill_col, item_col, name_col, imp_col, tax_col, cnt_col, price_col, st_col = (
+            self.__cols
+        )
+        name_ids = self.__name_ids
+        added = 0
+        for p_el in bill.items():
+            p_item = p_el.item
+            # all values are checked before any column grows
+            cnt, price = p_item.cnt, self._scale(p_item.price)
+            sales_taxes = self._scale(p_el.sales_taxes)
+            if price is None or sales_taxes is None or not _I64_MIN <= cnt <= _I64_MAX:
+                self.__text_rows.append(len(bill_col))
+                self.__text_vals += (str(cnt), str(p_item.price), str(p_el.sales_taxes))
+                cnt, price, sales_taxes = 0, 0, 0
+            name_id = name_ids.get(p_item.name)
+            if name_id is None:
+                name_id = name_ids[p_item.name] = len(name_ids)
+            bill_col.append(bill_id)
+            item_col.append(p_el.id)
+            name_col.append(name_id)
+            imp_col.append(p_item.imported)
+            tax_col.append(p_item.taxed)
+            cnt_col.append(cnt)
+            price_col.append(price)
+            st_col.append(sales_taxes)
+            added += 1
+            if len(bill_col) >= self.__row_group_size:
+                self.flush()
+                bill_col, item_col, name_col, imp_col, tax_col = self.__cols[:5]
+                cnt_col, price_col, st_col = self.__cols[5:]
+                name_ids = self.__name_ids
+        self.__rows += added
+        return added
+
+    def _write_parquet(self) -> None:
+        """To write the buffered rows as a Parquet row group."""
+        if self.__arrow is None or self.__pq_writer is None:
+            raise RuntimeError("pyarrow is not loaded.")
+        pa_m = self.__arrow[0]
+        bill_col, item_col, name_col, imp_col, tax_col, cnt_col, price_col, st_col = (
+            self.__cols
+        )
+        decimal_t = pa_m.decimal128(38, self.__scale)
+        texts: list[list[None | str]] = [[None] * len(bill_col) for _ in range(3)]
+        cnts: list[None | int] = list(cnt_col)
+        prices: list[None | Decimal] = [
+            Decimal(val).scaleb(-self.__scale) for val in price_col
+        ]
+        sales_taxes: list[None | Decimal] = [
+            Decimal(val).scaleb(-self.__scale) for val in st_col
+        ]
+        for text_i, pos in enumerate(self.__text_rows):
+            cnts[pos], prices[pos], sales_taxes[pos] = None, None, None
+            for col_i, text_col in enumerate(texts):
+                text_col[pos] = self.__text_vals[3 * text_i + col_i]
+        table = pa_m.Table.from_arrays(
+            [
+                pa_m.array(bill_col, pa_m.int64()),
+                pa_m.array(item_col, pa_m.int64()),
+                pa_m.DictionaryArray.from_arrays(
+                    pa_m.array(name_col, pa_m.int32()),
+                    pa_m.array(list(self.__name_ids), pa_m.string()),
+                ),
+                pa_m.array(imp_col, pa_m.bool_()),
+                pa_m.array(tax_col, pa_m.bool_()),
+                pa_m.array(cnts, pa_m.int64()),
+                pa_m.array(prices, decimal_t),
+                pa_m.array(sales_taxes, decimal_t),
+                *(pa_m.array(text_col, pa_m.string()) for text_col in texts),
+            ],
+            schema=self._schema(),
+        )
+        self.__pq_writer.write_table(table)
+
+    def _write_binary(self) -> None:
+        """To write the buffered rows as a binary row group."""
+        if self.__fh_w is None:
+            raise RuntimeError("The exporter is closed.")
+        names = [name.encode() for name in self.__name_ids]
+        texts = [text.encode() for text in self.__text_vals]
+        self.__fh_w.write(
+            _GROUP.pack(
+                len(self.__cols[0]),
+                len(names),
+                sum(map(len, names)),
+                len(self.__text_rows),
+            )
+        )
+        self.__fh_w.write(_le_bytes(array(_I32, map(len, names))))
+        self.__fh_w.writelines(names)
+        self.__fh_w.writelines(_le_bytes(col) for col in self.__cols)
+        self.__fh_w.write(_le_bytes(self.__text_rows))
+        self.__fh_w.write(_le_bytes(array(_I32, map(len, texts))))
+        self.__fh_w.writelines(texts)
+
+    def flush(self) -> None:
+        """To write the buffered rows as a row group and to clear the buffer."""
+        if not self.__cols[0]:
+            return
+        if self.__arrow is None:
+            self._write_binary()
+        else:
+            self._write_parquet()
+        self.__cols = self._new_columns()
+        self.__name_ids = {}
+        self.__scaled = {}
+        self.__text_rows = array(_I64)
+        self.__text_vals = []
+
+    def close(self) -> None:
+        """To write the buffered rows and to close the exported file."""
+        self.flush()
+        if self.__fh_w is not None:
+            self.__fh_w.close()
+            self.__fh_w = None
+        if self.__pq_writer is not None:
+            self.__pq_writer.close()
+            self.__pq_writer = None
+
+
+def _read_exact(fh_r: BinaryIO, size: int, /) -> bytes:
+    """To read an exact amount of bytes.
+
+    Args:
+        fh_r: The reader.
+        size: The amount of bytes.
+
+    Returns:
+        The bytes.
+
+    Raises:
+        ValueError: If the file ends before.
+    """
+    data = fh_r.read(size)
+    if len(data) != size:
+        raise ValueError("The exported file is truncated.")
+    return data
+
+
+def _read_text_rows(fh_r: BinaryIO, text_cnt: int, row_group: ExportRowGroup, /) -> None:
+    """To read the rows of a row group stored as text.
+
+    Args:
+        fh_r: The file, positioned after the columns of the row group.
+        text_cnt: The amount of rows stored as text.
+        row_group: The row group, whose amount, price and sales taxes of
+            these rows are replaced.
+
+    Raises:
+        ValueError: If the file is truncated or a row is out of range.
+    """
+    text_rows = _from_le_bytes(_I64, _read_exact(fh_r, text_cnt * 8))
+    text_lens = _from_le_bytes(_I32, _read_exact(fh_r, text_cnt * 3 * 4))
+    data = _read_exact(fh_r, sum(text_lens))
+    pos = 0
+    texts: list[str] = []
+    for text_len in text_lens:
+        texts.append(data[pos : pos + text_len].decode())
+        pos += text_len
+    for text_i, row in enumerate(text_rows):
+        if not 0 <= row < len(row_group):
+            raise ValueError("The exported file is corrupted.")
+        row_group.cnt[row] = int(texts[3 * text_i])
+        row_group.price[row] = Decimal(texts[3 * text_i + 1])
+        row_group.sales_taxes[row] = Decimal(texts[3 * text_i + 2])
+
+
+def read_row_groups(path: Path, /) -> Iterator[ExportRowGroup]:
+    """To read a file of the binary columnar layout row group by row group.
+
+    Args:
+        path: The file written by ``BillExporter`` without ``pyarrow``.
+
+    Yields:
+        The columns of each row group.
+
+    Raises:
+        ValueError: If the file is not an export of the binary layout.
+    """
+    with path.open("rb") as fh_r:
+        header = fh_r.read(_HEADER.size)
+        if len(header) != _HEADER.size or _HEADER.unpack(header)[0] != _MAGIC:
+            raise ValueError(f"{path} is not a binary bill export.")
+        scale = -_HEADER.unpack(header)[1]
+        while group := fh_r.read(_GROUP.size):
+            if len(group) != _GROUP.size:
+                raise ValueError("The exported file is truncated.")
+            rows, name_cnt, names_len, text_cnt = _GROUP.unpack(group)
+            name_lens = _from_le_bytes(_I32, _read_exact(fh_r, name_cnt * 4))
+            data = _read_exact(fh_r, names_len)
+            names: list[str] = []
+            pos = 0
+            for name_len in name_lens:
+                names.append(data[pos : pos + name_len].decode())
+                pos += name_len
+            cols = [
+                _from_le_bytes(code, _read_exact(fh_r, rows * array(code).itemsize))
+                for code in (_I64, _I64, _I32, "B", "B", _I64, _I64, _I64)
+            ]
+            row_group = ExportRowGroup(
+                bill_id=cols[0].tolist(),
+                item_id=cols[1].tolist(),
+                name=[names[name_id] for name_id in cols[2]],
+                imported=[bool(val) for val in cols[3]],
+                taxed=[bool(val) for val in cols[4]],
+                cnt=cols[5].tolist(),
+                price=[Decimal(val).scaleb(scale) for val in cols[6]],
+                sales_taxes=[Decimal(val).scaleb(scale) for val in cols[7]],
+            )
+            _read_text_rows(fh_r, text_cnt, row_group)
+            yield row_group
@@ -0,0 +1,219 @@
+"""A module replaying transcript files straight from a memory map."""
+import contextlib
+import mmap
+import re
+import time
+from collections.abc import Iterator
+from decimal import Decimal
+from pathlib import Path
+from re import Pattern
+from typing import TYPE_CHECKING, Final, TextIO
+
+from cashier.purchase.bill import Bill
+from cashier.purchase.cents import parse_cents
+from cashier.purchase.columnar_bill import ColumnarBill
+from cashier.purchase.container import (
+    CentsItem,
+    MoneyBackend,
+    PurchasedItem,
+    ReplayStats,
+)
+from cashier.purchase.formatter import InFormatter
+from cashier.purchase.products import ProductInfo
+from cashier.register import add_input, create_register, new_bill, write_bill
+
+if TYPE_CHECKING:
+    from cashier.export import BillExporter
+
+# every line: either amount, name, integer and decimal digits of the canonical
+# shape or the whole line in the last group
+_LINE: Final[Pattern[bytes]] = re.compile(
+    rb"^(?:[ \t\r\f\v]*(\d+) (\S.*) at (\d+)(?:\.(\d+))?[ \t\r\f\v]*|(.*))$",
+    re.MULTILINE,
+)
+# distinct names whose analysis is kept, the cache is emptied once it is full
+_NAME_CACHE: Final[int] = 1 << 16
+
+
+@contextlib.contextmanager
+def _map_file(transcript: Path, /) -> Iterator[bytes | mmap.mmap]:
+    """To map a transcript file read-only into memory.
+
+    Args:
+        transcript: The transcript file.
+
+    Yields:
+        The memory map of the file or empty bytes for an empty file.
+    """
+    with transcript.open("rb") as fh_r:
+        if not transcript.stat().st_size:
+            yield b""
+            return
+        with mmap.mmap(fh_r.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if hasattr(buf, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                buf.madvise(mmap.MADV_SEQUENTIAL)
+            yield buf
+
+
+def _lines(buf: bytes | mmap.mmap, /) -> Iterator[re.Match[bytes]]:
+    """To scan the lines of a mapped transcript in a single pass.
+
+    Args:
+        buf: The mapped transcript.
+
+    Yields:
+        The match of each line, excluding its newline.
+    """
+    size = len(buf)
+    for match_res in _LINE.finditer(buf):
+        # the empty remainder after the last newline is not a line
+        if match_res.start() == size:
+            return
+        yield match_res
+
+
+def _parse_line(
+    match_res: re.Match[bytes],
+    in_form: InFormatter,
+    money: MoneyBackend,
+    names: dict[bytes, ProductInfo],
+    /,
+) -> None | PurchasedItem | CentsItem:
+    """To create the item of a line of the canonical shape.
+
+    The amount and the price are parsed from the bytes, only the name is
+    decoded and looked up in the product dictionary, once per distinct name.
+    Names outside of ASCII are left to the text parser, because they may
+    contain whitespace only known to ``str``.
+
+    Args:
+        match_res: The match of the line.
+        in_form: The formatter deciding the import state and the exemption.
+        money: The representation of prices and sales taxes.
+        names: The analysed names by their bytes, updated in place.
+
+    Returns:
+        The purchased item or None if the line has to be analysed as text.
+    """
+    cnt, name_b, int_part, frac_part = match_res.group(1, 2, 3, 4)
+    if cnt is None:
+        return None
+    info = names.get(name_b)
+    if info is None:
+        if not name_b.isascii():
+            return None
+        if len(names) >= _NAME_CACHE:
+            names.clear()
+        info = names[name_b] = in_form.product_info(name_b.decode("ascii"))
+    _, name, imported, taxed = info
+    if money is MoneyBackend.CENTS:
+        price = parse_cents(int_part, frac_part or b"")
+        if price is None:
+            return None
+        return CentsItem(
+            imported=imported,
+            name=name,
+            price=price,
+            cnt=int(cnt),
+            taxed=taxed,
+        )
+    price_end = match_res.end(3 if frac_part is None else 4)
+    return PurchasedItem(
+        imported=imported,
+        name=name,
+        # Decimal has no constructor for bytes, its ASCII string is the fastest
+        price=Decimal(match_res.string[match_res.start(3) : price_end].decode("ascii")),
+        cnt=int(cnt),
+        taxed=taxed,
+    )
+
+
+def _add_item(bill: Bill | ColumnarBill, p_item: PurchasedItem | CentsItem, /) -> None:
+    """To add a parsed item to a purchase.
+
+    Args:
+        bill: The current purchase.
+        p_item: The purchased item, priced in cents for a ``ColumnarBill``.
+    """
+    if isinstance(p_item, CentsItem):
+        if isinstance(bill, ColumnarBill):
+            bill.add_cents_item(p_item)
+    else:
+        bill.add_item(p_item)
+
+
+def run_ingest(
+    tax_file: None | Path,
+    transcript: Path,
+    sink: TextIO,
+    /,
+    money: MoneyBackend = MoneyBackend.DECIMAL,
+    exporter: "None | BillExporter" = None,
+    rule_file: None | Path = None,
+    region: None | str = None,
+    aggregate: bool = False,
+    out_format: str = "text",
+) -> ReplayStats:
+    """To replay a transcript file which is scanned as bytes.
+
+    The file is mapped into memory instead of being read and decoded line by
+    line. Lines of the canonical shape ``<cnt> <name> at <price>`` are parsed
+    from the bytes, all other lines, like the separators of purchases, are
+    decoded and analysed as in ``run_batch``. Thus the receipts are identical
+    to the ones of ``run_batch`` for UTF-8 transcripts whose lines end with
+    ``\\n`` or ``\\r\\n``. Purchases are written as soon as they are concluded
+    and the mapped pages are only read once, thus the memory stays flat
+    regardless of the size of the file.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        transcript: The transcript file, one input per line.
+        sink: The writer receiving the receipts.
+        money: The representation of prices and sales taxes.
+        exporter: The optional columnar export receiving the items of every
+            finished purchase.
+        rule_file: The optional TOML file with the tax rules of several regions.
+        region: The region of the tax rules, defaults to the one of the file.
+        aggregate: Whether equal items of a purchase are merged into one line,
+            not supported for integer cents.
+        out_format: The name of a registered output format of the receipts.
+
+    Returns:
+        Statistics describing the run.
+
+    Raises:
+        ValueError: If purchases in integer cents should be aggregated or
+            the output format is not registered.
+    """
+    start_t = time.perf_counter()
+    in_form, out_form, tax_calc = create_register(
+        tax_file, rule_file=rule_file, region=region, out_format=out_format
+    )
+    bill = new_bill(out_form, tax_calc, money, aggregate=aggregate)
+    bill_cnt, line_cnt, invalid_cnt = 1, 0, 0
+    names: dict[bytes, ProductInfo] = {}
+    with _map_file(transcript) as buf:
+        for match_res in _lines(buf):
+            line_cnt += 1
+            p_item = _parse_line(match_res, in_form, money, names)
+            if p_item is not None:
+                _add_item(bill, p_item)
+                continue
+            input_str = match_res.group().decode()
+            if not in_form.is_not_term(input_str):
+                break
+            if in_form.is_not_bought(input_str):
+                if add_input(bill, in_form, input_str) is None:
+                    invalid_cnt += 1
+            else:
+                write_bill(bill, bill_cnt, sink, exporter=exporter)
+                bill = new_bill(out_form, tax_calc, money, aggregate=aggregate)
+                bill_cnt += 1
+    write_bill(bill, bill_cnt, sink, exporter=exporter)
+    sink.flush()
+    return ReplayStats(
+        lines=line_cnt,
+        invalid=invalid_cnt,
+        bills=bill_cnt,
+        seconds=time.perf_counter() - start_t,
+    )
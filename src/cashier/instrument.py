@@ -0,0 +1,191 @@
+"""A module providing optional timing counters for the hot paths."""
+import functools
+import json
+import random
+import statistics
+import time
+from collections.abc import Callable
+from typing import Final, ParamSpec, TextIO, TypeVar, final
+
+from cashier.purchase.bill import Bill
+from cashier.purchase.columnar_bill import ColumnarBill
+from cashier.purchase.exemption import ExemptionMatcher
+from cashier.purchase.exemption_index import ExemptionIndex
+from cashier.purchase.formatter import InFormatter
+from cashier.purchase.tax_calculator import TaxCalculator
+
+_P = ParamSpec("_P")
+_T = TypeVar("_T")
+
+# the amount of durations kept per stage for the percentiles
+_SAMPLES: Final[int] = 10_000
+# the instrumented stages: name, class, method
+_PROBES: Final[tuple[tuple[str, type, str], ...]] = (
+    ("parse", InFormatter, "analyse_input"),
+    ("parse_cents", InFormatter, "analyse_input_cents"),
+    ("exempt", ExemptionMatcher, "is_taxed"),
+    ("exempt_index", ExemptionIndex, "is_taxed"),
+    ("tax", TaxCalculator, "tax"),
+    ("tax_cents", TaxCalculator, "tax_cents"),
+    ("tax_many_cents", TaxCalculator, "tax_many_cents"),
+    ("bill_add", Bill, "add_item"),
+    ("bill_finish", Bill, "finish"),
+    ("bill_write", Bill, "write_to"),
+    ("columnar_add", ColumnarBill, "add_cents_item"),
+    ("columnar_write", ColumnarBill, "write_to"),
+)
+
+
+@final
+class StageStats:
+    """Collects the call count and the durations of a stage.
+
+    The percentiles are estimated from a uniform sample of the durations.
+
+    Args:
+        seed: The seed of the sampling.
+    """
+
+    __slots__ = ("_rnd", "_samples", "count", "total")
+
+    def __init__(self, seed: int = 0, /) -> None:
+        """To initialise the class."""
+        super().__init__()
+        self.count: int = 0
+        self.total: float = 0.0
+        self._samples: list[float] = []
+        self._rnd: random.Random = random.Random(seed)  # noqa: S311
+
+    def add(self, duration: float, /) -> None:
+        """To record a call.
+
+        Args:
+            duration: The duration of the call in seconds.
+        """
+        self.count += 1
+        self.total += duration
+        if len(self._samples) < _SAMPLES:
+            self._samples.append(duration)
+        elif (pos := self._rnd.randrange(self.count)) < _SAMPLES:
+            self._samples[pos] = duration
+
+    def summary(self) -> dict[str, float]:
+        """To summarise the recorded calls.
+
+        Returns:
+            The call count, the cumulative time in seconds and the mean,
+            median, 90th and 99th percentile in microseconds.
+        """
+        quantiles = (
+            statistics.quantiles(self._samples, n=100, method="inclusive")
+            if len(self._samples) > 1
+            else self._samples * 99
+        )
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_us": self.total / self.count * 1e6 if self.count else 0.0,
+            "p50_us": quantiles[49] * 1e6 if quantiles else 0.0,
+            "p90_us": quantiles[89] * 1e6 if quantiles else 0.0,
+            "p99_us": quantiles[98] * 1e6 if quantiles else 0.0,
+        }
+
+
+_STAGES: Final[dict[str, StageStats]] = {}
+_ORIGINALS: Final[dict[str, Callable[..., object]]] = {}
+
+
+def _timed(stats: StageStats, func: Callable[_P, _T], /) -> Callable[_P, _T]:
+    """To wrap a function with a timer.
+
+    Args:
+        stats: The counters receiving the durations.
+        func: The function which should be timed.
+
+    Returns:
+        The timed function.
+    """
+    clock = time.perf_counter
+
+    @functools.wraps(func)
+    def _wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _T:
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.add(clock() - start)
+
+    return _wrapper
+
+
+def is_enabled() -> bool:
+    """To check whether the instrumentation is enabled.
+
+    Returns:
+        Whether the hot paths are timed.
+    """
+    return bool(_ORIGINALS)
+
+
+def enable() -> None:
+    """To time the hot paths.
+
+    The methods of the instrumented classes are replaced by timed versions,
+    thus no overhead remains while the instrumentation is disabled.
+    Decider functions of ``decide_if_taxed`` are only timed if they are
+    created after enabling the instrumentation.
+    """
+    if is_enabled():
+        return
+    for stage, cls, name in _PROBES:
+        _ORIGINALS[stage] = getattr(cls, name)
+        _STAGES.setdefault(stage, StageStats())
+        setattr(cls, name, _timed(_STAGES[stage], _ORIGINALS[stage]))
+
+
+def disable() -> None:
+    """To restore the original hot paths, the counters are kept."""
+    for stage, cls, name in _PROBES:
+        if stage in _ORIGINALS:
+            setattr(cls, name, _ORIGINALS.pop(stage))
+
+
+def reset() -> None:
+    """To clear all counters."""
+    for stage in _STAGES:
+        _STAGES[stage] = StageStats()
+    if is_enabled():
+        disable()
+        enable()
+
+
+def report() -> dict[str, dict[str, float]]:
+    """To summarise all stages.
+
+    Returns:
+        The summary of each stage, which was called at least once.
+    """
+    return {
+        stage: stats.summary() for stage, stats in _STAGES.items() if stats.count
+    }
+
+
+def dump(fmt: str, fh_w: TextIO, /) -> None:
+    """To write the summary of all stages.
+
+    Args:
+        fmt: Either ``json`` or ``text``.
+        fh_w: The writer receiving the summary.
+    """
+    stages = report()
+    if fmt == "json":
+        fh_w.write(json.dumps(stages, indent=2) + "\n")
+        return
+    fh_w.write("---\nSTAGES:\n")
+    for stage, summary in stages.items():
+        fh_w.write(
+            f"\t{stage}: {summary['count']:.0f} calls, {summary['total_s']:.3f} s,"
+            + f" mean {summary['mean_us']:.2f} us, p50 {summary['p50_us']:.2f} us,"
+            + f" p90 {summary['p90_us']:.2f} us, p99 {summary['p99_us']:.2f} us\n"
+        )
+    fh_w.write("---\n")
@@ -0,0 +1,579 @@
+"""A module providing a crash-safe journal of open purchases."""
+import contextlib
+import os
+import struct
+import time
+import zlib
+from collections.abc import Iterator, Mapping
+from decimal import Decimal
+from pathlib import Path
+from typing import BinaryIO, Final, final
+
+from cashier.purchase.bill import Bill
+from cashier.purchase.container import PItemContainer, PurchasedItem
+from cashier.purchase.formatter import OutFormatter
+from cashier.purchase.tax_calculator import TaxCalculator
+
+# file header: magic, generation
+_J_MAGIC: Final[bytes] = b"CSHXJNL2"
+_S_MAGIC: Final[bytes] = b"CSHXSNP3"
+_FILE: Final[struct.Struct] = struct.Struct("<8sI")
+# frame header: CRC-32 of the body, size of the string section, amount of records
+_FRAME: Final[struct.Struct] = struct.Struct("<III")
+# string definition: string id, size of the UTF-8 string
+_STRING: Final[struct.Struct] = struct.Struct("<IH")
+# record: kind, flags, bill id, item id, amount, string ids of the name,
+# the price and the sales taxes; in a snapshot, the amount of an opened purchase
+# is the amount of its item records, which follow it
+_RECORD: Final[struct.Struct] = struct.Struct("<BBIIQIII")
+# the largest amount of an added item
+_MAX_CNT: Final[int] = 2**64 - 1
+# kinds of a record
+_R_OPEN: Final[int] = 1
+_R_ADD: Final[int] = 2
+_R_REM: Final[int] = 3
+_R_CLOSE: Final[int] = 4
+# flags of an added item
+_F_IMPORTED: Final[int] = 1
+_F_TAXED: Final[int] = 2
+_SNAPSHOT: Final[str] = "snapshot.bin"
+# records of a purchase missing from the snapshot
+_NO_RECORDS: Final[memoryview] = memoryview(b"")
+# a record and the strings of its file
+_Entry = tuple[tuple[int, ...], Mapping[int, str]]
+# per open purchase: its records in the snapshot, the strings of the snapshot,
+# its later records keyed on the item ids, None for removed items
+_BillRecords = tuple[memoryview, Mapping[int, str], dict[int, None | _Entry]]
+# last item id of each open purchase, records of each open purchase
+_State = tuple[dict[int, int], dict[int, _BillRecords]]
+
+
+def _journal_name(gen: int, /) -> str:
+    """To return the file name of a journal generation.
+
+    Args:
+        gen: The generation of the journal.
+
+    Returns:
+        The file name.
+    """
+    return f"journal-{gen:08d}.bin"
+
+
+def _sync_dir(directory: Path, /) -> None:
+    """To persist the entries of a directory, if the platform supports it.
+
+    Args:
+        directory: The directory.
+    """
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    with contextlib.suppress(OSError):
+        os.fsync(dir_fd)
+    os.close(dir_fd)
+
+
+def _read_frames(data: bytes, start: int, /) -> tuple[list[tuple[int, int, int]], int]:
+    """To find the complete frames of a file.
+
+    The search stops at the first frame which is truncated or corrupted,
+    e.g. by a crash while writing.
+
+    Args:
+        data: The content of the file.
+        start: The offset of the first frame.
+
+    Returns:
+        The offsets of the string section, of the records and of the end of each
+        frame, and the offset after the last valid frame.
+    """
+    frames: list[tuple[int, int, int]] = []
+    pos = start
+    while pos + _FRAME.size <= len(data):
+        crc, strings_len, rec_cnt = _FRAME.unpack_from(data, pos)
+        end = pos + _FRAME.size + strings_len + rec_cnt * _RECORD.size
+        if end > len(data) or zlib.crc32(data[pos + _FRAME.size : end]) != crc:
+            break
+        frames.append((pos + _FRAME.size, pos + _FRAME.size + strings_len, end))
+        pos = end
+    return frames, pos
+
+
+def _read_strings(data: bytes, pos: int, end: int, strings: dict[int, str], /) -> None:
+    """To decode the string section of a frame.
+
+    Args:
+        data: The content of the file.
+        pos: The offset of the string section.
+        end: The offset after the string section.
+        strings: The strings of the file keyed on their ids, updated in place.
+    """
+    while pos < end:
+        str_id, str_len = _STRING.unpack_from(data, pos)
+        pos += _STRING.size
+        strings[str_id] = data[pos : pos + str_len].decode()
+        pos += str_len
+
+
+def _item(entry: _Entry, decimals: dict[str, Decimal], /) -> PItemContainer:
+    """To convert the record of an added item into a purchased item.
+
+    Args:
+        entry: The record and the strings of its file.
+        decimals: The decoded prices and sales taxes, updated in place.
+
+    Returns:
+        The purchased item with its id and sales taxes.
+    """
+    rec, strings = entry
+    price, sales_taxes = strings[rec[6]], strings[rec[7]]
+    if price not in decimals:
+        decimals[price] = Decimal(price)
+    if sales_taxes not in decimals:
+        decimals[sales_taxes] = Decimal(sales_taxes)
+    return PItemContainer(
+        id=rec[3],
+        item=PurchasedItem(
+            imported=bool(rec[1] & _F_IMPORTED),
+            name=strings[rec[5]],
+            price=decimals[price],
+            cnt=rec[4],
+            taxed=bool(rec[1] & _F_TAXED),
+        ),
+        sales_taxes=decimals[sales_taxes],
+    )
+
+
+def _recovered_items(records: _BillRecords, /) -> Iterator[PItemContainer]:
+    """To convert the surviving records of an open purchase into purchased items.
+
+    Records are decoded only once the purchase is used, each distinct price
+    and sales taxes string only once.
+
+    Args:
+        records: The records of the purchase, consumed by the iteration.
+
+    Yields:
+        The purchased items in order of addition.
+    """
+    snap_recs, snap_strings, later = records
+    decimals: dict[str, Decimal] = {}
+    for rec in _RECORD.iter_unpack(snap_recs):
+        if (entry := later.pop(rec[3], (rec, snap_strings))) is not None:
+            yield _item(entry, decimals)
+    for entry in later.values():
+        if entry is not None:
+            yield _item(entry, decimals)
+
+
+def _split_snapshot(
+    recs: memoryview, strings: Mapping[int, str], state: _State, /
+) -> None:
+    """To split the records of a snapshot into the records of each purchase.
+
+    Only the opened purchases are decoded, the records of their items are
+    kept as they are.
+
+    Args:
+        recs: The records of the snapshot.
+        strings: The strings of the snapshot keyed on their ids.
+        state: The last item id and the records of each open purchase,
+            keyed on the id of the purchase, updated in place.
+    """
+    last_ids, items = state
+    pos = 0
+    while pos < len(recs):
+        _, _, bill_id, last_id, item_cnt = _RECORD.unpack_from(recs, pos)[:5]
+        end = pos + (item_cnt + 1) * _RECORD.size
+        items[bill_id] = (recs[pos + _RECORD.size : end], strings, {})
+        last_ids[bill_id] = last_id
+        pos = end
+
+
+def _replay(recs: memoryview, strings: Mapping[int, str], state: _State, /) -> None:
+    """To replay the records of a journal frame on the state of the open purchases.
+
+    Args:
+        recs: The records of the frame.
+        strings: The strings of the file keyed on their ids.
+        state: The last item id and the records of each open purchase,
+            keyed on the id of the purchase, updated in place.
+    """
+    last_ids, items = state
+    for rec in _RECORD.iter_unpack(recs):
+        kind = rec[0]
+        if kind == _R_ADD:
+            if (bill_recs := items.get(rec[2])) is None:
+                bill_recs = items[rec[2]] = (_NO_RECORDS, {}, {})
+            bill_recs[2][rec[3]] = (rec, strings)
+        elif kind == _R_CLOSE:
+            items.pop(rec[2], None)
+            last_ids.pop(rec[2], None)
+        elif kind == _R_REM:
+            if (bill_recs := items.get(rec[2])) is not None:
+                bill_recs[2][rec[3]] = None
+                last_ids[rec[2]] = max(last_ids.get(rec[2], 0), rec[3])
+        elif kind == _R_OPEN:
+            items.setdefault(rec[2], (_NO_RECORDS, {}, {}))
+            last_ids[rec[2]] = rec[3]
+
+
+@final
+class BillJournal:
+    """An append-only journal of the open purchases of a register.
+
+    Every change of a purchase is appended as a fixed-size binary record.
+    Records are buffered and written as one checksummed frame with a single
+    ``fsync`` (group commit), either when the buffer holds ``group_size``
+    records, when ``sync_interval`` seconds passed or when ``commit`` is
+    called. A snapshot stores the open purchases compactly and starts a new
+    journal generation, thus recovery reads the last snapshot and replays
+    only the following records, at most about ``snapshot_every``. The
+    records of a recovered purchase are decoded once it is used.
+
+    Args:
+        directory: The directory holding the journal files.
+        group_size: The maximal amount of records written with one ``fsync``.
+        sync_interval: The maximal time in seconds a record stays buffered,
+            checked whenever a record is appended.
+        snapshot_every: The amount of records after which a snapshot is due.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        /,
+        group_size: int = 1_024,
+        sync_interval: float = 0.05,
+        snapshot_every: int = 100_000,
+    ) -> None:
+        """To initialise the class."""
+        super().__init__()
+        directory.mkdir(parents=True, exist_ok=True)
+        self.__dir: Path = directory
+        self.__group_size: int = max(group_size, 1)
+        self.__sync_interval: float = sync_interval
+        self.__snapshot_every: int = snapshot_every
+        self.__gen: int = 0
+        self.__fh_w: None | BinaryIO = None
+        # ids of the strings of the current file, buffered frame: new strings, records
+        self.__strings: dict[str, int] = {}
+        self.__string_buf: bytearray = bytearray()
+        self.__rec_buf: bytearray = bytearray()
+        self.__rec_cnt: int = 0
+        self.__last_sync: float = time.monotonic()
+        self.__since_snapshot: int = 0
+
+    @property
+    def snapshot_due(self) -> bool:
+        """Whether enough records were appended since the last snapshot."""
+        return self.__since_snapshot >= self.__snapshot_every
+
+    def _generations(self) -> list[int]:
+        """To list the generations of the journal files in the directory.
+
+        Returns:
+            The sorted generations.
+        """
+        return sorted(
+            int(path.stem.removeprefix("journal-"))
+            for path in self.__dir.glob("journal-*.bin")
+            if path.stem.removeprefix("journal-").isdigit()
+        )
+
+    def _load(
+        self, path: Path, magic: bytes, state: _State, /
+    ) -> tuple[int, int, dict[int, str]]:
+        """To replay the records of a file on the state of the open purchases.
+
+        The records of a snapshot are split per purchase without decoding
+        them, the records of a journal are kept as tuples. Both are converted
+        into items once a recovered purchase is used.
+
+        Args:
+            path: The journal or snapshot file.
+            magic: The expected magic of the file.
+            state: The last item id and the added items of each open purchase,
+                keyed on the id of the purchase, updated in place.
+
+        Returns:
+            The generation of the file, the offset after its last valid frame and
+            the strings of the valid frames keyed on their ids, the generation is
+            -1 if the file is missing or invalid.
+        """
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return -1, 0, {}
+        if len(data) < _FILE.size or _FILE.unpack_from(data)[0] != magic:
+            return -1, 0, {}
+        gen = _FILE.unpack_from(data)[1]
+        frames, end = _read_frames(data, _FILE.size)
+        strings: dict[int, str] = {}
+        view = memoryview(data)
+        for strings_pos, rec_pos, frame_end in frames:
+            _read_strings(data, strings_pos, rec_pos, strings)
+            if magic == _S_MAGIC:
+                _split_snapshot(view[rec_pos:frame_end], strings, state)
+            else:
+                _replay(view[rec_pos:frame_end], strings, state)
+        return gen, end, strings
+
+    def recover(
+        self, formatter: OutFormatter, tax_calc: TaxCalculator, /
+    ) -> dict[int, Bill]:
+        """To rebuild the open purchases and to open the journal for appending.
+
+        The last snapshot is loaded and the following journal generations are
+        replayed. A torn frame at the end of the last journal is discarded.
+
+        Args:
+            formatter: The formatter used for creating the output of the purchases.
+            tax_calc: The calculator for the sales taxes of new items.
+
+        Returns:
+            The open purchases keyed on their ids, in ascending order.
+        """
+        state: _State = ({}, {})
+        snap_gen = max(self._load(self.__dir / _SNAPSHOT, _S_MAGIC, state)[0], 0)
+        gens = [gen for gen in self._generations() if gen >= snap_gen]
+        end = 0
+        strings: dict[int, str] = {}
+        for gen in gens:
+            _, end, strings = self._load(self.__dir / _journal_name(gen), _J_MAGIC, state)
+        self.__gen = gens[-1] if gens else snap_gen
+        self._open_journal(end if gens else 0, strings)
+        last_ids, items = state
+        bills: dict[int, Bill] = {}
+        for bill_id in sorted(items):
+            bill = Bill(formatter, tax_calc)
+            bill.restore(_recovered_items(items[bill_id]), last_ids.get(bill_id, 0))
+            bills[bill_id] = bill
+        return bills
+
+    def _open_journal(self, end: int, strings: Mapping[int, str], /) -> None:
+        """To open the current journal generation for appending.
+
+        Args:
+            end: The offset after the last valid frame, a torn tail is cut off.
+                Zero creates a new file.
+            strings: The strings of the valid frames keyed on their ids, new
+                records of an existing file keep referring to them.
+        """
+        path = self.__dir / _journal_name(self.__gen)
+        fh_w: BinaryIO
+        if end:
+            fh_w = path.open("r+b")
+            fh_w.truncate(end)
+            fh_w.seek(end)
+        else:
+            fh_w = path.open("wb")
+            fh_w.write(_FILE.pack(_J_MAGIC, self.__gen))
+            fh_w.flush()
+            os.fsync(fh_w.fileno())
+            _sync_dir(self.__dir)
+        self.__fh_w = fh_w
+        self.__strings = (
+            {value: str_id for str_id, value in strings.items()} if end else {}
+        )
+
+    def _string_id(self, value: str, /) -> int:
+        """To return the id of a string, new strings are added to the buffered frame.
+
+        Args:
+            value: The name, price or sales taxes of an item.
+
+        Returns:
+            The id of the string within the current file.
+        """
+        str_id = self.__strings.get(value)
+        if str_id is None:
+            str_id = self.__strings[value] = len(self.__strings)
+            encoded = value.encode()
+            self.__string_buf += _STRING.pack(str_id, len(encoded))
+            self.__string_buf += encoded
+        return str_id
+
+    def _append(self, record: bytes, /) -> None:
+        """To buffer a record and to commit the buffer if it is due.
+
+        Args:
+            record: The packed record.
+        """
+        self.__rec_buf += record
+        self.__rec_cnt += 1
+        self.__since_snapshot += 1
+        if (
+            self.__rec_cnt >= self.__group_size
+            or time.monotonic() - self.__last_sync >= self.__sync_interval
+        ):
+            self.commit()
+
+    def open_bill(self, bill_id: int, /) -> None:
+        """To record a new purchase.
+
+        Args:
+            bill_id: The id of the purchase.
+        """
+        self._append(_RECORD.pack(_R_OPEN, 0, bill_id, 0, 0, 0, 0, 0))
+
+    def _pack_add(self, bill_id: int, p_el: PItemContainer, /) -> bytes:
+        """To pack the record of an added item.
+
+        Prices and sales taxes are stored as strings, thus they are recovered
+        exactly, including their decimal places.
+
+        Args:
+            bill_id: The id of the purchase.
+            p_el: The added item with its id and sales taxes.
+
+        Returns:
+            The packed record.
+
+        Raises:
+            ValueError: If the amount doesn't fit into 64 bits.
+        """
+        p_item = p_el.item
+        try:
+            return _RECORD.pack(
+                _R_ADD,
+                (_F_IMPORTED if p_item.imported else 0)
+                | (_F_TAXED if p_item.taxed else 0),
+                bill_id,
+                p_el.id,
+                p_item.cnt,
+                self._string_id(p_item.name),
+                self._string_id(str(p_item.price)),
+                self._string_id(str(p_el.sales_taxes)),
+            )
+        except struct.error as ex_n:
+            raise ValueError("The item can't be journaled.") from ex_n
+
+    @staticmethod
+    def can_record(p_item: PurchasedItem, /) -> bool:
+        """To check whether an item fits into a record.
+
+        Args:
+            p_item: The purchased item.
+
+        Returns:
+            Whether the amount of the item fits into 64 bits.
+        """
+        return 0 <= p_item.cnt <= _MAX_CNT
+
+    def add_item(self, bill_id: int, p_el: PItemContainer, /) -> None:
+        """To record an added item.
+
+        Args:
+            bill_id: The id of the purchase.
+            p_el: The added item with its id and sales taxes.
+        """
+        self._append(self._pack_add(bill_id, p_el))
+
+    def rem_item(self, bill_id: int, item_id: int, /) -> None:
+        """To record a removed item.
+
+        Args:
+            bill_id: The id of the purchase.
+            item_id: The id of the removed item.
+        """
+        self._append(_RECORD.pack(_R_REM, 0, bill_id, item_id, 0, 0, 0, 0))
+
+    def close_bill(self, bill_id: int, /) -> None:
+        """To record a purchase which doesn't need to be recovered anymore.
+
+        Args:
+            bill_id: The id of the purchase.
+        """
+        self._append(_RECORD.pack(_R_CLOSE, 0, bill_id, 0, 0, 0, 0, 0))
+
+    def _frame(self) -> bytes:
+        """To pack the buffered strings and records into a frame and clear the buffer.
+
+        Returns:
+            The frame.
+        """
+        body = bytes(self.__string_buf + self.__rec_buf)
+        frame = _FRAME.pack(zlib.crc32(body), len(self.__string_buf), self.__rec_cnt)
+        self.__string_buf.clear()
+        self.__rec_buf.clear()
+        self.__rec_cnt = 0
+        return frame + body
+
+    def commit(self) -> None:
+        """To write and ``fsync`` all buffered records.
+
+        Raises:
+            RuntimeError: If the journal wasn't opened by ``recover``.
+        """
+        self.__last_sync = time.monotonic()
+        if not self.__rec_cnt:
+            return
+        if self.__fh_w is None:
+            raise RuntimeError("The journal has to be recovered first.")
+        self.__fh_w.write(self._frame())
+        self.__fh_w.flush()
+        os.fsync(self.__fh_w.fileno())
+
+    def _items(self, bills: Mapping[int, Bill], /) -> Iterator[bytes]:
+        """To pack the records describing open purchases.
+
+        The records of the items of a purchase follow the record opening it.
+
+        Args:
+            bills: The open purchases keyed on their ids.
+
+        Yields:
+            The packed records.
+        """
+        for bill_id, bill in bills.items():
+            records = [self._pack_add(bill_id, p_el) for p_el in bill.items()]
+            yield _RECORD.pack(_R_OPEN, 0, bill_id, bill.last_id, len(records), 0, 0, 0)
+            yield from records
+
+    def snapshot(self, bills: Mapping[int, Bill], /) -> None:
+        """To store the open purchases and to start a new journal generation.
+
+        The snapshot is written to a temporary file and renamed afterwards,
+        older journal generations are deleted once the snapshot is durable.
+
+        Args:
+            bills: All open purchases keyed on their ids.
+        """
+        self.commit()
+        if self.__fh_w is not None:
+            self.__fh_w.close()
+        self.__gen += 1
+        self._open_journal(0, {})
+        tmp_file = self.__dir / f".{_SNAPSHOT}.tmp"
+        with tmp_file.open("wb") as fh_w:
+            fh_w.write(_FILE.pack(_S_MAGIC, self.__gen))
+            records = b"".join(self._items(bills))
+            fh_w.write(
+                _FRAME.pack(
+                    zlib.crc32(bytes(self.__string_buf) + records),
+                    len(self.__string_buf),
+                    len(records) // _RECORD.size,
+                )
+            )
+            fh_w.write(self.__string_buf)
+            fh_w.write(records)
+            fh_w.flush()
+            os.fsync(fh_w.fileno())
+        self.__string_buf.clear()
+        self.__strings.clear()
+        tmp_file.replace(self.__dir / _SNAPSHOT)
+        _sync_dir(self.__dir)
+        for gen in self._generations():
+            if gen < self.__gen:
+                (self.__dir / _journal_name(gen)).unlink()
+        self.__since_snapshot = 0
+
+    def close(self) -> None:
+        """To commit all buffered records and to close the journal file."""
+        self.commit()
+        if self.__fh_w is not None:
+            self.__fh_w.close()
+            self.__fh_w = None
@@ -1,21 +1,390 @@
-"""Main function."""
+"""Main function.
+
+Only the modules of the selected mode are imported, thus short runs like
+``--version`` or a batch replay don't pay for the server, the configuration
+watcher or NumPy.
+"""
 import argparse
 import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Final
 
-from cashier.register import start_register
-from cashier.version import get_version
+if TYPE_CHECKING:
+    from cashier.config import ConfigStore
 
+_BUF_SIZE: Final[int] = 1 << 16
 
-def main() -> None:
-    """To start the purchase simulation.
 
-    Analyses the given arguments and starts the software.
+def _start_batch(
+    tax_file: None | Path,
+    batch_file: str,
+    out_file: None | str,
+    workers: int,
+    chunk_size: int,
+    money: str,
+    export_file: None | str,
+    rule_file: None | Path,
+    region: None | str,
+    aggregate: bool,
+    out_format: str,
+    use_mmap: bool,
+    /,
+) -> None:
+    """To replay a transcript in the non-interactive batch mode.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        batch_file: The transcript file or ``-`` for the standard input.
+        out_file: The optional receipt file, defaults to the standard output.
+        workers: The amount of worker processes, one replays in this process.
+        chunk_size: The amount of purchases sent to a worker at once.
+        money: The representation of prices and sales taxes.
+        export_file: The optional columnar export of the finished purchases.
+        rule_file: The optional TOML file with the tax rules of several regions.
+        region: The region of the tax rules, defaults to the one of the file.
+        aggregate: Whether equal items of a purchase are merged into one line.
+        out_format: The output format of the receipts.
+        use_mmap: Whether the transcript file is scanned as bytes in a memory map.
+    """
+    import contextlib
+
+    from cashier.purchase.container import MoneyBackend
+
+    money_b = MoneyBackend(money)
+    if export_file is None:
+        exporter = None
+    else:
+        from cashier.export import BillExporter
+
+        exporter = BillExporter(Path(export_file))
+    with (
+        (
+            contextlib.nullcontext(sys.stdin if batch_file == "-" else None)
+            if batch_file == "-" or use_mmap
+            else Path(batch_file).open("r")
+        ) as fh_in,
+        (
+            contextlib.nullcontext(sys.stdout)
+            if out_file is None
+            else Path(out_file).open("w", buffering=_BUF_SIZE)
+        ) as fh_out,
+    ):
+        if fh_in is None:
+            from cashier.ingest import run_ingest
+
+            stats = run_ingest(
+                tax_file,
+                Path(batch_file),
+                fh_out,
+                money=money_b,
+                exporter=exporter,
+                rule_file=rule_file,
+                region=region,
+                aggregate=aggregate,
+                out_format=out_format,
+            )
+        elif workers > 1:
+            from cashier.replay import run_replay
+
+            stats = run_replay(
+                tax_file,
+                fh_in,
+                fh_out,
+                workers=workers,
+                chunk_size=chunk_size,
+                money=money_b,
+                rule_file=rule_file,
+                region=region,
+                aggregate=aggregate,
+                out_format=out_format,
+            )
+        else:
+            from cashier.register import run_batch
+
+            stats = run_batch(
+                tax_file,
+                fh_in,
+                fh_out,
+                money=money_b,
+                exporter=exporter,
+                rule_file=rule_file,
+                region=region,
+                aggregate=aggregate,
+                out_format=out_format,
+            )
+    if exporter is not None:
+        exporter.close()
+    print(
+        f"processed {stats.lines} lines ({stats.invalid} not recognised)"
+        + f" in {stats.seconds:.3f}s [{stats.lines_per_second:.0f} lines/s]",
+        file=sys.stderr,
+    )
+
+
+def _reprice(
+    tax_file: None | Path,
+    catalog_file: str,
+    out_file: None | str,
+    scenarios: list[tuple[float, float]],
+    workers: int,
+    chunk_size: int,
+    /,
+) -> None:
+    """To price a catalog with candidate tax rates and to print the deltas.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        catalog_file: The catalog file or ``-`` for the standard input.
+        out_file: The optional report file, defaults to the standard output.
+        scenarios: The candidate import and basic sales taxes.
+        workers: The amount of worker processes.
+        chunk_size: The amount of catalog lines sent to a worker at once.
+    """
+    import contextlib
+
+    from cashier.reprice import run_reprice
+
+    if not scenarios:
+        print("repricing requires at least one --scenario", file=sys.stderr)
+        sys.exit(2)
+    with (
+        contextlib.nullcontext(sys.stdin)
+        if catalog_file == "-"
+        else Path(catalog_file).open("r")
+    ) as fh_in:
+        report = run_reprice(
+            tax_file, fh_in, scenarios, workers=workers, chunk_size=chunk_size
+        )
+    lines = [
+        f"baseline {report.baseline.import_taxes}/{report.baseline.basic_taxes}:"
+        + f" sales taxes {report.baseline.sales_taxes},"
+        + f" total {report.baseline.total}"
+    ]
+    lines.extend(
+        f"scenario {result.import_taxes}/{result.basic_taxes}:"
+        + f" sales taxes {result.sales_taxes} ({result.tax_delta:+}),"
+        + f" total {result.total} ({result.total_delta:+})"
+        for result in report.scenarios
+    )
+    with (
+        contextlib.nullcontext(sys.stdout)
+        if out_file is None
+        else Path(out_file).open("w")
+    ) as fh_out:
+        fh_out.write("\n".join(lines) + "\n")
+    print(
+        f"repriced {report.lines} lines ({report.invalid} not recognised)"
+        + f" in {report.seconds:.3f}s",
+        file=sys.stderr,
+    )
+
+
+def _rate_pair(value: str, /) -> tuple[float, float]:
+    """To parse a pair of tax rates of the command line.
+
+    Args:
+        value: The import and the basic sales taxes, separated by a colon.
+
+    Returns:
+        The import and the basic sales taxes.
+
+    Raises:
+        ArgumentTypeError: If the value is not a pair of non-negative numbers.
+    """
+    import_t, _, basic_t = value.partition(":")
+    try:
+        pair = (float(import_t), float(basic_t))
+    except ValueError as ex_n:
+        raise argparse.ArgumentTypeError(
+            f"invalid pair of tax rates: {value!r}"
+        ) from ex_n
+    if min(pair) < 0:
+        raise argparse.ArgumentTypeError(f"negative tax rates: {value!r}")
+    return pair
+
+
+def _compile(tax_file: None | Path, index_file: str, /) -> None:
+    """To compile the omit-taxes file into a memory-mappable index.
+
+    Args:
+        tax_file: The text file containing one not-taxed item name per line.
+        index_file: The path of the index file.
+    """
+    from cashier.purchase.exemption_index import compile_index
+
+    if tax_file is None:
+        print("compiling an index requires the omit-taxes file (-i)", file=sys.stderr)
+        sys.exit(2)
+    try:
+        with tax_file.open("r") as fh_r:
+            phrase_cnt = compile_index(fh_r, Path(index_file))
+    except OSError as ex_n:
+        print(f"compiling the index failed: {ex_n}", file=sys.stderr)
+        sys.exit(2)
+    print(f"compiled {phrase_cnt} phrases into {index_file}", file=sys.stderr)
+
+
+def _check_rules(
+    arg_parser: argparse.ArgumentParser, rule_file: Path, region: None | str, /
+) -> None:
+    """To reject an unreadable or invalid rule file before a register is built.
+
+    Args:
+        arg_parser: The parser reporting the error and exiting.
+        rule_file: The TOML file with the tax rules of several regions.
+        region: The region of the tax rules, defaults to the one of the file.
+    """
+    import tomllib
+
+    from cashier.purchase.tax_rules import TaxRuleTable
+
+    try:
+        TaxRuleTable(rule_file, region)
+    except (OSError, tomllib.TOMLDecodeError, TypeError, ValueError) as ex_n:
+        arg_parser.error(f"invalid rule file {rule_file}: {ex_n}")
+
+
+def _check_batch(
+    arg_parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    rule_file: None | Path,
+    /,
+) -> None:
+    """To reject conflicting arguments of the batch mode.
+
+    Args:
+        arg_parser: The parser reporting the error and exiting.
+        args: The parsed arguments.
+        rule_file: The optional TOML file with the tax rules of several regions.
+    """
+    if args.export_file is not None and args.workers > 1:
+        arg_parser.error("--export requires a single worker")
+    if args.use_mmap and (args.workers > 1 or args.batch_file == "-"):
+        arg_parser.error("--mmap requires a single worker and a transcript file")
+    if args.aggregate and args.money == "cents":
+        arg_parser.error("--aggregate requires --money decimal")
+    if rule_file is not None:
+        # the workers build their own registers, thus the rules are checked
+        # once here instead of failing in each of them
+        _check_rules(arg_parser, rule_file, args.region)
+
+
+def _watch_config(store: "ConfigStore", /) -> None:
+    """To reload a configuration on file changes and on ``SIGHUP``.
+
+    Args:
+        store: The configuration which should be reloaded.
+    """
+    store.watch()
+    store.reload_on_signal()
+
+
+async def _serve(
+    tax_file: None | Path,
+    address: str,
+    config_file: None | Path,
+    aggregate: bool,
+    /,
+) -> None:
+    """To run a register server until it is cancelled.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        address: Either ``host:port`` or the path of a Unix socket.
+        config_file: The optional configuration file, which is watched.
+        aggregate: Whether equal items of a purchase are merged into one line.
+    """
+    from cashier.server import RegisterServer
+
+    server = RegisterServer(tax_file, config_file=config_file, aggregate=aggregate)
+    if config_file is not None:
+        _watch_config(server.config)
+    host, sep, port = address.rpartition(":")
+    async with (
+        await server.serve_tcp(host, int(port))
+        if sep and port.isdigit()
+        else await server.serve_unix(Path(address))
+    ) as sock:
+        print(f"serving on {address}", file=sys.stderr)
+        await sock.serve_forever()
+
+
+def _load(address: str, sessions: int, /) -> None:
+    """To generate load on a register server and to print the latencies.
+
+    Args:
+        address: The ``host:port`` of the server.
+        sessions: The amount of concurrent sessions.
+    """
+    import asyncio
+
+    from cashier.server import run_load
+
+    host, _, port = address.rpartition(":")
+    report = asyncio.run(run_load(host, int(port), sessions=sessions))
+    print(
+        f"{report.sessions} sessions, {report.lines} lines in {report.seconds:.3f}s:"
+        + f" p50 {report.p50 * 1_000:.3f} ms, p99 {report.p99 * 1_000:.3f} ms"
+    )
+
+
+def _interactive(
+    tax_file: None | Path,
+    config_file: None | Path,
+    journal_dir: None | str,
+    rule_file: None | Path,
+    region: None | str,
+    /,
+) -> None:
+    """To run the interactive register.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        config_file: The optional configuration file, which is watched.
+        journal_dir: The optional directory journaling the open purchases.
+        rule_file: The optional TOML file with the tax rules of several regions,
+            ignored if a configuration file is given.
+        region: The region of the tax rules, defaults to the one of the file.
+    """
+    from cashier.register import create_register, start_register
+
+    journal = None
+    if journal_dir is not None:
+        from cashier.journal import BillJournal
+
+        journal = BillJournal(Path(journal_dir))
+    if config_file is None:
+        # the register is built once, every purchase uses it
+        register = create_register(tax_file, rule_file=rule_file, region=region)
+        start_register(tax_file, lambda: register, journal=journal)
+    else:
+        from cashier.config import ConfigStore
+
+        store = ConfigStore(tax_file, config_file=config_file)
+        _watch_config(store)
+        start_register(tax_file, store.register, journal=journal)
+        store.stop()
+    if journal is not None:
+        journal.close()
+    print("[closed]")
+
+
+def _arg_parser() -> argparse.ArgumentParser:
+    """To create the parser of the command line arguments.
+
+    Returns:
+        The argument parser.
     """
     arg_parser = argparse.ArgumentParser(
         prog="cashier",
         description="A library for calculating sales taxes for purchased items.",
     )
-    arg_parser.add_argument("--version", action="version", version=get_version())
+    arg_parser.add_argument(
+        "--version",
+        action="store_true",
+        help="show program's version number and exit",
+        dest="version",
+    )
     arg_parser.add_argument(
         "-i",
         "--input",
@@ -27,9 +396,282 @@ def main() -> None:
         dest="tax_file",
         metavar="str",
     )
+    arg_parser.add_argument(
+        "-c",
+        "--config",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="a TOML file with the tax rates and the exemption file, which is"
+        + " reloaded on changes and on SIGHUP (interactive and serve mode).",
+        dest="config_file",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "-r",
+        "--rules",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="a TOML file with the tax rules of several regions, which replace the"
+        + " import and basic sales taxes (interactive and batch mode).",
+        dest="rule_file",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "--region",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="the region of the tax rules (default: the region of the rule file).",
+        dest="region",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "-j",
+        "--journal",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="a directory journaling the open purchases, which are recovered"
+        + " after a crash (interactive mode).",
+        dest="journal_dir",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "--compile-index",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="compile the omit-taxes file into an index, which is accepted by -i.",
+        dest="index_file",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "-b",
+        "--batch",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="replay a transcript file without prompting ('-' for stdin).",
+        dest="batch_file",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "--reprice",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="price a catalog file of items ('-' for stdin) with the rates of each"
+        + " --scenario and report the deltas to the default rates.",
+        dest="catalog_file",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "--scenario",
+        action="append",
+        type=_rate_pair,
+        required=False,
+        default=None,
+        help="a candidate pair of import and basic sales taxes for --reprice,"
+        + " e.g. 0.05:0.12 (repeatable).",
+        dest="scenarios",
+        metavar="import:basic",
+    )
+    arg_parser.add_argument(
+        "-o",
+        "--output",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="the path for the receipts in batch mode or the report in reprice mode"
+        + " (default: stdout).",
+        dest="out_file",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "-w",
+        "--workers",
+        action="store",
+        type=int,
+        required=False,
+        default=1,
+        help="the amount of worker processes in batch and reprice mode.",
+        dest="workers",
+        metavar="int",
+    )
+    arg_parser.add_argument(
+        "--chunk-size",
+        action="store",
+        type=int,
+        required=False,
+        default=None,
+        help="the amount of purchases (batch mode, default: 64) or catalog lines"
+        + " (reprice mode, default: 4096) sent to a worker at once.",
+        dest="chunk_size",
+        metavar="int",
+    )
+    arg_parser.add_argument(
+        "--money",
+        action="store",
+        type=str,
+        required=False,
+        default="decimal",
+        choices=("decimal", "cents"),
+        help="the representation of prices in batch mode (cents: at most 2 decimals).",
+        dest="money",
+    )
+    arg_parser.add_argument(
+        "--aggregate",
+        action="store_true",
+        help="merge equal items of a purchase into one line"
+        + " (batch and serve mode, not with --money cents).",
+        dest="aggregate",
+    )
+    arg_parser.add_argument(
+        "--format",
+        action="store",
+        type=str,
+        required=False,
+        default="text",
+        choices=("text", "jsonl", "csv", "fixed"),
+        help="the output format of the receipts in batch mode.",
+        dest="out_format",
+    )
+    arg_parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="scan the transcript file as bytes in a memory map"
+        + " (single-process batch mode, not stdin).",
+        dest="use_mmap",
+    )
+    arg_parser.add_argument(
+        "--export",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="export the items of all purchases into a columnar file, Parquet if"
+        + " pyarrow is installed (single-process batch mode).",
+        dest="export_file",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "--serve",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="serve checkout sessions on 'host:port' or a Unix socket path.",
+        dest="address",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "--load",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="run a load test against a register server on 'host:port'.",
+        dest="load_address",
+        metavar="str",
+    )
+    arg_parser.add_argument(
+        "--sessions",
+        action="store",
+        type=int,
+        required=False,
+        default=100,
+        help="the amount of concurrent sessions of the load test.",
+        dest="sessions",
+        metavar="int",
+    )
+    arg_parser.add_argument(
+        "--stats",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        choices=("text", "json"),
+        help="time the hot paths and print the counters to stderr at exit.",
+        dest="stats_fmt",
+    )
+    return arg_parser
+
+
+def main() -> None:
+    """To start the purchase simulation.
+
+    Analyses the given arguments and starts the software.
+    """
+    arg_parser = _arg_parser()
     args = arg_parser.parse_args(args=sys.argv[1:])
-    start_register(args.tax_file)
-    print("[closed]")
+    if args.version:
+        from cashier.version import get_version
+
+        print(get_version())
+        return
+    if args.stats_fmt is not None:
+        import atexit
+
+        from cashier import instrument
+
+        instrument.enable()
+        atexit.register(instrument.dump, args.stats_fmt, sys.stderr)
+    tax_file = None if args.tax_file is None else Path(args.tax_file)
+    config_file = None if args.config_file is None else Path(args.config_file)
+    rule_file = None if args.rule_file is None else Path(args.rule_file)
+    if args.index_file is not None:
+        _compile(tax_file, args.index_file)
+        return
+    if args.catalog_file is not None:
+        _reprice(
+            tax_file,
+            args.catalog_file,
+            args.out_file,
+            args.scenarios or [],
+            args.workers,
+            4096 if args.chunk_size is None else args.chunk_size,
+        )
+        return
+    if args.batch_file is not None:
+        _check_batch(arg_parser, args, rule_file)
+        _start_batch(
+            tax_file,
+            args.batch_file,
+            args.out_file,
+            args.workers,
+            64 if args.chunk_size is None else args.chunk_size,
+            args.money,
+            args.export_file,
+            rule_file,
+            args.region,
+            args.aggregate,
+            args.out_format,
+            args.use_mmap,
+        )
+        return
+    if args.load_address is not None:
+        _load(args.load_address, args.sessions)
+        return
+    if args.address is not None:
+        import asyncio
+        import contextlib
+
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(_serve(tax_file, args.address, config_file, args.aggregate))
+        return
+    if rule_file is not None and config_file is None:
+        _check_rules(arg_parser, rule_file, args.region)
+    _interactive(tax_file, config_file, args.journal_dir, rule_file, args.region)
 
 
 if __name__ == "__main__":
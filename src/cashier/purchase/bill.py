@@ -1,63 +1,251 @@
 """A module saving and describing a purchase."""
-from collections.abc import Iterable
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import replace
 from decimal import Decimal
-from typing import final
+from typing import TextIO, final
 
 from cashier.purchase.container import PItemContainer, PurchasedItem
 from cashier.purchase.formatter import OutFormatter
 from cashier.purchase.tax_calculator import TaxCalculator
 
+# key of an aggregated line: name, imported, price, taxed
+_LineKey = tuple[str, bool, Decimal, bool]
+
 
 @final
 class Bill:
-    """A container holding all purchased items."""
+    """A container holding all purchased items.
+
+    In aggregation mode, items with the same name, import state, price and
+    basic sales taxes are merged into one line whose sales taxes are
+    calculated for the merged amount. Every added item still receives its
+    own id, which can be removed later on. Only the line of each id and the
+    amount it added are kept, thus the purchase and its output grow with
+    the distinct products instead of the added items.
+    """
 
-    def __init__(self, formatter: OutFormatter, tax_calc: TaxCalculator, /) -> None:
+    def __init__(
+        self,
+        formatter: OutFormatter,
+        tax_calc: TaxCalculator,
+        /,
+        aggregate: bool = False,
+    ) -> None:
         """To initialise the class.
 
         Args:
             formatter (OutFormatter): The formatter used for creating
                 the output of the current purchase.
             tax_calc (TaxCalculator): The calculator for the sales taxes.
+            aggregate (bool): Whether equal items are merged into one line.
         """
         super().__init__()
+        # key: id of the item, in aggregation mode id of the line's first item
         self.__purchase: dict[int, PItemContainer] = {}
+        self.__aggregate: bool = aggregate
+        self.__line_ids: dict[_LineKey, int] = {}
+        # per added item in aggregation mode: id of its line (0 if removed), amount
+        self.__scan_lines: array[int] = array("q")
+        self.__scan_cnts: array[int] = array("q")
         self.__item_id_gen: int = 0
+        # items of a restored purchase which were not consumed yet
+        self.__pending: None | tuple[Iterable[PItemContainer], int] = None
         self.__max_id: int = 1_000_000
         self.__tax_calc: TaxCalculator = tax_calc
         self.__bill_format: OutFormatter = formatter
+        # running sums: sales taxes, total
+        self.__sales_taxes: Decimal = Decimal("0")
+        self.__total: Decimal = Decimal("0")
+        # amount of item prices per exponent, for exponents below two decimal places
+        self.__fine_exp: dict[int, int] = {}
 
-    def _calc_total(self) -> tuple[Decimal, Decimal]:
-        """To calculate the sum of all sales taxes and item prices.
+    def __len__(self) -> int:
+        """To return the amount of purchased items.
 
         Returns:
-            tuple[Decimal, Decimal]: Returns two sums, the sum of all sales taxes and
-            the sum of all item prices including their sales taxes.
+            The amount of items which were added and not removed,
+            in aggregation mode the amount of lines.
         """
-        sales_taxes: Decimal = Decimal(
-            str(sum(p_item.sales_taxes for p_item in self.__purchase.values()))
-        )
-        total: Decimal = Decimal(
-            str(
-                sum(
-                    p_el.item.price * p_el.item.cnt + p_el.sales_taxes
-                    for p_el in self.__purchase.values()
-                )
+        self._apply_pending()
+        return len(self.__purchase)
+
+    @property
+    def aggregate(self) -> bool:
+        """Whether equal items are merged into one line."""
+        return self.__aggregate
+
+    @property
+    def last_id(self) -> int:
+        """The id of the most recently added item, zero if none was added."""
+        self._apply_pending()
+        return self.__item_id_gen
+
+    def items(self) -> Iterator[PItemContainer]:
+        """To iterate over the purchased items.
+
+        Returns:
+            Iterator[PItemContainer]: The purchased items in order of addition.
+        """
+        self._apply_pending()
+        return iter(self.__purchase.values())
+
+    def get_item(self, item_id: int, /) -> None | PItemContainer:
+        """To return a purchased item based on its id.
+
+        Args:
+            item_id (int): The id of the item.
+
+        Returns:
+            None | PItemContainer: The purchased item or None if there is none
+                with this id. In aggregation mode, the line the item was merged
+                into.
+        """
+        self._apply_pending()
+        if self.__aggregate:
+            if not 0 < item_id <= len(self.__scan_lines):
+                return None
+            return self.__purchase.get(self.__scan_lines[item_id - 1])
+        return self.__purchase.get(item_id)
+
+    def restore(self, p_elems: Iterable[PItemContainer], last_id: int, /) -> None:
+        """To replace all purchased items, e.g. when recovering a purchase.
+
+        The sales taxes of the items are taken as they are. The items are
+        consumed once the purchase is used, thus restoring many purchases
+        doesn't depend on their sizes.
+
+        In aggregation mode, each item becomes a line of its own.
+
+        Args:
+            p_elems (Iterable[PItemContainer]): The purchased items in order
+                of addition, which must not change until they are consumed.
+            last_id (int): The id of the most recently added item, including
+                items which were removed meanwhile.
+        """
+        self.__pending = (p_elems, last_id)
+
+    def _apply_pending(self) -> None:
+        """To consume the items of a restored purchase, if there are any."""
+        if self.__pending is None:
+            return
+        p_elems, last_id = self.__pending
+        self.__pending = None
+        self.__purchase = {p_el.id: p_el for p_el in p_elems}
+        self.__item_id_gen = max(last_id, max(self.__purchase, default=0))
+        self.__sales_taxes, self.__total = Decimal("0"), Decimal("0")
+        self.__fine_exp.clear()
+        self.__line_ids.clear()
+        scans = self.__item_id_gen if self.__aggregate else 0
+        self.__scan_lines = array("q", [0]) * scans
+        self.__scan_cnts = array("q", [0]) * scans
+        for p_el in self.__purchase.values():
+            self._account(p_el)
+            if self.__aggregate:
+                self.__line_ids[self._line_key(p_el.item)] = p_el.id
+                self.__scan_lines[p_el.id - 1] = p_el.id
+                self.__scan_cnts[p_el.id - 1] = p_el.item.cnt
+
+    @staticmethod
+    def _line_key(p_item: PurchasedItem, /) -> _LineKey:
+        """To return the key of the line an item is merged into.
+
+        Args:
+            p_item: The purchased item.
+
+        Returns:
+            The name, the import state, the price and whether the basic
+            sales taxes apply.
+        """
+        return p_item.name, p_item.imported, p_item.price, p_item.taxed
+
+    def _account(self, p_el: PItemContainer, /) -> None:
+        """To add an item to the running sums.
+
+        Args:
+            p_el: The purchased item and its sales taxes.
+        """
+        self.__sales_taxes += p_el.sales_taxes
+        self.__total += p_el.item.price * p_el.item.cnt + p_el.sales_taxes
+        if (exp := self._fine_exponent(p_el.item.price)) is not None:
+            self.__fine_exp[exp] = self.__fine_exp.get(exp, 0) + 1
+
+    def _discount(self, p_el: PItemContainer, /) -> None:
+        """To subtract a removed item from the running sums.
+
+        Args:
+            p_el: The removed item and its sales taxes.
+        """
+        if not self.__purchase:
+            self.__sales_taxes, self.__total = Decimal("0"), Decimal("0")
+            self.__fine_exp.clear()
+            return
+        self.__sales_taxes -= p_el.sales_taxes
+        self.__total -= p_el.item.price * p_el.item.cnt
+        self.__total -= p_el.sales_taxes
+        if (exp := self._fine_exponent(p_el.item.price)) is not None:
+            self.__fine_exp[exp] -= 1
+            if not self.__fine_exp[exp]:
+                del self.__fine_exp[exp]
+            # keep the exponent a freshly calculated sum would have
+            self.__total = self.__total.quantize(
+                Decimal(1).scaleb(min(self.__fine_exp, default=-2))
             )
+
+    def _resize_line(self, line: PItemContainer, cnt: int, /) -> None:
+        """To change the amount of an aggregated line.
+
+        The sales taxes are calculated again for the new amount.
+
+        Args:
+            line: The line in the purchase.
+            cnt: The new positive amount of the line.
+        """
+        p_el = PItemContainer(
+            id=line.id,
+            item=(item := replace(line.item, cnt=cnt)),
+            sales_taxes=self.__tax_calc.tax(item),
         )
-        return sales_taxes, total
+        self.__purchase[line.id] = p_el
+        taxes = p_el.sales_taxes - line.sales_taxes
+        self.__sales_taxes += taxes
+        self.__total += line.item.price * (cnt - line.item.cnt) + taxes
 
-    def _format_item_list(self) -> Iterable[str]:
-        """To iteratively generate the output of an item.
+    @staticmethod
+    def _fine_exponent(price: Decimal, /) -> None | int:
+        """To return the exponent of a price with more than two decimal places.
+
+        Args:
+            price: The price of a purchased item.
 
         Returns:
-            Iterable[str]: A formatted output for a purchased item.
+            The exponent of ``price`` or None if it has at most two decimal places.
+        """
+        exp = price.as_tuple().exponent
+        if isinstance(exp, int) and exp < -2:
+            return exp
+        return None
 
-        Yields:
-            Iterator[Iterable[str]]: A formatted output for a purchased item.
+    def subtotal(self) -> tuple[Decimal, Decimal]:
+        """To return the sum of all sales taxes and item prices.
+
+        The sums are updated whenever an item is added or removed,
+        thus this method does not iterate over the purchased items.
+
+        Returns:
+            tuple[Decimal, Decimal]: Returns two sums, the sum of all sales taxes and
+            the sum of all item prices including their sales taxes.
         """
-        for p_el in self.__purchase.values():
-            yield self.__bill_format.out_list_item(p_el)
+        self._apply_pending()
+        return self.__sales_taxes, self.__total
+
+    def _format_item_list(self) -> Iterable[str]:
+        """To generate the output of all items in one call of the formatter.
+
+        Returns:
+            Iterable[str]: The formatted outputs of the purchased items.
+        """
+        return self.__bill_format.out_list_items(self.__purchase.values())
 
     def _format_price(self) -> Iterable[str]:
         """To iteratively sum up the whole purchase.
@@ -71,7 +259,7 @@ class Bill:
                 summing up the whole purchase. Is either the total sales
                 taxes or the price for the whole purchase.
         """
-        total_out = self._calc_total()
+        total_out = self.subtotal()
         yield self.__bill_format.out_sales_taxes(total_out[0])
         yield self.__bill_format.out_total(total_out[1])
 
@@ -98,10 +286,34 @@ class Bill:
                 describes whether the current purchase is empty and
                 the string is a description of the whole purchase.
         """
+        self._apply_pending()
         if not self.__purchase:
             return False, ""
         return True, "\n".join(self._join_generator())
 
+    def write_to(self, fh_w: TextIO, /, bill_id: None | int = None) -> bool:
+        """To write the description of the finished purchase line by line.
+
+        Unlike ``finish``, the description is not joined into one string.
+
+        Args:
+            fh_w (TextIO): The writer receiving the description,
+                each line is terminated by a newline.
+            bill_id (None | int): The optional number of the purchase,
+                written as a header line in the output format.
+
+        Returns:
+            bool: Whether the current purchase is not empty, empty purchases
+                are not written.
+        """
+        self._apply_pending()
+        if not self.__purchase:
+            return False
+        if bill_id is not None:
+            fh_w.write(f"{self.__bill_format.out_header(bill_id)}\n")
+        fh_w.writelines(f"{line}\n" for line in self._join_generator())
+        return True
+
     def add_item(self, p_item: PurchasedItem, /) -> str:
         """To add an item to the current purchase.
 
@@ -111,6 +323,7 @@ class Bill:
         Returns:
             str: Description for the adding action.
         """
+        self._apply_pending()
         if self.__item_id_gen >= self.__max_id:
             return (
                 f"the amount of items [{self.__item_id_gen}]"
@@ -119,22 +332,63 @@ class Bill:
         if p_item.price <= 0:
             return "the item price can't be negative"
         self.__item_id_gen += 1
-        self.__purchase[self.__item_id_gen] = PItemContainer(
-            id=self.__item_id_gen, item=p_item, sales_taxes=self.__tax_calc.tax(p_item)
-        )
+        line_id = self.__item_id_gen
+        if self.__aggregate:
+            line_id = self.__line_ids.setdefault(self._line_key(p_item), line_id)
+            self.__scan_lines.append(line_id)
+            self.__scan_cnts.append(p_item.cnt)
+        if (line := self.__purchase.get(line_id)) is not None:
+            self._resize_line(line, line.item.cnt + p_item.cnt)
+        else:
+            p_el = PItemContainer(
+                id=line_id, item=p_item, sales_taxes=self.__tax_calc.tax(p_item)
+            )
+            self.__purchase[line_id] = p_el
+            self._account(p_el)
         return f"added item (id: {self.__item_id_gen}) successfully"
 
     def rem_item(self, item_id: int, /) -> bool:
         """To remove an item based on its id from the current purchase.
 
+        In aggregation mode, the amount of the item is taken off its line
+        and the line is removed once it is empty.
+
         Args:
             item_id (int): The id of the item which should be removed.
 
         Returns:
             bool: Whether the item was successfully removed.
         """
-        item_to_rem = self.__purchase.get(item_id, None)
+        self._apply_pending()
+        if self.__aggregate:
+            return self._rem_scan(item_id)
+        item_to_rem = self.__purchase.pop(item_id, None)
         if item_to_rem is None:
             return False
-        del self.__purchase[item_id]
+        self._discount(item_to_rem)
+        return True
+
+    def _rem_scan(self, item_id: int, /) -> bool:
+        """To remove an item from its aggregated line.
+
+        Args:
+            item_id: The id of the item which should be removed.
+
+        Returns:
+            Whether the item was successfully removed.
+        """
+        if not 0 < item_id <= len(self.__scan_lines):
+            return False
+        line_id = self.__scan_lines[item_id - 1]
+        line = self.__purchase.get(line_id)
+        if line is None:
+            return False
+        self.__scan_lines[item_id - 1] = 0
+        cnt = line.item.cnt - self.__scan_cnts[item_id - 1]
+        if cnt > 0:
+            self._resize_line(line, cnt)
+            return True
+        del self.__purchase[line_id]
+        del self.__line_ids[self._line_key(line.item)]
+        self._discount(line)
         return True
@@ -0,0 +1,165 @@
+"""A module providing integer-cents arithmetic for sales taxes."""
+import functools
+import importlib
+import math
+from collections.abc import Sequence
+from decimal import Decimal
+from types import ModuleType
+from typing import Final
+
+
+@functools.cache
+def _load_numpy() -> None | ModuleType:
+    """To import the optional NumPy package on first use.
+
+    NumPy takes longer to import than the rest of the package, thus it
+    is only loaded once a batch is actually calculated.
+
+    Returns:
+        The ``numpy`` module or None if it is not installed.
+    """
+    try:
+        return importlib.import_module("numpy")
+    except ImportError:
+        return None
+
+
+# the largest intermediate value handled by the NumPy int64 columns
+_NP_LIMIT: Final[int] = 2**62
+# taxes repeat a lot, their conversion is memoized
+_CONV_CACHE: Final[int] = 1 << 14
+
+
+def to_cents(price: Decimal, /) -> None | int:
+    """To convert a price into integer cents.
+
+    Args:
+        price: The price which should be converted.
+
+    Returns:
+        The price in cents or None if it has more than two decimal places.
+    """
+    num, den = price.as_integer_ratio()
+    if 100 % den:
+        return None
+    return num * (100 // den)
+
+
+@functools.lru_cache(maxsize=_CONV_CACHE)
+def from_cents(cents: int, /) -> Decimal:
+    """To convert integer cents into a price with two decimal places.
+
+    Args:
+        cents: The value in cents.
+
+    Returns:
+        The value as ``Decimal`` with exactly two decimal places.
+    """
+    return Decimal(cents).scaleb(-2)
+
+
+def rate_fraction(rates: Sequence[Decimal], /) -> tuple[list[int], int]:
+    """To express tax rates as numerators of a common denominator.
+
+    Args:
+        rates: The tax rates.
+
+    Returns:
+        The numerators of the rates and their smallest common denominator.
+    """
+    den = math.lcm(*(rate.as_integer_ratio()[1] for rate in rates))
+    return [int(rate * den) for rate in rates], den
+
+
+def round_tax(numer: int, denom: int, /) -> int:
+    """To round a sales tax to the next 0.05 and convert it into cents.
+
+    The value ``numer / denom`` is the sales tax multiplied by 20. It is
+    rounded half away from zero, like ``round(20 * total) / 20``.
+
+    Args:
+        numer: The numerator of the sales tax multiplied by 20.
+        denom: The positive denominator of the sales tax multiplied by 20.
+
+    Returns:
+        The rounded sales tax in cents.
+    """
+    if numer < 0:
+        return -5 * ((-2 * numer + denom) // (2 * denom))
+    return 5 * ((2 * numer + denom) // (2 * denom))
+
+
+def tax_cents_column(
+    price_cents: Sequence[int],
+    cnts: Sequence[int],
+    rate_nums: Sequence[int],
+    rate_den: int,
+    /,
+) -> list[int]:
+    """To calculate rounded sales taxes for columns of items in cents.
+
+    NumPy is used for the whole column if it is installed and
+    the intermediate values fit into 64-bit integers, otherwise the
+    taxes are calculated with Python integers.
+
+    Args:
+        price_cents: The non-negative item prices in cents.
+        cnts: The amount of each item.
+        rate_nums: The numerator of the tax rate of each item.
+        rate_den: The common denominator of all tax rates.
+
+    Returns:
+        The sales taxes in cents.
+    """
+    denom = 5 * rate_den
+    np_m = _load_numpy() if price_cents else None
+    if np_m is not None:
+        try:
+            np_p = np_m.asarray(price_cents, dtype=np_m.int64)
+            np_c = np_m.asarray(cnts, dtype=np_m.int64)
+            np_r = np_m.asarray(rate_nums, dtype=np_m.int64)
+        except OverflowError:
+            np_m = None
+    if np_m is not None:
+        bound = int(np_p.max()) * int(np_c.max()) * max(int(np_r.max()), 0) * 2
+        if (
+            int(np_p.min()) >= 0
+            and int(np_c.min()) >= 0
+            and int(np_r.min()) >= 0
+            and bound + denom < _NP_LIMIT
+        ):
+            res = 5 * ((2 * np_p * np_c * np_r + denom) // (2 * denom))
+            return [int(val) for val in res.tolist()]
+    return [
+        round_tax(p_val * cnt * r_val, denom)
+        for p_val, cnt, r_val in zip(price_cents, cnts, rate_nums, strict=True)
+    ]
+
+
+def format_cents(cents: int, /) -> str:
+    """To format integer cents as a price with two decimal places.
+
+    Args:
+        cents: The value in cents.
+
+    Returns:
+        The formatted value, equal to the string of ``from_cents``.
+    """
+    units, rest = divmod(abs(cents), 100)
+    return f"{'-' if cents < 0 else ''}{units}.{rest:02d}"
+
+
+def parse_cents(int_part: str | bytes, frac_part: str | bytes, /) -> None | int:
+    """To convert the digits of a price into integer cents.
+
+    Args:
+        int_part: The ASCII digits before the decimal point.
+        frac_part: The ASCII digits after the decimal point, possibly empty.
+
+    Returns:
+        The price in cents or None if it has more than two decimal places.
+    """
+    if len(frac_part) > 2:
+        return None
+    frac = int(frac_part) * 10 ** (2 - len(frac_part)) if frac_part else 0
+    return int(int_part) * 100 + frac
@@ -0,0 +1,305 @@
+"""A module saving a large purchase in compact columns."""
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from decimal import Decimal
+from typing import Final, TextIO, final
+
+from cashier.purchase.cents import from_cents, to_cents
+from cashier.purchase.container import CentsItem, PItemContainer, PurchasedItem
+from cashier.purchase.formatter import OutFormatter
+from cashier.purchase.tax_calculator import TaxCalculator
+
+# bit flags of an item
+_F_IMPORTED: Final[int] = 1
+_F_TAXED: Final[int] = 2
+_F_REMOVED: Final[int] = 4
+# range of the 64-bit integer columns
+_I64_MIN: Final[int] = -(2**63)
+_I64_MAX: Final[int] = 2**63 - 1
+_I64_MSG: Final[str] = "the item price, sales taxes or amount exceed 64 bits"
+
+
+def _fit_int64(*values: int) -> bool:
+    """To check whether values can be stored in the 64-bit integer columns.
+
+    Args:
+        values: The values of an item.
+
+    Returns:
+        Whether all values are within the range of 64-bit integers.
+    """
+    return all(_I64_MIN <= value <= _I64_MAX for value in values)
+
+
+@final
+class ColumnarBill:
+    """A container holding all purchased items in compact columns.
+
+    Prices and sales taxes are stored as 64-bit integer cents, the item
+    flags as bits and the item names in a string table. Removed items
+    are only marked, thus the id of an item is its position plus one.
+    The class provides the same interface as ``Bill``, but only
+    accepts prices with at most two decimal places. Items priced in
+    cents are added without any ``Decimal`` arithmetic.
+    """
+
+    def __init__(self, formatter: OutFormatter, tax_calc: TaxCalculator, /) -> None:
+        """To initialise the class.
+
+        Args:
+            formatter (OutFormatter): The formatter used for creating
+                the output of the current purchase.
+            tax_calc (TaxCalculator): The calculator for the sales taxes.
+        """
+        super().__init__()
+        self.__tax_calc: TaxCalculator = tax_calc
+        self.__bill_format: OutFormatter = formatter
+        # string table of the item names
+        self.__names: list[str] = []
+        self.__name_ids: dict[str, int] = {}
+        # columns: name id, price, sales taxes, amount, flags
+        self.__name_col: array[int] = array("L")
+        self.__price_col: array[int] = array("q")
+        self.__tax_col: array[int] = array("q")
+        self.__cnt_col: array[int] = array("q")
+        self.__flag_col: bytearray = bytearray()
+        self.__max_id: int = 2**32 - 1
+        self.__live: int = 0
+        # running sums in cents: sales taxes, total
+        self.__sales_taxes: int = 0
+        self.__total: int = 0
+
+    def __len__(self) -> int:
+        """To return the amount of purchased items.
+
+        Returns:
+            The amount of items which were added and not removed.
+        """
+        return self.__live
+
+    def nbytes(self) -> int:
+        """To estimate the memory used by the columns and the string table.
+
+        Returns:
+            The estimated size in bytes.
+        """
+        return sum(
+            sys.getsizeof(col)
+            for col in (
+                self.__name_col,
+                self.__price_col,
+                self.__tax_col,
+                self.__cnt_col,
+                self.__flag_col,
+                self.__names,
+                self.__name_ids,
+            )
+        ) + sum(sys.getsizeof(name) for name in self.__names)
+
+    def _intern(self, name: str, /) -> int:
+        """To return the id of an item name in the string table.
+
+        Args:
+            name: The name of an item.
+
+        Returns:
+            The id of the name, new names are added to the table.
+        """
+        name_id = self.__name_ids.get(name)
+        if name_id is None:
+            name_id = len(self.__names)
+            self.__names.append(name)
+            self.__name_ids[name] = name_id
+        return name_id
+
+    def subtotal(self) -> tuple[Decimal, Decimal]:
+        """To return the sum of all sales taxes and item prices.
+
+        Returns:
+            tuple[Decimal, Decimal]: Returns two sums, the sum of all sales taxes and
+            the sum of all item prices including their sales taxes.
+        """
+        if not self.__live:
+            return Decimal("0"), Decimal("0")
+        return from_cents(self.__sales_taxes), from_cents(self.__total)
+
+    def items(self) -> Iterator[PItemContainer]:
+        """To iteratively recreate the purchased items.
+
+        Yields:
+            Iterator[PItemContainer]: The purchased items in order of addition.
+        """
+        for pos, flags in enumerate(self.__flag_col):
+            if flags & _F_REMOVED:
+                continue
+            yield PItemContainer(
+                id=pos + 1,
+                item=PurchasedItem(
+                    imported=bool(flags & _F_IMPORTED),
+                    name=self.__names[self.__name_col[pos]],
+                    price=from_cents(self.__price_col[pos]),
+                    cnt=self.__cnt_col[pos],
+                    taxed=bool(flags & _F_TAXED),
+                ),
+                sales_taxes=from_cents(self.__tax_col[pos]),
+            )
+
+    def _join_generator(self) -> Iterable[str]:
+        """To iteratively generate the output for the whole purchase.
+
+        The prices are formatted straight from the integer cents.
+
+        Yields:
+            Iterator[Iterable[str]]: A part of the formatted
+                output for the whole purchase.
+        """
+        for pos, flags in enumerate(self.__flag_col):
+            if flags & _F_REMOVED:
+                continue
+            yield self.__bill_format.out_list_item_cents(
+                CentsItem(
+                    imported=bool(flags & _F_IMPORTED),
+                    name=self.__names[self.__name_col[pos]],
+                    price=self.__price_col[pos],
+                    cnt=self.__cnt_col[pos],
+                    taxed=bool(flags & _F_TAXED),
+                ),
+                self.__tax_col[pos],
+            )
+        yield self.__bill_format.out_sales_taxes_cents(self.__sales_taxes)
+        yield self.__bill_format.out_total_cents(self.__total)
+
+    def finish(self) -> tuple[bool, str]:
+        """To finish the current purchase.
+
+        Returns:
+            tuple[bool, str]: Returns a boolean and a string. The boolean
+                describes whether the current purchase is empty and
+                the string is a description of the whole purchase.
+        """
+        if not self.__live:
+            return False, ""
+        return True, "\n".join(self._join_generator())
+
+    def write_to(self, fh_w: TextIO, /, bill_id: None | int = None) -> bool:
+        """To write the description of the finished purchase line by line.
+
+        Unlike ``finish``, the description is not joined into one string.
+
+        Args:
+            fh_w (TextIO): The writer receiving the description,
+                each line is terminated by a newline.
+            bill_id (None | int): The optional number of the purchase,
+                written as a header line in the output format.
+
+        Returns:
+            bool: Whether the current purchase is not empty, empty purchases
+                are not written.
+        """
+        if not self.__live:
+            return False
+        if bill_id is not None:
+            fh_w.write(f"{self.__bill_format.out_header(bill_id)}\n")
+        fh_w.writelines(f"{line}\n" for line in self._join_generator())
+        return True
+
+    def _append(
+        self, name: str, price: int, sales_taxes: int, cnt: int, flags: int, /
+    ) -> str:
+        """To append an item priced in cents to the columns.
+
+        Args:
+            name: The name of the item.
+            price: The price of the item in cents.
+            sales_taxes: The sales taxes of the item in cents.
+            cnt: The amount of the item.
+            flags: The bit flags of the item.
+
+        Returns:
+            str: Description for the adding action.
+        """
+        self.__name_col.append(self._intern(name))
+        self.__price_col.append(price)
+        self.__tax_col.append(sales_taxes)
+        self.__cnt_col.append(cnt)
+        self.__flag_col.append(flags)
+        self.__live += 1
+        self.__sales_taxes += sales_taxes
+        self.__total += price * cnt + sales_taxes
+        return f"added item (id: {len(self.__flag_col)}) successfully"
+
+    def add_item(self, p_item: PurchasedItem, /) -> str:
+        """To add an item to the current purchase.
+
+        Args:
+            p_item (PurchasedItem): The purchased item which will be added.
+
+        Returns:
+            str: Description for the adding action.
+        """
+        item_id = len(self.__flag_col)
+        if item_id >= self.__max_id:
+            return f"the amount of items [{item_id}] reached max. value ({self.__max_id})"
+        if p_item.price <= 0:
+            return "the item price can't be negative"
+        price = to_cents(p_item.price)
+        if price is None:
+            return "the item price can't have more than two decimal places"
+        sales_taxes = to_cents(self.__tax_calc.tax(p_item))
+        if sales_taxes is None:
+            return "the sales taxes can't have more than two decimal places"
+        if not _fit_int64(price, sales_taxes, p_item.cnt):
+            return _I64_MSG
+        return self._append(
+            p_item.name,
+            price,
+            sales_taxes,
+            p_item.cnt,
+            (_F_IMPORTED if p_item.imported else 0) | (_F_TAXED if p_item.taxed else 0),
+        )
+
+    def add_cents_item(self, c_item: CentsItem, /) -> str:
+        """To add an item priced in cents to the current purchase.
+
+        Neither the price nor the sales taxes are converted into ``Decimal``.
+
+        Args:
+            c_item (CentsItem): The purchased item which will be added.
+
+        Returns:
+            str: Description for the adding action.
+        """
+        item_id = len(self.__flag_col)
+        if item_id >= self.__max_id:
+            return f"the amount of items [{item_id}] reached max. value ({self.__max_id})"
+        if c_item.price <= 0:
+            return "the item price can't be negative"
+        sales_taxes = self.__tax_calc.tax_cents(c_item)
+        if not _fit_int64(c_item.price, sales_taxes, c_item.cnt):
+            return _I64_MSG
+        return self._append(
+            c_item.name,
+            c_item.price,
+            sales_taxes,
+            c_item.cnt,
+            (_F_IMPORTED if c_item.imported else 0) | (_F_TAXED if c_item.taxed else 0),
+        )
+
+    def rem_item(self, item_id: int, /) -> bool:
+        """To remove an item based on its id from the current purchase.
+
+        Args:
+            item_id (int): The id of the item which should be removed.
+
+        Returns:
+            bool: Whether the item was successfully removed.
+        """
+        pos = item_id - 1
+        if not 0 <= pos < len(self.__flag_col) or self.__flag_col[pos] & _F_REMOVED:
+            return False
+        self.__flag_col[pos] |= _F_REMOVED
+        self.__live -= 1
+        self.__sales_taxes -= self.__tax_col[pos]
+        self.__total -= self.__price_col[pos] * self.__cnt_col[pos] + self.__tax_col[pos]
+        return True
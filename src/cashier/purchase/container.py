@@ -1,9 +1,20 @@
 """A module providing global data containers."""
 from dataclasses import dataclass, field
 from decimal import Decimal
+from enum import StrEnum
 from typing import final
 
 
+@final
+class MoneyBackend(StrEnum):
+    """The representation of prices and sales taxes."""
+
+    DECIMAL = "decimal"
+    """Prices and sales taxes are ``Decimal`` values."""
+    CENTS = "cents"
+    """Prices and sales taxes are integer cents."""
+
+
 @final
 @dataclass(frozen=True, slots=True)
 class PurchasedItem:
@@ -21,6 +32,23 @@ class PurchasedItem:
     """Describes whether the basic sales taxes should be applied."""
 
 
+@final
+@dataclass(frozen=True, slots=True)
+class CentsItem:
+    """A container describing the purchased item with a price in cents."""
+
+    imported: bool = field()
+    """Whether the item is imported or not."""
+    name: str = field()
+    """The name of the item."""
+    price: int = field()
+    """The price of the item in cents."""
+    cnt: int = field()
+    """The amount of the items to purchase."""
+    taxed: bool = field()
+    """Describes whether the basic sales taxes should be applied."""
+
+
 @dataclass(frozen=True, slots=True)
 class PItemContainer:
     """A container for holding a purchased item and its sales taxes."""
@@ -31,3 +59,93 @@ class PItemContainer:
     """The id of the purchased item."""
     sales_taxes: Decimal
     """The sales taxes of the purchased item."""
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class ReplayStats:
+    """A container summarising a non-interactive register run."""
+
+    lines: int
+    """The amount of processed input lines."""
+    invalid: int
+    """The amount of input lines which were not recognised."""
+    bills: int
+    """The amount of created bills, including empty ones."""
+    seconds: float
+    """The elapsed wall-clock time in seconds."""
+
+    @property
+    def lines_per_second(self) -> float:
+        """The throughput of the run in lines per second."""
+        if self.seconds <= 0:
+            return float(self.lines)
+        return self.lines / self.seconds
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class TaxCacheInfo:
+    """A container describing the usage of the sales tax cache."""
+
+    hits: int
+    """The amount of sales taxes taken from the cache."""
+    misses: int
+    """The amount of calculated sales taxes."""
+    size: int
+    """The current amount of memoized sales taxes."""
+    max_size: int
+    """The maximal amount of memoized sales taxes."""
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class LoadReport:
+    """A container summarising a load test of a register server."""
+
+    sessions: int
+    """The amount of sessions which received their receipts."""
+    lines: int
+    """The amount of answered input lines."""
+    p50: float
+    """The median latency of an input line in seconds."""
+    p99: float
+    """The 99th percentile of the latency of an input line in seconds."""
+    seconds: float
+    """The elapsed wall-clock time in seconds."""
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class ScenarioResult:
+    """A container summarising a catalog priced with one pair of tax rates."""
+
+    import_taxes: float
+    """Sales taxes for imported items."""
+    basic_taxes: float
+    """Basic sales taxes."""
+    sales_taxes: Decimal
+    """The sales taxes of all items of the catalog."""
+    total: Decimal
+    """The total price of all items of the catalog, including the sales taxes."""
+    tax_delta: Decimal
+    """The difference between the sales taxes and the ones of the baseline."""
+    total_delta: Decimal
+    """The difference between the total price and the one of the baseline."""
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class RepriceReport:
+    """A container summarising a repricing of a catalog."""
+
+    lines: int
+    """The amount of processed catalog lines."""
+    invalid: int
+    """The amount of catalog lines which were not recognised."""
+    baseline: ScenarioResult
+    """The catalog priced with the current tax rates."""
+    scenarios: tuple[ScenarioResult, ...]
+    """The catalog priced with each candidate pair of tax rates."""
+    seconds: float
+    """The elapsed wall-clock time in seconds."""
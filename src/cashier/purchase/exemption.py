@@ -0,0 +1,130 @@
+"""A module providing a matcher for tax exemptions."""
+import time
+from collections import deque
+from collections.abc import Iterable, Sequence
+from typing import final
+
+
+@final
+class ExemptionMatcher:
+    """Decides whether an item name contains a tax-exempt phrase.
+
+    The phrases are compiled into an Aho-Corasick automaton over words,
+    thus an item name is scanned only once, independent of the amount
+    of phrases. A phrase matches if its words appear consecutively
+    in the item name.
+
+    Args:
+        phrases: The names of items which shouldn't be taxed,
+            each one consisting of one or several words.
+    """
+
+    def __init__(self, phrases: Iterable[str], /) -> None:
+        """To initialise the class."""
+        super().__init__()
+        start = time.perf_counter()
+        # per state: the transitions, the fallback state, whether a phrase ends
+        self.__goto: list[dict[str, int]] = [{}]
+        self.__fail: list[int] = [0]
+        self.__out: list[bool] = [False]
+        self.__phrase_cnt: int = 0
+        for phrase in phrases:
+            self._add_phrase(phrase.split())
+        self._link()
+        self.__build_time: float = time.perf_counter() - start
+
+    def _add_phrase(self, words: list[str], /) -> None:
+        """To add the words of a phrase to the automaton.
+
+        Args:
+            words: The words of the phrase, empty phrases are ignored.
+        """
+        if not words:
+            return
+        state = 0
+        for word in words:
+            next_state = self.__goto[state].get(word)
+            if next_state is None:
+                next_state = len(self.__goto)
+                self.__goto[state][word] = next_state
+                self.__goto.append({})
+                self.__fail.append(0)
+                self.__out.append(False)
+            state = next_state
+        if not self.__out[state]:
+            self.__phrase_cnt += 1
+        self.__out[state] = True
+
+    def _link(self) -> None:
+        """To create the fallback states in breadth-first order."""
+        queue: deque[int] = deque(self.__goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self.__goto[state].items():
+                queue.append(next_state)
+                fail = self.__fail[state]
+                while fail and word not in self.__goto[fail]:
+                    fail = self.__fail[fail]
+                fail = self.__goto[fail].get(word, 0)
+                self.__fail[next_state] = fail
+                self.__out[next_state] = self.__out[next_state] or self.__out[fail]
+
+    @property
+    def build_time(self) -> float:
+        """The time in seconds needed for compiling the phrases."""
+        return self.__build_time
+
+    def __len__(self) -> int:
+        """To return the amount of distinct phrases.
+
+        Returns:
+            The amount of distinct phrases.
+        """
+        return self.__phrase_cnt
+
+    def is_taxed(self, in_str: str, /) -> bool:
+        """To check whether an item is taxed.
+
+        Args:
+            in_str: The name of the purchased item which should be checked for taxation.
+
+        Returns:
+            Whether the item is taxed.
+        """
+        goto, fail, out = self.__goto, self.__fail, self.__out
+        state = 0
+        for word in in_str.split():
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            if out[state]:
+                return False
+        return True
+
+    def lookup_latency(self, names: Sequence[str], /) -> float:
+        """To measure the mean time of a lookup.
+
+        Args:
+            names: Item names used for the measurement.
+
+        Returns:
+            The mean time in seconds needed for checking one item name.
+        """
+        if not names:
+            return 0.0
+        start = time.perf_counter()
+        for name in names:
+            self.is_taxed(name)
+        return (time.perf_counter() - start) / len(names)
+
+    def __str__(self) -> str:
+        """To create a string representation.
+
+        Returns:
+            String representation of the ``ExemptionMatcher`` object.
+        """
+        return (
+            "---\nEXEMPTIONS:\n"
+            + f"\tphrases: {self.__phrase_cnt}\n"
+            + f"\tbuild time: {self.__build_time * 1_000:.3f} ms\n---"
+        )
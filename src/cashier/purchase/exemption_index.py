@@ -0,0 +1,198 @@
+"""A module providing a memory-mapped index of tax exemptions."""
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Final, final
+
+# file layout: header, hash table of the slots, UTF-8 keys
+_MAGIC: Final[bytes] = b"CSHXIDX1"
+# magic, amount of slots, amount of phrases, maximal amount of words per phrase
+_HEADER: Final[struct.Struct] = struct.Struct("<8sIII")
+# slot: CRC-32 of the key, start and length of the key, kind of the key
+_SLOT: Final[struct.Struct] = struct.Struct("<IIII")
+# kinds of a key, zero marks an empty slot
+_K_PREFIX: Final[int] = 1
+_K_PHRASE: Final[int] = 2
+
+
+def is_index(path: Path, /) -> bool:
+    """To check whether a file is a compiled exemption index.
+
+    Args:
+        path: The file which should be checked.
+
+    Returns:
+        Whether the file starts with the header of an index.
+    """
+    try:
+        with path.open("rb") as fh_r:
+            return fh_r.read(len(_MAGIC)) == _MAGIC
+    except OSError:
+        return False
+
+
+def compile_index(phrases: Iterable[str], target: Path, /) -> int:
+    """To compile phrases into an exemption index file.
+
+    The whitespace of each phrase is normalised, empty phrases are ignored.
+    Besides the phrases, the index contains their leading words, which allows
+    lookups to stop as soon as no phrase can match anymore. The file is
+    written next to ``target`` and renamed afterwards, thus running registers
+    never map a partially written index.
+
+    Args:
+        phrases: The names of items which shouldn't be taxed.
+        target: The path of the index file.
+
+    Returns:
+        The amount of distinct phrases in the index.
+    """
+    keys: dict[bytes, int] = {}
+    max_words = 0
+    for phrase in phrases:
+        words = phrase.split()
+        for word_i in range(1, len(words)):
+            prefix = " ".join(words[:word_i]).encode()
+            keys[prefix] = keys.get(prefix, 0) | _K_PREFIX
+        if words:
+            full = " ".join(words).encode()
+            keys[full] = keys.get(full, 0) | _K_PHRASE
+            max_words = max(max_words, len(words))
+    # a load factor of at most 3/4 keeps the probe sequences short
+    slot_cnt = 1 << max(3, (len(keys) * 4 // 3).bit_length())
+    slots = bytearray(slot_cnt * _SLOT.size)
+    offset = 0
+    for key, kind in sorted(keys.items()):
+        key_hash = zlib.crc32(key)
+        pos = key_hash & (slot_cnt - 1)
+        while _SLOT.unpack_from(slots, pos * _SLOT.size)[3]:
+            pos = (pos + 1) & (slot_cnt - 1)
+        _SLOT.pack_into(slots, pos * _SLOT.size, key_hash, offset, len(key), kind)
+        offset += len(key)
+    phrase_cnt = sum(1 for kind in keys.values() if kind & _K_PHRASE)
+    tmp_file = target.with_name(f".{target.name}.tmp")
+    with tmp_file.open("wb") as fh_w:
+        fh_w.write(_HEADER.pack(_MAGIC, slot_cnt, phrase_cnt, max_words))
+        fh_w.write(slots)
+        fh_w.writelines(sorted(keys))
+    tmp_file.replace(target)
+    return phrase_cnt
+
+
+@final
+class ExemptionIndex:
+    """Decides whether an item name contains a tax-exempt phrase.
+
+    The phrases are looked up in a compiled index file, which is mapped
+    into memory. Lookups probe the hash table in the mapped bytes, thus
+    the phrases are never loaded into Python objects and processes mapping
+    the same file share its pages. A phrase matches if its words appear
+    consecutively in the item name, like in ``ExemptionMatcher``.
+
+    Args:
+        path: The index file created by ``compile_index``.
+
+    Raises:
+        ValueError: If the file is not an exemption index.
+    """
+
+    def __init__(self, path: Path, /) -> None:
+        """To initialise the class."""
+        super().__init__()
+        with path.open("rb") as fh_r:
+            if os.fstat(fh_r.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"{path} is not an exemption index.")
+            self.__map: mmap.mmap = mmap.mmap(fh_r.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, slot_cnt, phrase_cnt, max_words = _HEADER.unpack_from(self.__map)
+        if magic != _MAGIC:
+            self.__map.close()
+            raise ValueError(f"{path} is not an exemption index.")
+        self.__path: Path = path
+        self.__phrase_cnt: int = phrase_cnt
+        self.__max_words: int = max_words
+        self.__mask: int = slot_cnt - 1
+        self.__keys: int = _HEADER.size + slot_cnt * _SLOT.size
+
+    def __len__(self) -> int:
+        """To return the amount of distinct phrases.
+
+        Returns:
+            The amount of distinct phrases.
+        """
+        return self.__phrase_cnt
+
+    def close(self) -> None:
+        """To unmap the index file."""
+        self.__map.close()
+
+    def _probe(self, key: bytes, /) -> int:
+        """To look up a key in the mapped hash table.
+
+        Args:
+            key: The UTF-8 encoded phrase or leading words of a phrase.
+
+        Returns:
+            The kind of the key, zero if it is not part of the index.
+        """
+        key_hash = zlib.crc32(key)
+        pos = key_hash & self.__mask
+        while True:
+            slot_hash, start, length, kind = _SLOT.unpack_from(
+                self.__map, _HEADER.size + pos * _SLOT.size
+            )
+            if not kind:
+                return 0
+            if (
+                slot_hash == key_hash
+                and self.__map[self.__keys + start : self.__keys + start + length] == key
+            ):
+                return int(kind)
+            pos = (pos + 1) & self.__mask
+
+    def __contains__(self, phrase: object, /) -> bool:
+        """To check whether a phrase is part of the index.
+
+        Args:
+            phrase: The phrase, its words are separated by single spaces.
+
+        Returns:
+            Whether the phrase is part of the index.
+        """
+        return isinstance(phrase, str) and bool(self._probe(phrase.encode()) & _K_PHRASE)
+
+    def is_taxed(self, in_str: str, /) -> bool:
+        """To check whether an item is taxed.
+
+        Args:
+            in_str: The name of the purchased item which should be checked for taxation.
+
+        Returns:
+            Whether the item is taxed.
+        """
+        words = [word.encode() for word in in_str.split()]
+        for start in range(len(words)):
+            key = b""
+            for word in words[start : start + self.__max_words]:
+                key += word
+                kind = self._probe(key)
+                if kind & _K_PHRASE:
+                    return False
+                if not kind & _K_PREFIX:
+                    break
+                key += b" "
+        return True
+
+    def __str__(self) -> str:
+        """To create a string representation.
+
+        Returns:
+            String representation of the ``ExemptionIndex`` object.
+        """
+        return (
+            "---\nEXEMPTIONS:\n"
+            + f"\tindex: {self.__path}\n"
+            + f"\tphrases: {self.__phrase_cnt}\n---"
+        )
@@ -1,29 +1,203 @@
 """A module providing input and output formatters."""
+import functools
 import re
-from collections.abc import Callable
+import string
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
 from decimal import Decimal
+from json.encoder import encode_basestring
 from re import Pattern
 from typing import Final, final
 
-from cashier.purchase.container import PItemContainer, PurchasedItem
+from cashier.purchase.cents import format_cents, parse_cents
+from cashier.purchase.container import CentsItem, PItemContainer, PurchasedItem
+from cashier.purchase.products import ProductDictionary, ProductInfo
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class OutLayout:
+    """The templates of an output format.
+
+    The templates use the syntax of ``str.format``. Their named fields are
+    filled once per formatter, their positional fields for every line.
+    Prices are passed as strings, thus they are aligned but not rounded.
+    """
+
+    header: str = field()
+    """The header of a receipt: {0} number of the purchase."""
+    item: str = field()
+    """A purchased item: {mark}, {0} amount, {1} name, {2} price with taxes."""
+    marks: tuple[str, str] = field()
+    """The {mark} of a not imported and an imported item: {imported} description."""
+    sales_taxes: str = field()
+    """The sales taxes of the purchase: {label} prefix, {0} value."""
+    total: str = field()
+    """The total price of the purchase: {label} prefix, {0} value."""
+    escape: None | Callable[[str], str] = field(default=None)
+    """The optional function escaping names, descriptions and prefixes."""
+
+
+def _csv_field(value: str, /) -> str:
+    """To quote a CSV field if it contains a separator, a quote or a newline.
+
+    Args:
+        value: The value of the field.
+
+    Returns:
+        The field as it is written to the CSV file.
+    """
+    if "," in value or '"' in value or "\n" in value or "\r" in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+# output formats by name
+_LAYOUTS: Final[dict[str, OutLayout]] = {
+    "text": OutLayout(
+        header="output {0}:",
+        item="{0}{mark} {1}: {2}",
+        marks=("", " {imported}"),
+        sales_taxes="{label}: {0}",
+        total="{label}: {0}",
+    ),
+    "jsonl": OutLayout(
+        header='{{"output": {0}}}',
+        item='{{"cnt": {0}, "imported": {mark}, "name": {1}, "price": "{2}"}}',
+        marks=("false", "true"),
+        sales_taxes='{{"label": {label}, "sales_taxes": "{0}"}}',
+        total='{{"label": {label}, "total": "{0}"}}',
+        escape=encode_basestring,
+    ),
+    "csv": OutLayout(
+        header=",,output {0},",
+        item="{0},{mark},{1},{2}",
+        marks=("", "{imported}"),
+        sales_taxes=",,{label},{0}",
+        total=",,{label},{0}",
+        escape=_csv_field,
+    ),
+    "fixed": OutLayout(
+        header="output {0}:",
+        item="{0:>6} {mark} {1:<40.40} {2:>12}",
+        marks=(" " * 10, "{imported:<10.10}"),
+        sales_taxes="{label:<58.58} {0:>12}",
+        total="{label:<58.58} {0:>12}",
+    ),
+}
+
+
+def register_layout(name: str, layout: OutLayout, /) -> None:
+    """To add an output format or to replace one.
+
+    Args:
+        name: The name of the output format.
+        layout: The templates of the output format.
+    """
+    _LAYOUTS[name] = layout
+
+
+def out_formats() -> list[str]:
+    """To list the registered output formats.
+
+    Returns:
+        The names of the output formats.
+    """
+    return list(_LAYOUTS)
+
+
+def _compile(template: str, constants: Mapping[str, str], /) -> Callable[..., str]:
+    """To fill in the named fields of a template once.
+
+    Args:
+        template: The template using the syntax of ``str.format``.
+        constants: The values of the named fields.
+
+    Returns:
+        The ``format`` method of the remaining template, which only
+        has positional fields.
+    """
+    parts: list[str] = []
+    for literal, name, spec, conv in string.Formatter().parse(template):
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if name is None:
+            continue
+        if name in constants:
+            value = format(constants[name], spec or "")
+            parts.append(value.replace("{", "{{").replace("}", "}}"))
+        else:
+            conv_s = "" if conv is None else f"!{conv}"
+            parts.append(f"{{{name}{conv_s}{':' + spec if spec else ''}}}")
+    return "".join(parts).format
 
 
 @final
 class OutFormatter:
     """Formats the output of a purchase.
 
+    The templates of the output format are compiled once, thus formatting
+    a line is a single call of ``str.format``.
+
     Args:
         total: The prefix for the total price of an item.
         sales_taxes: The prefix for the sales taxes output.
         imported: The string used as the imported description for an item.
+        out_format: The name of a registered output format.
+
+    Raises:
+        ValueError: If the output format is not registered.
     """
 
-    def __init__(self, total: str, sales_taxes: str, imported: str, /) -> None:
+    def __init__(
+        self,
+        total: str,
+        sales_taxes: str,
+        imported: str,
+        /,
+        out_format: str = "text",
+    ) -> None:
         """To initialise the class."""
         super().__init__()
         self.__total_pre: str = total
         self.__sales_taxes_pre: str = sales_taxes
         self.__imported: str = imported
+        layout = _LAYOUTS.get(out_format)
+        if layout is None:
+            raise ValueError(f"The output format {out_format} is not registered.")
+        self.__format: str = out_format
+        self.__escape: None | Callable[[str], str] = layout.escape
+        escape = layout.escape or str
+        marks = [
+            _compile(mark, {"imported": escape(imported)})() for mark in layout.marks
+        ]
+        # item templates indexed by the import state
+        self.__item: tuple[Callable[..., str], Callable[..., str]] = (
+            _compile(layout.item, {"mark": marks[0]}),
+            _compile(layout.item, {"mark": marks[1]}),
+        )
+        self.__header: Callable[..., str] = _compile(layout.header, {})
+        self.__sales_taxes: Callable[..., str] = _compile(
+            layout.sales_taxes, {"label": escape(sales_taxes)}
+        )
+        self.__total: Callable[..., str] = _compile(
+            layout.total, {"label": escape(total)}
+        )
+
+    @property
+    def out_format(self) -> str:
+        """The name of the output format."""
+        return self.__format
+
+    def out_header(self, bill_id: int, /) -> str:
+        """To create the header of a receipt.
+
+        Args:
+            bill_id: The number of the purchase, starting with one.
+
+        Returns:
+            Formatted header of the receipt.
+        """
+        return self.__header(bill_id)
 
     def out_sales_taxes(self, sales_taxes: Decimal, /) -> str:
         """To create a string for the sales taxes.
@@ -34,7 +208,7 @@ class OutFormatter:
         Returns:
             Formatted output string for the sales taxes.
         """
-        return f"{self.__sales_taxes_pre}: {sales_taxes}"
+        return self.__sales_taxes(str(sales_taxes))
 
     def out_total(self, total: Decimal, /) -> str:
         """To create a string for the total price of a purchased item.
@@ -45,7 +219,7 @@ class OutFormatter:
         Returns:
             Formatted output string for the total price of the purchase.
         """
-        return f"{self.__total_pre}: {total}"
+        return self.__total(str(total))
 
     def out_list_item(self, p_elem: PItemContainer, /) -> str:
         """To format a purchased item.
@@ -56,9 +230,76 @@ class OutFormatter:
         Returns:
             Formatted output string for the purchased item.
         """
-        return (
-            f"{p_elem.item.cnt}{' ' + self.__imported if p_elem.item.imported else ''} "
-            + f"{p_elem.item.name}: {p_elem.item.price + p_elem.sales_taxes}"
+        item = p_elem.item
+        name = item.name if self.__escape is None else self.__escape(item.name)
+        return self.__item[item.imported](
+            item.cnt, name, str(item.price + p_elem.sales_taxes)
+        )
+
+    def out_list_items(self, p_elems: Iterable[PItemContainer], /) -> list[str]:
+        """To format many purchased items at once.
+
+        Args:
+            p_elems: The containers holding the purchased items.
+
+        Returns:
+            Formatted output strings for the purchased items, in the same order.
+        """
+        templates, escape = self.__item, self.__escape
+        if escape is None:
+            return [
+                templates[p_el.item.imported](
+                    p_el.item.cnt,
+                    p_el.item.name,
+                    str(p_el.item.price + p_el.sales_taxes),
+                )
+                for p_el in p_elems
+            ]
+        return [
+            templates[p_el.item.imported](
+                p_el.item.cnt,
+                escape(p_el.item.name),
+                str(p_el.item.price + p_el.sales_taxes),
+            )
+            for p_el in p_elems
+        ]
+
+    def out_sales_taxes_cents(self, sales_taxes: int, /) -> str:
+        """To create a string for the sales taxes given in cents.
+
+        Args:
+            sales_taxes: The sales taxes value used for all purchased items in cents.
+
+        Returns:
+            Formatted output string for the sales taxes.
+        """
+        return self.__sales_taxes(format_cents(sales_taxes))
+
+    def out_total_cents(self, total: int, /) -> str:
+        """To create a string for the total price given in cents.
+
+        Args:
+            total: The sum of all prices of the purchased items and their sales
+                taxes in cents.
+
+        Returns:
+            Formatted output string for the total price of the purchase.
+        """
+        return self.__total(format_cents(total))
+
+    def out_list_item_cents(self, c_item: CentsItem, sales_taxes: int, /) -> str:
+        """To format a purchased item priced in cents.
+
+        Args:
+            c_item: The purchased item.
+            sales_taxes: The sales taxes of the item in cents.
+
+        Returns:
+            Formatted output string for the purchased item.
+        """
+        name = c_item.name if self.__escape is None else self.__escape(c_item.name)
+        return self.__item[c_item.imported](
+            c_item.cnt, name, format_cents(c_item.price + sales_taxes)
         )
 
     def __str__(self) -> str:
@@ -69,6 +310,7 @@ class OutFormatter:
         """
         return (
             "---\nOUTPUT format:\n"
+            + ("" if self.__format == "text" else f"\tlayout: {self.__format}\n")
             + f"\t[item cnt] ({self.__imported}) [item name]: [price with taxes]\n"
             + f"\t{self.__sales_taxes_pre}: [value]\n"
             + f"\t{self.__total_pre}: [value]\n---"
@@ -76,8 +318,24 @@ class OutFormatter:
 
 
 # default input pattern: check InFormatter.__str__()
-_DI_ITEM: Final[Pattern[str]] = re.compile(r"^(\d+)\s+(.+)\s+at\s+(\d+)(\.\d+)?$")
-_DI_IMPORTED: Final[Pattern[str]] = re.compile(r"^(?:.*?\s)?imported(?:\s.*)?$")
+_DI_ITEM: Final[str] = r"^(\d+)\s+(.+)\s+at\s+(\d+)(\.\d+)?$"
+_DI_IMPORTED: Final[str] = r"^(?:.*?\s)?imported(?:\s.*)?$"
+
+
+@functools.cache
+def _pattern(pattern: str, /) -> Pattern[str]:
+    """To compile a default input pattern on first use.
+
+    Canonical input lines are split without regular expressions, thus
+    the patterns are not compiled when the module is imported.
+
+    Args:
+        pattern: The regular expression.
+
+    Returns:
+        The compiled pattern.
+    """
+    return re.compile(pattern)
 
 
 @final
@@ -88,6 +346,7 @@ class InFormatter:
         term_str: The input string which terminates all ongoing purchases.
         buy_str: The input string which terminates the current ongoing purchase.
         taxed_f: Function which decides whether the basic taxes apply to a given item.
+            It is called once per distinct item name.
     """
 
     def __init__(
@@ -97,7 +356,12 @@ class InFormatter:
         super().__init__()
         self.__term_str: str = term_str
         self.__buy_str: str = buy_str
-        self.__taxed_f: Callable[[str], bool] = taxed_f
+        self.__products: ProductDictionary = ProductDictionary(self._clean_name, taxed_f)
+
+    @property
+    def products(self) -> ProductDictionary:
+        """The dictionary interning the item names of all purchases."""
+        return self.__products
 
     def is_not_term(self, in_str: str, /) -> bool:
         """To determine whether all purchases should be concluded based on the input.
@@ -127,11 +391,150 @@ class InFormatter:
         """
         return in_str.strip() != self.__buy_str
 
+    @staticmethod
+    def _clean_name(name: str, /) -> tuple[str, bool]:
+        """To remove the imported keyword from the name part of an input string.
+
+        Args:
+            name: The name of the item, possibly containing the imported keyword.
+
+        Returns:
+            The cleaned name and whether the item is imported.
+        """
+        imported_match = (
+            _pattern(_DI_IMPORTED).match(name) if "imported" in name else None
+        )
+        if imported_match is not None:
+            name = name.replace("imported", "").replace("  ", " ")
+        return name.strip(), imported_match is not None
+
+    def product_info(self, name: str, /) -> ProductInfo:
+        """To analyse the name part of a valid input string.
+
+        The analysis is looked up in the product dictionary, thus it is done
+        once per distinct name.
+
+        Args:
+            name: The name of the item, possibly containing the imported keyword.
+
+        Returns:
+            The id of the product, the interned name, whether the item is
+            imported and whether it is taxed.
+        """
+        return self.__products.lookup(name)
+
+    def _create_item(self, cnt: str, name: str, price: str, /) -> PurchasedItem:
+        """To create a purchased item from the parts of a valid input string.
+
+        Args:
+            cnt: The amount of the item.
+            name: The name of the item, possibly containing the imported keyword.
+            price: The price of the item.
+
+        Returns:
+            The purchased item.
+        """
+        _, name, imported, taxed = self.__products.lookup(name)
+        return PurchasedItem(
+            imported=imported,
+            name=name,
+            price=Decimal(price),
+            cnt=int(cnt),
+            taxed=taxed,
+        )
+
+    @staticmethod
+    def _split_fast(in_str: str, /) -> None | tuple[str, str, str, str]:
+        """To split an input string of the canonical shape.
+
+        The canonical shape is ``<cnt> <name> at <int>[.<frac>]`` with single
+        spaces around the name. Every string accepted by this method is also
+        matched by the default input pattern with identical parts.
+
+        Args:
+            in_str: The stripped input string, which should be split.
+
+        Returns:
+            The amount, the name, the integer digits and the decimal digits
+            including the point, or None if the string has another shape.
+        """
+        cnt_end = in_str.find(" ")
+        at_pos = in_str.rfind(" at ")
+        if cnt_end <= 0 or at_pos <= cnt_end:
+            return None
+        cnt = in_str[:cnt_end]
+        name = in_str[cnt_end + 1 : at_pos]
+        int_part, dot, frac_part = in_str[at_pos + 4 :].partition(".")
+        if (
+            not (cnt.isascii() and cnt.isdigit())
+            or not (int_part.isascii() and int_part.isdigit())
+            or (dot and not (frac_part.isascii() and frac_part.isdigit()))
+            or not name
+            or name[0].isspace()
+            or "\n" in name
+        ):
+            return None
+        return cnt, name, int_part, dot + frac_part
+
+    @staticmethod
+    def _split_regex(in_str: str, /) -> None | tuple[str, str, str, str]:
+        """To split an input string with the default input pattern.
+
+        Args:
+            in_str: The stripped input string, which should be split.
+
+        Returns:
+            The amount, the name, the integer digits and the decimal digits
+            including the point, or None if the pattern doesn't match.
+        """
+        match_res = _pattern(_DI_ITEM).match(in_str)
+        if match_res is None or not match_res.group(2).strip():
+            return None
+        return (
+            match_res.group(1),
+            match_res.group(2),
+            match_res.group(3),
+            "" if match_res.group(4) is None else match_res.group(4),
+        )
+
+    def _split(self, in_str: str, /) -> None | tuple[str, str, str, str]:
+        """To split an input string into its parts.
+
+        Strings of the canonical shape are split without the regular expression.
+
+        Args:
+            in_str: The input string, which should be split.
+
+        Returns:
+            The amount, the name, the integer digits and the decimal digits
+            including the point, or None if the string is not valid.
+        """
+        stripped = in_str.strip()
+        if (parts := self._split_fast(stripped)) is not None:
+            return parts
+        return self._split_regex(stripped)
+
+    def _analyse_regex(self, in_str: str, /) -> tuple[bool, None | PurchasedItem]:
+        """To analyse an input string with the default input pattern.
+
+        Args:
+            in_str: The stripped input string, which should be analysed.
+
+        Returns:
+            Returns a boolean and either the ``PurchasedItem`` element if boolean
+            is ``True`` or None otherwise.
+        """
+        parts = self._split_regex(in_str)
+        if parts is None:
+            return False, None
+        return True, self._create_item(parts[0], parts[1], parts[2] + parts[3])
+
     def analyse_input(self, in_str: str, /) -> tuple[bool, None | PurchasedItem]:
         """To analyse an input string.
 
         This function first checks whether the input string has a valid format,
         If successful, it creates a ``PurchasedItem`` object based on the input.
+        Strings of the canonical shape are parsed without the regular expression.
 
         Args:
             in_str: The input string, which should be analysed.
@@ -140,23 +543,37 @@ class InFormatter:
             Returns a boolean and either the ``PurchasedItem`` element if boolean
             is ``True`` or None otherwise.
         """
-        match_res = _DI_ITEM.match(in_str.strip())
-        if match_res is None or not match_res.group(2).strip():
+        parts = self._split(in_str)
+        if parts is None:
             return False, None
-        item_name: str = match_res.group(2)
-        imported_match = _DI_IMPORTED.match(item_name)
-        if imported_match is not None:
-            item_name = item_name.replace("imported", "").replace("  ", " ")
-        item_name = item_name.strip()
-        return True, PurchasedItem(
-            imported=imported_match is not None,
-            name=item_name,
-            price=Decimal(
-                f"{match_res.group(3)}"
-                + f"{'' if match_res.group(4) is None else match_res.group(4)}"
-            ),
-            cnt=int(match_res.group(1)),
-            taxed=self.__taxed_f(item_name),
+        return True, self._create_item(parts[0], parts[1], parts[2] + parts[3])
+
+    def analyse_input_cents(self, in_str: str, /) -> tuple[bool, None | CentsItem]:
+        """To analyse an input string without creating ``Decimal`` values.
+
+        The price is parsed straight into integer cents, thus prices with
+        more than two decimal places are not recognised.
+
+        Args:
+            in_str: The input string, which should be analysed.
+
+        Returns:
+            Returns a boolean and either the ``CentsItem`` element if boolean
+            is ``True`` or None otherwise.
+        """
+        parts = self._split(in_str)
+        if parts is None:
+            return False, None
+        price = parse_cents(parts[2], parts[3][1:])
+        if price is None:
+            return False, None
+        _, name, imported, taxed = self.__products.lookup(parts[1])
+        return True, CentsItem(
+            imported=imported,
+            name=name,
+            price=price,
+            cnt=int(parts[0]),
+            taxed=taxed,
         )
 
     def __str__(self) -> str:
@@ -167,7 +584,7 @@ class InFormatter:
         """
         return (
             "---\nINPUT format:\n"
-            + f"\tpattern: {_DI_ITEM.pattern}\n"
+            + f"\tpattern: {_DI_ITEM}\n"
             + "\tsimple input: [item cnt] (imported) [item name] at [price]\n"
             + f"\tfinish all purchases: {self.__term_str}\n"
             + f"\tstart next purchase: {self.__buy_str}\n---"
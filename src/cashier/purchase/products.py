@@ -0,0 +1,135 @@
+"""A module providing a dictionary of the products of a register."""
+from collections.abc import Callable
+from typing import Final, final
+
+# id of a name which is not interned
+NO_PID: Final[int] = -1
+# default amount of interned products
+_D_MAX_SIZE: Final[int] = 1 << 20
+# id, cleaned name, imported, taxed
+ProductInfo = tuple[int, str, bool, bool]
+
+
+@final
+class ProductDictionary:
+    """Interns the product names of a register to small integer ids.
+
+    Every distinct spelling of a name in the input is analysed once, the
+    cleaned name is stored once and the decision whether the basic sales
+    taxes apply is cached alongside its id. Thus items of the same product
+    share one name object across all purchases and the exemptions are
+    decided once per product instead of once per input line. Ids are never
+    reused, names beyond the maximal size are analysed on every lookup and
+    receive ``NO_PID``.
+
+    Args:
+        clean_f: Function which removes the imported keyword from a spelling
+            and returns the cleaned name and whether the item is imported.
+        taxed_f: Function which decides whether the basic taxes apply to a
+            cleaned name.
+        max_size: The maximal amount of interned products.
+    """
+
+    def __init__(
+        self,
+        clean_f: Callable[[str], tuple[str, bool]],
+        taxed_f: Callable[[str], bool],
+        /,
+        max_size: int = _D_MAX_SIZE,
+    ) -> None:
+        """To initialise the class."""
+        super().__init__()
+        self.__clean_f: Callable[[str], tuple[str, bool]] = clean_f
+        self.__taxed_f: Callable[[str], bool] = taxed_f
+        self.__max_size: int = max_size
+        # per id: the cleaned name, whether the basic sales taxes apply
+        self.__names: list[str] = []
+        self.__taxed: bytearray = bytearray()
+        self.__ids: dict[str, int] = {}
+        # spelling in the input: id, imported
+        self.__spellings: dict[str, tuple[int, bool]] = {}
+
+    def __len__(self) -> int:
+        """To return the amount of interned products.
+
+        Returns:
+            The amount of products, which is the next id.
+        """
+        return len(self.__names)
+
+    def intern(self, name: str, /) -> int:
+        """To return the id of a cleaned name.
+
+        Args:
+            name: The cleaned name of a product.
+
+        Returns:
+            The id of the product, new names are added to the dictionary
+            unless it is full, then ``NO_PID`` is returned.
+        """
+        pid = self.__ids.get(name)
+        if pid is None:
+            if len(self.__names) >= self.__max_size:
+                return NO_PID
+            pid = self.__ids[name] = len(self.__names)
+            self.__names.append(name)
+            self.__taxed.append(self.__taxed_f(name))
+        return pid
+
+    def name(self, pid: int, /) -> str:
+        """To return the cleaned name of a product.
+
+        Args:
+            pid: The id of the product.
+
+        Returns:
+            The interned name of the product.
+        """
+        return self.__names[pid]
+
+    def is_taxed(self, pid: int, /) -> bool:
+        """To return the cached exemption decision of a product.
+
+        Args:
+            pid: The id of the product.
+
+        Returns:
+            Whether the basic sales taxes apply to the product.
+        """
+        return bool(self.__taxed[pid])
+
+    def lookup(self, spelling: str, /) -> ProductInfo:
+        """To analyse the name part of an input, once per distinct spelling.
+
+        Args:
+            spelling: The name of the item as it appears in the input,
+                possibly containing the imported keyword.
+
+        Returns:
+            The id, the interned name, whether the item is imported and
+            whether it is taxed.
+        """
+        entry = self.__spellings.get(spelling)
+        if entry is None:
+            name, imported = self.__clean_f(spelling)
+            pid = self.intern(name)
+            if pid == NO_PID:
+                return pid, name, imported, self.__taxed_f(name)
+            if len(self.__spellings) < self.__max_size:
+                self.__spellings[spelling] = (pid, imported)
+        else:
+            pid, imported = entry
+        return pid, self.__names[pid], imported, bool(self.__taxed[pid])
+
+    def __str__(self) -> str:
+        """To create a string representation.
+
+        Returns:
+            String representation of the ``ProductDictionary`` object.
+        """
+        return (
+            "---\nPRODUCTS:\n"
+            + f"\tproducts: {len(self.__names)}\n"
+            + f"\tspellings: {len(self.__spellings)}\n"
+            + f"\tmax size: {self.__max_size}\n---"
+        )
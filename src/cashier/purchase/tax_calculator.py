@@ -1,9 +1,21 @@
 """A module used for calculating taxes."""
 import decimal
+import functools
+from collections.abc import Sequence
 from decimal import Decimal
-from typing import final
+from typing import TYPE_CHECKING, final
 
-from cashier.purchase.container import PurchasedItem
+from cashier.purchase.cents import (
+    from_cents,
+    rate_fraction,
+    round_tax,
+    tax_cents_column,
+    to_cents,
+)
+from cashier.purchase.container import CentsItem, PurchasedItem, TaxCacheInfo
+
+if TYPE_CHECKING:
+    from cashier.purchase.tax_rules import TaxRuleTable
 
 
 @final
@@ -13,11 +25,29 @@ class TaxCalculator:
     Args:
         import_taxes: Sales taxes for imported items.
         normal_taxes: Basic sales taxes.
+        cache_size: The maximal amount of memoized sales taxes.
+            The cache is disabled for values lower than one.
+        rules: The optional tax rules of several regions. If given, they replace
+            the import and basic sales taxes and the cache.
     """
 
-    def __init__(self, import_taxes: float, normal_taxes: float, /) -> None:
+    def __init__(
+        self,
+        import_taxes: float,
+        normal_taxes: float,
+        /,
+        cache_size: int = 0,
+        rules: "None | TaxRuleTable" = None,
+    ) -> None:
         """To initialise the class."""
         super().__init__()
+        self.__rules: "None | TaxRuleTable" = rules
+        # memoized sales taxes keyed on: price, imported, taxed, cnt
+        self.__cache = (
+            functools.lru_cache(maxsize=cache_size)(self._tax)
+            if cache_size > 0
+            else None
+        )
         # precision for: one decimal place, two decimal places
         self.__precision: tuple[Decimal, Decimal] = (Decimal("0.0"), Decimal("0.00"))
         self.__multiplier: Decimal = Decimal("2")
@@ -43,6 +73,8 @@ class TaxCalculator:
             ),
             Decimal("0"),
         )
+        # numerators of the taxes: imported, normal, none; their denominator
+        self.__rates: tuple[list[int], int] = rate_fraction(self.__taxes)
 
     @staticmethod
     def check_taxes(tax: float, default_t: float, msg: str, /) -> float:
@@ -78,31 +110,231 @@ class TaxCalculator:
 
         Note:
             The taxes are rounded similar to the ``round(20 * total) / 20``
-            approach and only print two decimal places.
+            approach and only print two decimal places. The rounding modes are
+            passed explicitly, thus the ``decimal`` context of the calling
+            thread is neither used for rounding nor modified.
         """
-        decimal.getcontext().rounding = decimal.ROUND_HALF_UP
         taxes: Decimal = (price * tax * self.__multiplier * cnt).quantize(
-            self.__precision[0]
+            self.__precision[0], rounding=decimal.ROUND_HALF_UP
         ) / self.__multiplier
-        decimal.getcontext().rounding = decimal.ROUND_DOWN
-        return taxes.quantize(self.__precision[1])
+        return taxes.quantize(self.__precision[1], rounding=decimal.ROUND_DOWN)
+
+    def _tax(self, price: Decimal, imported: bool, taxed: bool, cnt: int, /) -> Decimal:
+        """To calculate sales taxes for the attributes of a purchased item.
+
+        Args:
+            price: Price of the purchased item.
+            imported: Whether the purchased item is imported.
+            taxed: Whether the basic sales taxes apply.
+            cnt: Amount of the purchased item.
+
+        Returns:
+            Calculated and formatted sales taxes.
+        """
+        abs_price: Decimal = abs(price)
+        imported_tax: Decimal = self.__taxes[0] if imported else self.__taxes[2]
+        if taxed:
+            return self._calc_tax(abs_price, self.__taxes[1] + imported_tax, cnt)
+        if imported:
+            return self._calc_tax(abs_price, imported_tax, cnt)
+        return self.__taxes[2].quantize(self.__precision[1], rounding=decimal.ROUND_DOWN)
 
     def tax(self, p_item: PurchasedItem, /) -> Decimal:
         """To calculate sales taxes for a purchased item.
 
+        If the cache is enabled, the sales taxes of recently seen items
+        with the same price, flags and amount are reused.
+
         Args:
             p_item: Purchased item.
 
         Returns:
             Calculated and formatted sales taxes for the purchased item ``p_item``.
         """
-        abs_price: Decimal = abs(p_item.price)
-        imported_tax: Decimal = self.__taxes[0] if p_item.imported else self.__taxes[2]
-        if p_item.taxed:
-            return self._calc_tax(abs_price, self.__taxes[1] + imported_tax, p_item.cnt)
-        if p_item.imported:
-            return self._calc_tax(abs_price, imported_tax, p_item.cnt)
-        return self.__taxes[2].quantize(self.__precision[1])
+        if self.__rules is not None:
+            p_num, p_den = p_item.price.as_integer_ratio()
+            return from_cents(
+                self.__rules.tax_fraction(
+                    100 * p_num,
+                    p_den,
+                    p_item.cnt,
+                    self.__rules.category(p_item.name, p_item.taxed),
+                    p_item.imported,
+                )
+            )
+        if self.__cache is not None:
+            return self.__cache(p_item.price, p_item.imported, p_item.taxed, p_item.cnt)
+        return self._tax(p_item.price, p_item.imported, p_item.taxed, p_item.cnt)
+
+    def tax_cents(self, c_item: CentsItem, /) -> int:
+        """To calculate sales taxes for a purchased item priced in cents.
+
+        Only integer arithmetic is used, the result is equal to ``tax``
+        multiplied by 100.
+
+        Args:
+            c_item: Purchased item with a price in cents.
+
+        Returns:
+            Calculated sales taxes for the purchased item ``c_item`` in cents.
+        """
+        if self.__rules is not None:
+            return self.__rules.tax_fraction(
+                c_item.price,
+                1,
+                c_item.cnt,
+                self.__rules.category(c_item.name, c_item.taxed),
+                c_item.imported,
+            )
+        (imp_num, norm_num, _), den = self.__rates
+        rate_num = (norm_num if c_item.taxed else 0) + (imp_num if c_item.imported else 0)
+        return round_tax(abs(c_item.price) * c_item.cnt * rate_num, 5 * den)
+
+    def cache_info(self) -> TaxCacheInfo:
+        """To return the statistics of the sales tax cache.
+
+        The statistics are reset whenever the cache is invalidated.
+
+        Returns:
+            The hits, misses, size and maximal size of the cache,
+            all of them are zero if the cache is disabled.
+        """
+        if self.__cache is None:
+            return TaxCacheInfo(hits=0, misses=0, size=0, max_size=0)
+        info = self.__cache.cache_info()
+        return TaxCacheInfo(
+            hits=info.hits,
+            misses=info.misses,
+            size=info.currsize,
+            max_size=info.maxsize or 0,
+        )
+
+    def _clear_cache(self) -> None:
+        """To invalidate all memoized sales taxes."""
+        if self.__cache is not None:
+            self.__cache.cache_clear()
+
+    def _rate_column(
+        self, imported: Sequence[bool], taxed: Sequence[bool], /
+    ) -> tuple[list[int], int]:
+        """To select the tax rate of each item in a batch.
+
+        Args:
+            imported: Whether each item is imported.
+            taxed: Whether the basic sales taxes apply to each item.
+
+        Returns:
+            The numerator of the tax rate of each item and their common denominator.
+        """
+        (imp_num, norm_num, _), den = self.__rates
+        return [
+            norm_num * tax_i + imp_num * imp_i
+            for imp_i, tax_i in zip(imported, taxed, strict=True)
+        ], den
+
+    def tax_many_cents(
+        self,
+        price_cents: Sequence[int],
+        cnts: Sequence[int],
+        imported: Sequence[bool],
+        taxed: Sequence[bool],
+        /,
+        names: None | Sequence[str] = None,
+    ) -> list[int]:
+        """To calculate sales taxes for a batch of items priced in cents.
+
+        The batch is column-oriented, the n-th entry of each sequence
+        describes the n-th item. NumPy is used if it is installed.
+
+        Args:
+            price_cents: Prices of the purchased items in cents.
+            cnts: Amounts of the purchased items.
+            imported: Whether the purchased items are imported.
+            taxed: Whether the basic sales taxes apply to the purchased items.
+            names: The optional names of the purchased items, which decide their
+                categories if tax rules are used.
+
+        Returns:
+            Calculated sales taxes in cents, equal to ``tax`` multiplied by 100.
+
+        Raises:
+            ValueError: If the columns differ in length.
+        """
+        if not len(price_cents) == len(cnts) == len(imported) == len(taxed):
+            raise ValueError("The columns of the batch differ in length.")
+        if self.__rules is not None:
+            return self.__rules.tax_many_cents(price_cents, cnts, imported, taxed, names)
+        rate_nums, rate_den = self._rate_column(imported, taxed)
+        return tax_cents_column(
+            [abs(price) for price in price_cents], cnts, rate_nums, rate_den
+        )
+
+    def tax_many(
+        self,
+        prices: Sequence[Decimal],
+        cnts: Sequence[int],
+        imported: Sequence[bool],
+        taxed: Sequence[bool],
+        /,
+        names: None | Sequence[str] = None,
+    ) -> list[Decimal]:
+        """To calculate sales taxes for a batch of items.
+
+        The batch is column-oriented, the n-th entry of each sequence
+        describes the n-th item. The taxes are calculated with integer
+        arithmetic and are equal to the results of ``tax``.
+
+        Args:
+            prices: Prices of the purchased items.
+            cnts: Amounts of the purchased items.
+            imported: Whether the purchased items are imported.
+            taxed: Whether the basic sales taxes apply to the purchased items.
+            names: The optional names of the purchased items, which decide their
+                categories if tax rules are used.
+
+        Returns:
+            Calculated and formatted sales taxes for the purchased items.
+
+        Raises:
+            ValueError: If the columns differ in length.
+        """
+        price_cents: list[int] = []
+        for price in prices:
+            if (cents := to_cents(price)) is None:
+                break
+            price_cents.append(cents)
+        else:
+            return [
+                from_cents(tax_c)
+                for tax_c in self.tax_many_cents(
+                    price_cents, cnts, imported, taxed, names=names
+                )
+            ]
+        # at least one price has more than two decimal places
+        if not len(prices) == len(cnts) == len(imported) == len(taxed):
+            raise ValueError("The columns of the batch differ in length.")
+        if self.__rules is not None:
+            rules = self.__rules
+            rule_taxes: list[Decimal] = []
+            for pos, (price, cnt, imp_i, tax_i) in enumerate(
+                zip(prices, cnts, imported, taxed, strict=True)
+            ):
+                p_num, p_den = price.as_integer_ratio()
+                category = rules.category(None if names is None else names[pos], tax_i)
+                rule_taxes.append(
+                    from_cents(
+                        rules.tax_fraction(100 * p_num, p_den, cnt, category, imp_i)
+                    )
+                )
+            return rule_taxes
+        rate_nums, rate_den = self._rate_column(imported, taxed)
+        taxes: list[Decimal] = []
+        for price, cnt, rate_num in zip(prices, cnts, rate_nums, strict=True):
+            p_num, p_den = abs(price).as_integer_ratio()
+            taxes.append(
+                from_cents(round_tax(20 * p_num * cnt * rate_num, p_den * rate_den))
+            )
+        return taxes
 
     def new_import_tax(self, tax: float, /) -> None:
         """To set a new value for the import sales taxes.
@@ -111,6 +343,8 @@ class TaxCalculator:
             tax: New value for the import sales taxes.
         """
         self.__taxes = (Decimal(str(tax)), self.__taxes[1], self.__taxes[2])
+        self.__rates = rate_fraction(self.__taxes)
+        self._clear_cache()
 
     def new_normal_tax(self, tax: float, /) -> None:
         """To set a new value for the basic sales taxes.
@@ -119,6 +353,8 @@ class TaxCalculator:
             tax: New value for the basic sales taxes.
         """
         self.__taxes = (self.__taxes[0], Decimal(str(tax)), self.__taxes[2])
+        self.__rates = rate_fraction(self.__taxes)
+        self._clear_cache()
 
     def __str__(self) -> str:
         """To create a string representation.
@@ -126,6 +362,8 @@ class TaxCalculator:
         Returns:
             String representation of the ``TaxCalculator`` object.
         """
+        if self.__rules is not None:
+            return str(self.__rules)
         return (
             "---\nTAXES:\n"
             + f"\textra import sales tax: {self.__taxes[0]}\n"
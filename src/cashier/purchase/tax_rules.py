@@ -0,0 +1,328 @@
+"""A module providing tax rules of several regions."""
+import functools
+import tomllib
+from collections.abc import Mapping, Sequence
+from decimal import Decimal
+from pathlib import Path
+from typing import Final, final
+
+from cashier.purchase.cents import rate_fraction, round_tax, tax_cents_column
+from cashier.purchase.exemption import ExemptionMatcher
+
+# built-in categories of items: basic sales taxes apply or not
+CAT_BASIC: Final[str] = "basic"
+CAT_EXEMPT: Final[str] = "exempt"
+# cap of rules without a cap
+_NO_CAP: Final[int] = -1
+# distinct item names with a memoized category
+_CAT_CACHE: Final[int] = 1 << 16
+
+
+def _read_rate(rule: Mapping[str, object], /) -> Decimal:
+    """To sum up the levies of a rule.
+
+    Args:
+        rule: The rule of the rule file.
+
+    Returns:
+        The tax rate of the rule.
+
+    Raises:
+        TypeError: If a levy is not a number.
+        ValueError: If a levy is negative.
+    """
+    levies = rule.get("levies", [])
+    if not isinstance(levies, list):
+        raise TypeError("levies has to be a list of numbers.")
+    rate = Decimal(0)
+    for levy in levies:
+        if isinstance(levy, bool) or not isinstance(levy, int | float):
+            raise TypeError("levies has to be a list of numbers.")
+        if levy < 0:
+            raise ValueError("levies can't be negative.")
+        rate += Decimal(str(levy))
+    return rate
+
+
+def _read_cap(rule: Mapping[str, object], /) -> int:
+    """To read the cap of a rule.
+
+    Args:
+        rule: The rule of the rule file.
+
+    Returns:
+        The maximal sales taxes per unit in cents, -1 if there is no cap.
+
+    Raises:
+        TypeError: If the cap is not a number.
+        ValueError: If the cap is negative or has more than two decimal places.
+    """
+    cap = rule.get("cap")
+    if cap is None:
+        return _NO_CAP
+    if isinstance(cap, bool) or not isinstance(cap, int | float):
+        raise TypeError("cap has to be a number.")
+    cents = Decimal(str(cap)) * 100
+    if cap < 0 or cents != cents.to_integral_value():
+        raise ValueError("cap has to be a non-negative price.")
+    return int(cents)
+
+
+def _read_rule(rule: object, /) -> tuple[str, str, tuple[bool, ...], Decimal, int]:
+    """To read a rule of the rule file.
+
+    Args:
+        rule: The rule of the rule file.
+
+    Returns:
+        The region, the category, the import states, the tax rate and the cap.
+
+    Raises:
+        TypeError: If a value has the wrong type.
+    """
+    if not isinstance(rule, dict):
+        raise TypeError("rules has to be a list of tables.")
+    region, category = rule.get("region"), rule.get("category")
+    if not isinstance(region, str) or not isinstance(category, str):
+        raise TypeError("region and category of a rule have to be strings.")
+    imported = rule.get("imported")
+    if imported is not None and not isinstance(imported, bool):
+        raise TypeError("imported has to be a boolean.")
+    return (
+        region,
+        category,
+        (False, True) if imported is None else (imported,),
+        _read_rate(rule),
+        _read_cap(rule),
+    )
+
+
+def _read_categories(data: Mapping[str, object], /) -> dict[str, list[str]]:
+    """To read the phrases of the named categories.
+
+    Args:
+        data: The content of the rule file.
+
+    Returns:
+        The phrases of each category, in order of precedence.
+
+    Raises:
+        TypeError: If a value has the wrong type.
+        ValueError: If a built-in category is redefined.
+    """
+    categories = data.get("categories", {})
+    if not isinstance(categories, dict):
+        raise TypeError("categories has to be a table.")
+    for category, phrases in categories.items():
+        if not isinstance(phrases, list) or not all(
+            isinstance(phrase, str) for phrase in phrases
+        ):
+            raise TypeError(f"the phrases of {category} have to be strings.")
+        if category in (CAT_BASIC, CAT_EXEMPT):
+            raise ValueError(f"{category} is a built-in category.")
+    return categories
+
+
+@final
+class TaxRuleTable:
+    """Sales tax rules of several regions compiled into a flat table.
+
+    The TOML rule file lists ``rules``, each with a ``region``, a ``category``,
+    ``levies`` which are added up, an optional ``cap`` of the sales taxes per
+    unit and an optional ``imported`` flag, rules without it apply to both
+    import states. Later rules replace earlier ones. Items belong to the first
+    category of ``categories`` whose phrases appear in their name, otherwise to
+    the built-in ``basic`` or ``exempt`` category, depending on whether the
+    basic sales taxes apply. Named categories without a rule for a region fall
+    back to its ``basic`` rules and categories without any rule aren't taxed.
+
+    All rates are compiled to numerators of one common denominator, thus
+    pricing an item is one lookup keyed on region, category and import state
+    followed by a single rounding step.
+
+    Args:
+        rule_file: The TOML rule file.
+        region: The region whose rules are applied, defaults to the ``region``
+            of the rule file.
+
+    Raises:
+        TypeError: If a value of the rule file has the wrong type.
+        ValueError: If a value of the rule file is invalid, there is no region
+            or the file has no rules for the region.
+    """
+
+    def __init__(self, rule_file: Path, /, region: None | str = None) -> None:
+        """To initialise the class."""
+        super().__init__()
+        with rule_file.open("rb") as fh_r:
+            data = tomllib.load(fh_r)
+        region = data.get("region") if region is None else region
+        if region is None:
+            raise ValueError("The rule file doesn't define a region.")
+        if not isinstance(region, str):
+            raise TypeError("region has to be a string.")
+        rules = data.get("rules", [])
+        if not isinstance(rules, list):
+            raise TypeError("rules has to be a list of tables.")
+        raw: dict[tuple[str, str, bool], tuple[Decimal, int]] = {}
+        for rule in rules:
+            r_region, category, imported, rate, cap = _read_rule(rule)
+            for imp in imported:
+                raw[(r_region, category, imp)] = (rate, cap)
+        categories = _read_categories(data)
+        if all(key[0] != region for key in raw):
+            raise ValueError(f"The rule file has no rules for the region {region}.")
+        for r_region in {key[0] for key in raw}:
+            for category in categories:
+                for imp in (False, True):
+                    basic = raw.get((r_region, CAT_BASIC, imp))
+                    if (r_region, category, imp) not in raw and basic is not None:
+                        raw[(r_region, category, imp)] = basic
+        nums, den = rate_fraction([rate for rate, _ in raw.values()]) if raw else ([], 1)
+        # key: region, category, imported; value: rate numerator, cap in cents
+        self.__table: dict[tuple[str, str, bool], tuple[int, int]] = {
+            key: (num, cap)
+            for key, num, (_, cap) in zip(raw, nums, raw.values(), strict=True)
+        }
+        self.__den: int = den
+        self.__region: str = region
+        self.__rule_file: Path = rule_file
+        self.__matchers: list[tuple[str, ExemptionMatcher]] = [
+            (category, ExemptionMatcher(phrases))
+            for category, phrases in categories.items()
+        ]
+        self.__category = functools.lru_cache(maxsize=_CAT_CACHE)(self._category)
+
+    @property
+    def region(self) -> str:
+        """The region whose rules are applied."""
+        return self.__region
+
+    def __len__(self) -> int:
+        """To return the amount of compiled table entries.
+
+        Returns:
+            The amount of entries, each one keyed on region, category and
+            import state.
+        """
+        return len(self.__table)
+
+    def _category(self, name: str, taxed: bool, /) -> str:
+        """To decide the category of an item.
+
+        Args:
+            name: The name of the item.
+            taxed: Whether the basic sales taxes apply to the item.
+
+        Returns:
+            The category of the item.
+        """
+        for category, matcher in self.__matchers:
+            if not matcher.is_taxed(name):
+                return category
+        return CAT_BASIC if taxed else CAT_EXEMPT
+
+    def category(self, name: None | str, taxed: bool, /) -> str:
+        """To decide the category of an item, memoized per name.
+
+        Args:
+            name: The name of the item or None to use the built-in categories.
+            taxed: Whether the basic sales taxes apply to the item.
+
+        Returns:
+            The category of the item.
+        """
+        if name is None or not self.__matchers:
+            return CAT_BASIC if taxed else CAT_EXEMPT
+        return self.__category(name, taxed)
+
+    def rule(self, category: str, imported: bool, /) -> tuple[int, int, int]:
+        """To look up the rule of the current region.
+
+        Args:
+            category: The category of the item.
+            imported: Whether the item is imported.
+
+        Returns:
+            The numerator and the denominator of the tax rate and the cap per
+            unit in cents, -1 if there is no cap.
+        """
+        num, cap = self.__table.get((self.__region, category, imported), (0, _NO_CAP))
+        return num, self.__den, cap
+
+    def tax_fraction(
+        self,
+        price_num: int,
+        price_den: int,
+        cnt: int,
+        category: str,
+        imported: bool,
+        /,
+    ) -> int:
+        """To calculate the sales taxes of an item with an exact price.
+
+        Args:
+            price_num: The numerator of the price in cents.
+            price_den: The positive denominator of the price in cents.
+            cnt: Amount of the purchased item.
+            category: The category of the item.
+            imported: Whether the item is imported.
+
+        Returns:
+            The sales taxes in cents, rounded to the next 0.05.
+        """
+        num, cap = self.__table.get((self.__region, category, imported), (0, _NO_CAP))
+        unit = abs(price_num) * num
+        if 0 <= cap * price_den * self.__den < unit:
+            return round_tax(cap * cnt, 5)
+        return round_tax(unit * cnt, 5 * price_den * self.__den)
+
+    def tax_many_cents(
+        self,
+        price_cents: Sequence[int],
+        cnts: Sequence[int],
+        imported: Sequence[bool],
+        taxed: Sequence[bool],
+        names: None | Sequence[str] = None,
+        /,
+    ) -> list[int]:
+        """To calculate sales taxes for a batch of items priced in cents.
+
+        Args:
+            price_cents: Prices of the purchased items in cents.
+            cnts: Amounts of the purchased items.
+            imported: Whether the purchased items are imported.
+            taxed: Whether the basic sales taxes apply to the purchased items.
+            names: The optional names of the items deciding their categories.
+
+        Returns:
+            The sales taxes in cents, rounded to the next 0.05.
+        """
+        table, region, den = self.__table, self.__region, self.__den
+        if names is None:
+            categories = [CAT_BASIC if tax_i else CAT_EXEMPT for tax_i in taxed]
+        else:
+            categories = [
+                self.category(name, tax_i)
+                for name, tax_i in zip(names, taxed, strict=True)
+            ]
+        # the rate and the cap are folded into the taxes of a single unit
+        units: list[int] = []
+        for price, imp_i, category in zip(price_cents, imported, categories, strict=True):
+            num, cap = table.get((region, category, imp_i), (0, _NO_CAP))
+            unit = abs(price) * num
+            units.append(cap * den if 0 <= cap * den < unit else unit)
+        return tax_cents_column(units, cnts, [1] * len(units), den)
+
+    def __str__(self) -> str:
+        """To create a string representation.
+
+        Returns:
+            String representation of the ``TaxRuleTable`` object.
+        """
+        return (
+            "---\nTAX RULES:\n"
+            + f"\trule file: {self.__rule_file}\n"
+            + f"\tregion: {self.__region}\n"
+            + f"\tcategories: {len(self.__matchers)}\n---"
+        )
@@ -1,12 +1,23 @@
 """A module providing a starting procedure."""
+
+import sys
+import time
 from collections.abc import Callable
 from pathlib import Path
-from typing import Final
+from typing import TYPE_CHECKING, Final, TextIO
 
 from cashier.purchase.bill import Bill
+from cashier.purchase.container import MoneyBackend, ReplayStats
+from cashier.purchase.exemption import ExemptionMatcher
 from cashier.purchase.formatter import InFormatter, OutFormatter
 from cashier.purchase.tax_calculator import TaxCalculator
 
+if TYPE_CHECKING:
+    from cashier.export import BillExporter
+    from cashier.journal import BillJournal
+    from cashier.purchase.columnar_bill import ColumnarBill
+    from cashier.purchase.exemption_index import ExemptionIndex
+
 # default values for the input-formatter
 DI_TERM: Final[str] = "##"
 DI_BUY: Final[str] = "#"
@@ -25,45 +36,37 @@ _D_TAX_E: Final[set[str]] = {
 }
 
 
-def decide_if_taxed(n_taxed: set[str]) -> Callable[[str], bool]:
+def decide_if_taxed(
+    n_taxed: "set[str] | ExemptionMatcher | ExemptionIndex",
+) -> Callable[[str], bool]:
     """To create a decider function for omitting taxation.
 
+    An item is not taxed if its name contains one of the given names.
+    Names consisting of several words have to appear as a whole.
+    A compiled ``ExemptionMatcher`` can be shared between several registers,
+    a mapped ``ExemptionIndex`` between several processes.
+
     Args:
-        n_taxed: The set containing all items which shouldn't be taxed.
-            If empty, a default set will be chosen.
+        n_taxed: The set, matcher or index containing all items which shouldn't
+            be taxed. If the set or the index is empty, a default set will be
+            chosen.
 
     Returns:
         Decider function for omitting taxation.
     """
-    local_set = _D_TAX_E
-    if n_taxed:
-        local_set = n_taxed
-
-    def _decide_if_taxed(in_str: str, /) -> bool:
-        """To check whether an item is taxed.
-
-        A very simple function which looks up the item in a
-        given set. This set contains all item names which should be omitted
-        from taxation.
-
-        Args:
-            in_str: The name of the purchased item which should be checked for taxation.
-
-        Returns:
-            Whether the item is taxed.
-        """
-        for item_sub_name in in_str.split(" "):
-            if item_sub_name in local_set:
-                return False
-        return True
-
-    return _decide_if_taxed
+    if isinstance(n_taxed, ExemptionMatcher):
+        return n_taxed.is_taxed
+    if not isinstance(n_taxed, set):
+        # an empty index behaves like an empty omit-taxes file
+        return n_taxed.is_taxed if len(n_taxed) else decide_if_taxed(set())
+    return ExemptionMatcher(n_taxed if n_taxed else _D_TAX_E).is_taxed
 
 
 def _read_tax_file(tax_file: None | Path, /) -> set[str]:
     """To create a set with all item names which shouldn't be taxed.
 
-    The file should contain one name per line.
+    The file should contain one name per line, empty lines are ignored
+    like by ``compile_index``.
 
     Args:
         tax_file: The file containing item names which shouldn't be taxed.
@@ -76,44 +79,309 @@ def _read_tax_file(tax_file: None | Path, /) -> set[str]:
         return set()
     try:
         with tax_file.open("r") as fh_r:
-            return {line.rstrip() for line in fh_r}
+            return {name for line in fh_r if (name := line.rstrip())}
     except IOError as ex_n:
         print(str(ex_n))
     return set()
 
 
-def start_register(tax_file: None | Path, /) -> None:
+def create_register(
+    tax_file: None | Path,
+    /,
+    import_taxes: float = 0.05,
+    normal_taxes: float = 0.1,
+    rule_file: None | Path = None,
+    region: None | str = None,
+    out_format: str = "text",
+) -> tuple[InFormatter, OutFormatter, TaxCalculator]:
+    """To create the formatters and the tax calculator of a register.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items,
+            either as text or as an index created by ``compile_index``.
+            An index is mapped into memory instead of being read.
+        import_taxes: Sales taxes for imported items.
+        normal_taxes: Basic sales taxes.
+        rule_file: The optional TOML file with the tax rules of several regions,
+            which replace the import and basic sales taxes.
+        region: The region of the tax rules, defaults to the one of the file.
+        out_format: The name of a registered output format.
+
+    Returns:
+        The input formatter, the output formatter and the tax calculator.
+    """
+    # the index and the rules are imported on demand, which keeps startup short
+    if tax_file is None:
+        is_taxed = decide_if_taxed(set())
+    else:
+        from cashier.purchase.exemption_index import ExemptionIndex, is_index
+
+        is_taxed = decide_if_taxed(
+            ExemptionIndex(tax_file) if is_index(tax_file) else _read_tax_file(tax_file)
+        )
+    rules = None
+    if rule_file is not None:
+        from cashier.purchase.tax_rules import TaxRuleTable
+
+        rules = TaxRuleTable(rule_file, region)
+    return (
+        InFormatter(DI_TERM, DI_BUY, is_taxed),
+        OutFormatter(DO_TOTAL, DO_SALES_T, DO_IMP, out_format=out_format),
+        TaxCalculator(import_taxes, normal_taxes, rules=rules),
+    )
+
+
+def new_bill(
+    out_form: OutFormatter,
+    tax_calc: TaxCalculator,
+    money: MoneyBackend,
+    /,
+    aggregate: bool = False,
+) -> "Bill | ColumnarBill":
+    """To create an empty purchase for a money backend.
+
+    Args:
+        out_form: The formatter used for creating the output of the purchase.
+        tax_calc: The calculator for the sales taxes.
+        money: The representation of prices and sales taxes.
+        aggregate: Whether equal items are merged into one line.
+
+    Returns:
+        A ``Bill`` for ``Decimal`` values or a ``ColumnarBill`` for integer cents.
+
+    Raises:
+        ValueError: If purchases in integer cents should be aggregated.
+    """
+    if money is MoneyBackend.CENTS:
+        if aggregate:
+            raise ValueError("Purchases in integer cents can't be aggregated.")
+        from cashier.purchase.columnar_bill import ColumnarBill
+
+        return ColumnarBill(out_form, tax_calc)
+    return Bill(out_form, tax_calc, aggregate=aggregate)
+
+
+def add_input(
+    bill: "Bill | ColumnarBill", in_form: InFormatter, input_str: str, /
+) -> None | str:
+    """To add the item described by an input line to a purchase.
+
+    Purchases in columns are filled without creating ``Decimal`` values.
+
+    Args:
+        bill: The current purchase.
+        in_form: The formatter used for analysing the input.
+        input_str: The input line.
+
+    Returns:
+        The description of the adding action or None if the input was not recognised.
+    """
+    if isinstance(bill, Bill):
+        p_item = in_form.analyse_input(input_str)
+        if p_item[0] and p_item[1] is not None:
+            return bill.add_item(p_item[1])
+        return None
+    c_item = in_form.analyse_input_cents(input_str)
+    if c_item[0] and c_item[1] is not None:
+        return bill.add_cents_item(c_item[1])
+    return None
+
+
+def write_bill(
+    bill: "Bill | ColumnarBill",
+    bill_id: int,
+    sink: TextIO,
+    /,
+    exporter: "None | BillExporter" = None,
+) -> None:
+    """To write the receipt of a finished purchase.
+
+    Empty purchases are skipped, but still keep their number.
+
+    Args:
+        bill: The finished purchase.
+        bill_id: The number of the purchase, starting with one.
+        sink: The writer receiving the receipt.
+        exporter: The optional columnar export receiving the items.
+    """
+    if len(bill):
+        bill.write_to(sink, bill_id=bill_id)
+        if exporter is not None:
+            exporter.add_bill(bill_id, bill)
+
+
+def run_batch(
+    tax_file: None | Path,
+    source: TextIO,
+    sink: TextIO,
+    /,
+    money: MoneyBackend = MoneyBackend.DECIMAL,
+    exporter: "None | BillExporter" = None,
+    rule_file: None | Path = None,
+    region: None | str = None,
+    aggregate: bool = False,
+    out_format: str = "text",
+) -> ReplayStats:
+    """To replay a transcript without prompting.
+
+    The lines of ``source`` are streamed through the register. Every purchase
+    is written to ``sink`` as soon as it is concluded, thus only one purchase
+    is held in memory at a time. The per-item messages of the interactive mode
+    are omitted.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        source: The transcript, one input per line.
+        sink: The writer receiving the receipts.
+        money: The representation of prices and sales taxes. Integer cents
+            don't recognise prices with more than two decimal places.
+        exporter: The optional columnar export receiving the items of every
+            finished purchase.
+        rule_file: The optional TOML file with the tax rules of several regions.
+        region: The region of the tax rules, defaults to the one of the file.
+        aggregate: Whether equal items of a purchase are merged into one line,
+            not supported for integer cents.
+        out_format: The name of a registered output format of the receipts.
+
+    Returns:
+        Statistics describing the run.
+
+    Raises:
+        ValueError: If purchases in integer cents should be aggregated or
+            the output format is not registered.
+    """
+    start = time.perf_counter()
+    in_form, out_form, tax_calc = create_register(
+        tax_file, rule_file=rule_file, region=region, out_format=out_format
+    )
+    bill = new_bill(out_form, tax_calc, money, aggregate=aggregate)
+    bill_cnt, line_cnt, invalid_cnt = 1, 0, 0
+    for input_str in source:
+        line_cnt += 1
+        if not in_form.is_not_term(input_str):
+            break
+        if in_form.is_not_bought(input_str):
+            if add_input(bill, in_form, input_str) is None:
+                invalid_cnt += 1
+        else:
+            write_bill(bill, bill_cnt, sink, exporter=exporter)
+            bill = new_bill(out_form, tax_calc, money, aggregate=aggregate)
+            bill_cnt += 1
+    write_bill(bill, bill_cnt, sink, exporter=exporter)
+    sink.flush()
+    return ReplayStats(
+        lines=line_cnt,
+        invalid=invalid_cnt,
+        bills=bill_cnt,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def _journal_add(
+    journal: "None | BillJournal",
+    bill_list: list[Bill],
+    in_form: InFormatter,
+    input_str: str,
+    /,
+) -> None | str:
+    """To add the item of an input line to the current purchase and to record it.
+
+    Items which can't be journaled are rejected, thus the journal always
+    describes the open purchases.
+
+    Args:
+        journal: The optional journal of the open purchases.
+        bill_list: All purchases of the session, the last one is the current one.
+        in_form: The formatter used for analysing the input.
+        input_str: The input line.
+
+    Returns:
+        The description of the adding action or None if the input was not recognised.
+    """
+    p_item = in_form.analyse_input(input_str)
+    if not p_item[0] or p_item[1] is None:
+        return None
+    if journal is not None and not journal.can_record(p_item[1]):
+        return "the amount of the item is too large to be journaled"
+    last_id = bill_list[-1].last_id
+    added = bill_list[-1].add_item(p_item[1])
+    p_el = bill_list[-1].get_item(bill_list[-1].last_id)
+    if journal is not None and bill_list[-1].last_id != last_id and p_el is not None:
+        journal.add_item(len(bill_list), p_el)
+    return added
+
+
+def _journal_sync(journal: "None | BillJournal", bill_list: list[Bill], /) -> None:
+    """To persist the recorded changes and to take a snapshot if it is due.
+
+    Args:
+        journal: The optional journal of the open purchases.
+        bill_list: All purchases of the session.
+    """
+    if journal is None:
+        return
+    journal.commit()
+    if journal.snapshot_due:
+        journal.snapshot(dict(enumerate(bill_list, 1)))
+
+
+def start_register(
+    tax_file: None | Path,
+    /,
+    register_f: (
+        None | Callable[[], tuple[InFormatter, OutFormatter, TaxCalculator]]
+    ) = None,
+    journal: "None | BillJournal" = None,
+) -> None:
     """To start the software.
 
     Args:
         tax_file: The optional file containing the names of not-taxed items.
+        register_f: The optional source of the current register, e.g. of a
+            ``ConfigStore``. It is asked for every new purchase, thus a purchase
+            keeps its register even if the configuration is reloaded meanwhile.
+        journal: The optional journal of the open purchases. The purchases of
+            an interrupted session are recovered from it and every added item
+            is recorded until all purchases are concluded.
     """
-    in_form = InFormatter(DI_TERM, DI_BUY, decide_if_taxed(_read_tax_file(tax_file)))
+    in_form, out_form, tax_calc = (
+        create_register(tax_file) if register_f is None else register_f()
+    )
     print(str(in_form))
-    out_form = OutFormatter(DO_TOTAL, DO_SALES_T, DO_IMP)
     print(str(out_form))
-    tax_calc = TaxCalculator(0.05, 0.1)
     print(str(tax_calc))
     print("creating registry [finished]")
-    bill_list = [Bill(out_form, tax_calc)]
+    bill_list = (
+        [] if journal is None else list(journal.recover(out_form, tax_calc).values())
+    )
+    if bill_list:
+        print(f"recovered {len(bill_list)} purchases")
+    else:
+        bill_list.append(Bill(out_form, tax_calc))
+        if journal is not None:
+            journal.open_bill(len(bill_list))
     print("\nplease type in the desired item:")
     print(f"input {len(bill_list)} [start]")
     while in_form.is_not_term(input_str := input()):
         if in_form.is_not_bought(input_str):
-            p_item = in_form.analyse_input(input_str)
-            if p_item[0] and p_item[1] is not None:
-                print(bill_list[-1].add_item(p_item[1]))
-            else:
+            if (added := _journal_add(journal, bill_list, in_form, input_str)) is None:
                 print("input pattern was not recognised")
                 print(str(out_form))
+            else:
+                print(added)
         else:
             print(f"input {len(bill_list)} [finished]")
+            if register_f is not None:
+                in_form, out_form, tax_calc = register_f()
             bill_list.append(Bill(out_form, tax_calc))
+            if journal is not None:
+                journal.open_bill(len(bill_list))
             print(f"input {len(bill_list)} [start]")
+        _journal_sync(journal, bill_list)
     print("### OUTPUT [start]")
     for item_i, item_v in enumerate(bill_list, 1):
-        out_str = item_v.finish()
-        if out_str[0]:
-            print(f"output {item_i}:")
-            print(out_str[1])
+        item_v.write_to(sys.stdout, bill_id=item_i)
     print("### OUTPUT [finished]")
+    if journal is not None:
+        # all purchases are concluded, nothing has to be recovered anymore
+        journal.snapshot({})
@@ -0,0 +1,192 @@
+"""A module providing a multiprocess replay of transcripts."""
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import StringIO
+from pathlib import Path
+from typing import TextIO
+
+from cashier.purchase.container import MoneyBackend, ReplayStats
+from cashier.purchase.formatter import InFormatter, OutFormatter
+from cashier.purchase.tax_calculator import TaxCalculator
+from cashier.register import (
+    DI_BUY,
+    DI_TERM,
+    add_input,
+    create_register,
+    new_bill,
+    write_bill,
+)
+
+# the register of a worker process, created by its initializer
+_WORKER_REG: None | tuple[InFormatter, OutFormatter, TaxCalculator] = None
+_WORKER_MONEY: MoneyBackend = MoneyBackend.DECIMAL
+_WORKER_AGGREGATE: bool = False
+
+
+def _init_worker(
+    tax_file: None | Path,
+    money: MoneyBackend,
+    rule_file: None | Path,
+    region: None | str,
+    aggregate: bool,
+    out_format: str,
+    /,
+) -> None:
+    """To create the register of a worker process.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        money: The representation of prices and sales taxes.
+        rule_file: The optional TOML file with the tax rules of several regions.
+        region: The region of the tax rules, defaults to the one of the file.
+        aggregate: Whether equal items of a purchase are merged into one line.
+        out_format: The name of a registered output format of the receipts.
+    """
+    global _WORKER_REG, _WORKER_MONEY, _WORKER_AGGREGATE
+    _WORKER_REG = create_register(
+        tax_file, rule_file=rule_file, region=region, out_format=out_format
+    )
+    _WORKER_MONEY = money
+    _WORKER_AGGREGATE = aggregate
+
+
+def _price_bills(chunk: list[tuple[int, list[str]]], /) -> tuple[str, int]:
+    """To price a chunk of purchases in a worker process.
+
+    Args:
+        chunk: The number and the input lines of each purchase.
+
+    Returns:
+        The receipts of the chunk and the amount of not recognised lines.
+    """
+    if _WORKER_REG is None:
+        raise RuntimeError("The worker process was not initialised.")
+    in_form, out_form, tax_calc = _WORKER_REG
+    sink = StringIO()
+    invalid_cnt = 0
+    for bill_id, lines in chunk:
+        bill = new_bill(out_form, tax_calc, _WORKER_MONEY, aggregate=_WORKER_AGGREGATE)
+        for input_str in lines:
+            if add_input(bill, in_form, input_str) is None:
+                invalid_cnt += 1
+        write_bill(bill, bill_id, sink)
+    return sink.getvalue(), invalid_cnt
+
+
+def _split_bills(
+    source: Iterable[str], chunk_size: int, line_cnt: list[int], /
+) -> Iterator[list[tuple[int, list[str]]]]:
+    """To split a transcript into chunks of purchases.
+
+    Args:
+        source: The transcript, one input per line.
+        chunk_size: The amount of purchases per chunk.
+        line_cnt: A list whose first element receives the amount of read lines.
+
+    Yields:
+        The number and the input lines of each purchase in the chunk.
+    """
+    in_form = InFormatter(DI_TERM, DI_BUY, lambda _: True)
+    chunk: list[tuple[int, list[str]]] = []
+    lines: list[str] = []
+    bill_id = 1
+    for line_cnt[0], input_str in enumerate(source, 1):
+        if not in_form.is_not_term(input_str):
+            break
+        if in_form.is_not_bought(input_str):
+            lines.append(input_str)
+            continue
+        chunk.append((bill_id, lines))
+        lines, bill_id = [], bill_id + 1
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    chunk.append((bill_id, lines))
+    yield chunk
+
+
+def _write_chunk(
+    chunk: tuple[Future[tuple[str, int]], int], sink: TextIO, counts: list[int], /
+) -> None:
+    """To write the receipts of a priced chunk.
+
+    Args:
+        chunk: The pending result of the chunk and its amount of purchases.
+        sink: The writer receiving the receipts.
+        counts: The amount of read lines, purchases and not recognised lines,
+            the latter two are updated.
+    """
+    receipts, invalid = chunk[0].result()
+    sink.write(receipts)
+    counts[1] += chunk[1]
+    counts[2] += invalid
+
+
+def run_replay(
+    tax_file: None | Path,
+    source: TextIO,
+    sink: TextIO,
+    /,
+    workers: int = 2,
+    chunk_size: int = 64,
+    money: MoneyBackend = MoneyBackend.DECIMAL,
+    rule_file: None | Path = None,
+    region: None | str = None,
+    aggregate: bool = False,
+    out_format: str = "text",
+) -> ReplayStats:
+    """To replay a transcript on several processes.
+
+    The transcript is split into purchases, which are priced in chunks by a pool
+    of worker processes. The receipts are written in the original order and are
+    identical to the output of ``run_batch``. At most two chunks per worker are
+    pending at a time.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        source: The transcript, one input per line.
+        sink: The writer receiving the receipts.
+        workers: The amount of worker processes.
+        chunk_size: The amount of purchases sent to a worker at once.
+        money: The representation of prices and sales taxes.
+        rule_file: The optional TOML file with the tax rules of several regions.
+        region: The region of the tax rules, defaults to the one of the file.
+        aggregate: Whether equal items of a purchase are merged into one line,
+            not supported for integer cents.
+        out_format: The name of a registered output format of the receipts.
+            Output formats registered after the start of the workers are
+            not known to them.
+
+    Returns:
+        Statistics describing the run.
+
+    Raises:
+        ValueError: If purchases in integer cents should be aggregated.
+    """
+    if aggregate and money is MoneyBackend.CENTS:
+        raise ValueError("Purchases in integer cents can't be aggregated.")
+    start = time.perf_counter()
+    workers = max(workers, 1)
+    # amount of: read lines, bills, not recognised lines
+    counts = [0, 0, 0]
+    pending: deque[tuple[Future[tuple[str, int]], int]] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(tax_file, money, rule_file, region, aggregate, out_format),
+    ) as pool:
+        for chunk in _split_bills(source, max(chunk_size, 1), counts):
+            pending.append((pool.submit(_price_bills, chunk), len(chunk)))
+            while len(pending) > 2 * workers or (pending and pending[0][0].done()):
+                _write_chunk(pending.popleft(), sink, counts)
+        while pending:
+            _write_chunk(pending.popleft(), sink, counts)
+    sink.flush()
+    return ReplayStats(
+        lines=counts[0],
+        invalid=counts[2],
+        bills=counts[1],
+        seconds=time.perf_counter() - start,
+    )
@@ -0,0 +1,203 @@
+"""A module repricing item catalogs with candidate tax rates."""
+import itertools
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+from typing import Final, TextIO
+
+from cashier.purchase.cents import from_cents
+from cashier.purchase.container import RepriceReport, ScenarioResult
+from cashier.purchase.formatter import InFormatter
+from cashier.purchase.tax_calculator import TaxCalculator
+from cashier.register import create_register
+
+# default sales taxes of the baseline: imported, basic
+D_BASELINE: Final[tuple[float, float]] = (0.05, 0.1)
+# the input formatter and the calculators of a worker process, baseline first
+_WORKER_PRICING: None | tuple[InFormatter, list[TaxCalculator]] = None
+# net price in cents, sales taxes of each pair of rates in cents, invalid lines,
+# net price of the items with more than two decimal places
+_ChunkResult = tuple[int, list[int], int, Decimal]
+
+
+def _init_worker(tax_file: None | Path, rates: list[tuple[float, float]], /) -> None:
+    """To create the input formatter and the calculators of a worker process.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        rates: The import and basic sales taxes of the baseline and of each
+            scenario.
+    """
+    global _WORKER_PRICING
+    _WORKER_PRICING = (
+        create_register(tax_file)[0],
+        [TaxCalculator(import_t, basic_t) for import_t, basic_t in rates],
+    )
+
+
+def _price_chunk(lines: list[str], /) -> _ChunkResult:
+    """To price a chunk of catalog lines with every pair of tax rates.
+
+    The lines are parsed once into columns, which are then priced by each
+    calculator without analysing them again. Items whose prices have more
+    than two decimal places are priced exactly with ``Decimal`` instead.
+
+    Args:
+        lines: The catalog lines, one item per line.
+
+    Returns:
+        The net price of the chunk, its sales taxes for each pair of rates,
+        both in cents, the amount of not recognised lines and the net price
+        of the items with more than two decimal places.
+    """
+    if _WORKER_PRICING is None:
+        raise RuntimeError("The worker process was not initialised.")
+    in_form, tax_calcs = _WORKER_PRICING
+    prices: list[int] = []
+    cnts: list[int] = []
+    imported: list[bool] = []
+    taxed: list[bool] = []
+    exact_net = Decimal(0)
+    exact_taxes = [0] * len(tax_calcs)
+    invalid = 0
+    for input_str in lines:
+        c_item = in_form.analyse_input_cents(input_str)[1]
+        if c_item is not None:
+            prices.append(c_item.price)
+            cnts.append(c_item.cnt)
+            imported.append(c_item.imported)
+            taxed.append(c_item.taxed)
+            continue
+        p_item = in_form.analyse_input(input_str)[1]
+        if p_item is None:
+            invalid += 1
+            continue
+        exact_net += p_item.price * p_item.cnt
+        for calc_i, calc in enumerate(tax_calcs):
+            # sales taxes are rounded to the next 0.05, thus always whole cents
+            exact_taxes[calc_i] += int(calc.tax(p_item).scaleb(2))
+    return (
+        sum(price * cnt for price, cnt in zip(prices, cnts, strict=True)),
+        [
+            sum(calc.tax_many_cents(prices, cnts, imported, taxed)) + exact_tax
+            for calc, exact_tax in zip(tax_calcs, exact_taxes, strict=True)
+        ],
+        invalid,
+        exact_net,
+    )
+
+
+def _split_catalog(
+    source: Iterable[str], chunk_size: int, line_cnt: list[int], /
+) -> Iterator[list[str]]:
+    """To split a catalog into chunks of lines.
+
+    Args:
+        source: The catalog, one item per line.
+        chunk_size: The amount of lines per chunk.
+        line_cnt: A list whose first element receives the amount of read lines.
+
+    Yields:
+        The lines of the chunk.
+    """
+    lines_it = iter(source)
+    while chunk := list(itertools.islice(lines_it, chunk_size)):
+        line_cnt[0] += len(chunk)
+        yield chunk
+
+
+def _add_chunk(
+    future: Future[_ChunkResult], sums: list[int], exact_net: list[Decimal], /
+) -> None:
+    """To add the result of a priced chunk to the running sums.
+
+    Args:
+        future: The pending result of the chunk.
+        sums: The amount of not recognised lines, the net price and the sales
+            taxes of each pair of rates, all of them are updated.
+        exact_net: A list whose first element receives the net price of the
+            items with more than two decimal places.
+    """
+    net, taxes, invalid, chunk_exact = future.result()
+    sums[0] += invalid
+    sums[1] += net
+    for rate_i, tax_c in enumerate(taxes, 2):
+        sums[rate_i] += tax_c
+    exact_net[0] += chunk_exact
+
+
+def run_reprice(
+    tax_file: None | Path,
+    source: TextIO,
+    scenarios: Sequence[tuple[float, float]],
+    /,
+    baseline: tuple[float, float] = D_BASELINE,
+    workers: int = 2,
+    chunk_size: int = 4096,
+) -> RepriceReport:
+    """To price a catalog with several pairs of tax rates on several processes.
+
+    The catalog lists one item per line in the shape of the register input,
+    ``<cnt> <name> at <price>``, other lines are not recognised. Items are
+    priced in integer cents, the ones whose prices have more than two
+    decimal places exactly with ``Decimal``. The catalog is split into
+    chunks of lines, which are parsed once by a pool of worker processes and
+    priced with the baseline and every scenario. At most two chunks per worker are pending
+    at a time, thus the memory doesn't grow with the size of the catalog.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        source: The catalog, one item per line.
+        scenarios: The candidate import and basic sales taxes.
+        baseline: The current import and basic sales taxes.
+        workers: The amount of worker processes.
+        chunk_size: The amount of lines sent to a worker at once.
+
+    Returns:
+        The sales taxes and totals of the baseline and of each scenario.
+
+    Raises:
+        ValueError: If a tax rate is negative.
+    """
+    rates = [baseline, *scenarios]
+    if any(tax < 0 for pair in rates for tax in pair):
+        raise ValueError("Sales taxes can't be negative.")
+    start = time.perf_counter()
+    workers = max(workers, 1)
+    line_cnt = [0]
+    # not recognised lines, net price, sales taxes of each pair of rates
+    sums = [0] * (len(rates) + 2)
+    exact_net = [Decimal(0)]
+    pending: deque[Future[_ChunkResult]] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(tax_file, rates)
+    ) as pool:
+        for chunk in _split_catalog(source, max(chunk_size, 1), line_cnt):
+            pending.append(pool.submit(_price_chunk, chunk))
+            while len(pending) > 2 * workers or (pending and pending[0].done()):
+                _add_chunk(pending.popleft(), sums, exact_net)
+        while pending:
+            _add_chunk(pending.popleft(), sums, exact_net)
+    net, base_tax = from_cents(sums[1]) + exact_net[0], sums[2]
+    results = tuple(
+        ScenarioResult(
+            import_taxes=import_t,
+            basic_taxes=basic_t,
+            sales_taxes=from_cents(tax_c),
+            total=net + from_cents(tax_c),
+            tax_delta=from_cents(tax_c - base_tax),
+            # the prices are kept, thus the totals differ by the sales taxes
+            total_delta=from_cents(tax_c - base_tax),
+        )
+        for (import_t, basic_t), tax_c in zip(rates, sums[2:], strict=True)
+    )
+    return RepriceReport(
+        lines=line_cnt[0],
+        invalid=sums[0],
+        baseline=results[0],
+        scenarios=results[1:],
+        seconds=time.perf_counter() - start,
+    )
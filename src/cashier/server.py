@@ -0,0 +1,215 @@
+"""A module providing an asyncio server for concurrent checkout sessions."""
+import asyncio
+import contextlib
+import statistics
+import sys
+import time
+from io import StringIO
+from pathlib import Path
+from typing import final
+
+from cashier.config import ConfigStore
+from cashier.purchase.bill import Bill
+from cashier.purchase.container import LoadReport
+from cashier.purchase.formatter import InFormatter
+from cashier.register import DI_BUY, DI_TERM, write_bill
+
+
+@final
+class RegisterServer:
+    """Hosts concurrent checkout sessions over TCP or Unix sockets.
+
+    Every connection is a session with its own purchases. The lines follow
+    the protocol of ``start_register``: each line is answered with one line,
+    ``#`` starts the next purchase and ``##`` sends the receipts and closes
+    the connection. Every purchase is priced with the configuration which
+    was current when the purchase started.
+
+    Args:
+        tax_file: The optional file containing the names of not-taxed items.
+        buffer_limit: The size of the read buffer of each connection in bytes.
+        config_file: The optional TOML configuration file, which can be
+            reloaded while the server is running.
+        aggregate: Whether equal items of a purchase are merged into one line.
+    """
+
+    def __init__(
+        self,
+        tax_file: None | Path,
+        /,
+        buffer_limit: int = 1 << 16,
+        config_file: None | Path = None,
+        aggregate: bool = False,
+    ) -> None:
+        """To initialise the class."""
+        super().__init__()
+        self.__config: ConfigStore = ConfigStore(tax_file, config_file=config_file)
+        self.__buffer_limit: int = buffer_limit
+        self.__aggregate: bool = aggregate
+        self.__sessions: int = 0
+
+    @property
+    def sessions(self) -> int:
+        """The amount of open sessions."""
+        return self.__sessions
+
+    @property
+    def config(self) -> ConfigStore:
+        """The configuration of the register."""
+        return self.__config
+
+    def _new_bill(self) -> tuple[Bill, InFormatter]:
+        """To start a purchase with the current configuration.
+
+        Returns:
+            The empty purchase and the input formatter of its configuration.
+        """
+        in_form, out_form, tax_calc = self.__config.register()
+        return Bill(out_form, tax_calc, aggregate=self.__aggregate), in_form
+
+    def _answer(
+        self, bill_list: list[tuple[Bill, InFormatter]], input_str: str, /
+    ) -> str:
+        """To process one line of a session.
+
+        Args:
+            bill_list: The purchases of the session and their input formatters.
+            input_str: The input line.
+
+        Returns:
+            The answer for the input line.
+        """
+        bill, in_form = bill_list[-1]
+        if not in_form.is_not_bought(input_str):
+            bill_list.append(self._new_bill())
+            return f"input {len(bill_list) - 1} [finished]"
+        p_item = in_form.analyse_input(input_str)
+        if p_item[0] and p_item[1] is not None:
+            return bill.add_item(p_item[1])
+        return "input pattern was not recognised"
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, /
+    ) -> None:
+        """To run the session of a connection.
+
+        Args:
+            reader: The reader of the connection.
+            writer: The writer of the connection.
+        """
+        bill_list = [self._new_bill()]
+        self.__sessions += 1
+        try:
+            while line := await reader.readline():
+                input_str = line.decode()
+                if not bill_list[-1][1].is_not_term(input_str):
+                    break
+                writer.write(f"{self._answer(bill_list, input_str)}\n".encode())
+                await writer.drain()
+            sink = StringIO()
+            for bill_i, (bill, _) in enumerate(bill_list, 1):
+                write_bill(bill, bill_i, sink)
+            writer.write(sink.getvalue().encode())
+            await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as ex_n:
+            print(f"session aborted: {ex_n}", file=sys.stderr)
+        finally:
+            self.__sessions -= 1
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def serve_tcp(self, host: str, port: int, /) -> asyncio.Server:
+        """To start listening on a TCP socket.
+
+        Args:
+            host: The host name or address.
+            port: The port, zero selects a free one.
+
+        Returns:
+            The started server.
+        """
+        return await asyncio.start_server(
+            self._handle, host, port, limit=self.__buffer_limit
+        )
+
+    async def serve_unix(self, path: Path, /) -> asyncio.Server:
+        """To start listening on a Unix socket.
+
+        Args:
+            path: The path of the socket.
+
+        Returns:
+            The started server.
+        """
+        return await asyncio.start_unix_server(
+            self._handle, path, limit=self.__buffer_limit
+        )
+
+
+async def _load_session(
+    host: str, port: int, lines: list[str], latencies: list[float], /
+) -> bool:
+    """To run one checkout session against a server.
+
+    Args:
+        host: The host name or address of the server.
+        port: The port of the server.
+        lines: The input lines of the session, without the terminating line.
+        latencies: The list receiving the latency of each line in seconds.
+
+    Returns:
+        Whether the server sent receipts.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for input_str in lines:
+            start = time.perf_counter()
+            writer.write(f"{input_str}\n".encode())
+            await writer.drain()
+            await reader.readline()
+            latencies.append(time.perf_counter() - start)
+        writer.write(f"{DI_TERM}\n".encode())
+        await writer.drain()
+        return bool(await reader.read())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_load(
+    host: str, port: int, /, sessions: int = 100, lines: int = 100
+) -> LoadReport:
+    """To generate load with concurrent checkout sessions.
+
+    Args:
+        host: The host name or address of the server.
+        port: The port of the server.
+        sessions: The amount of concurrent sessions.
+        lines: The amount of input lines per session.
+
+    Returns:
+        The latencies measured by the clients.
+    """
+    session_lines = [
+        DI_BUY if line_i % 10 == 9 else f"{line_i % 3 + 1} item {line_i} at 1{line_i}.25"
+        for line_i in range(lines)
+    ]
+    latencies: list[float] = []
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(_load_session(host, port, session_lines, latencies) for _ in range(sessions))
+    )
+    seconds = time.perf_counter() - start
+    quantiles = (
+        statistics.quantiles(latencies, n=100, method="inclusive")
+        if len(latencies) > 1
+        else latencies * 99
+    )
+    return LoadReport(
+        sessions=sum(results),
+        lines=len(latencies),
+        p50=quantiles[49] if quantiles else 0.0,
+        p99=quantiles[98] if quantiles else 0.0,
+        seconds=seconds,
+    )
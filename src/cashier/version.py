@@ -1,5 +1,5 @@
 """Library version."""
-import pkg_resources
+from importlib import metadata
 
 
 def get_version() -> str:
@@ -8,4 +8,4 @@ def get_version() -> str:
     Returns:
         Global software version.
     """
-    return pkg_resources.get_distribution("cashier").version
+    return metadata.version("cashier")
@@ -0,0 +1,48 @@
+import functools
+import time
+import tracemalloc
+from decimal import Decimal
+
+import pytest
+
+from cashier.purchase.bill import Bill
+from cashier.purchase.columnar_bill import ColumnarBill
+from cashier.purchase.container import PurchasedItem
+
+pytest_plugins = (
+    "tests.unit.fixture.test_fix_formatter",
+    "tests.unit.fixture.test_fix_taxes",
+)
+
+
+@pytest.mark.parametrize(
+    "bill_f",
+    [Bill, ColumnarBill, functools.partial(Bill, aggregate=True)],
+    ids=["bill", "columnar", "aggregated"],
+)
+def test_bench_memory_per_item(request, tax_calc, out_formatter, bill_f):
+    names = [f"product {name_i}" for name_i in range(100)]
+    items = [
+        PurchasedItem(
+            imported=item_i % 3 == 0,
+            name=names[item_i % 100],
+            price=Decimal(item_i % 5_000 + 1) / 100,
+            cnt=1 + item_i % 4,
+            taxed=item_i % 2 == 0,
+        )
+        for item_i in range(50_000)
+    ]
+    tracemalloc.start()
+    bill = bill_f(out_formatter, tax_calc)
+    base = tracemalloc.get_traced_memory()[0]
+    for item in items:
+        bill.add_item(item)
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    start = time.perf_counter()
+    assert bill.finish()[0]
+    elapsed = time.perf_counter() - start
+    print(
+        f"\n{request.node.callspec.id}: {used / len(items):.1f} bytes per item,"
+        + f" {len(bill)} lines finished in {elapsed * 1_000:.1f}ms"
+    )
@@ -0,0 +1,20 @@
+import random
+
+from cashier.purchase.exemption import ExemptionMatcher
+
+
+def test_bench_exemption_matcher():
+    rnd = random.Random(0)  # noqa: S311
+    words = [f"w{word_i}" for word_i in range(5_000)]
+    phrases = [
+        " ".join(rnd.choices(words, k=rnd.randint(1, 3))) for _ in range(50_000)
+    ]
+    matcher = ExemptionMatcher(phrases)
+    names = [" ".join(rnd.choices(words, k=rnd.randint(2, 6))) for _ in range(20_000)]
+    names.extend(f"box of {phrase}" for phrase in phrases[:1_000])
+    latency = matcher.lookup_latency(names)
+    assert not any(matcher.is_taxed(name) for name in names[-1_000:])
+    print(
+        f"\n{len(matcher)} phrases: build {matcher.build_time * 1_000:.1f} ms,"
+        + f" lookup {latency * 1e6:.2f} us"
+    )
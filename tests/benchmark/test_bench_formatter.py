@@ -0,0 +1,82 @@
+import time
+from decimal import Decimal
+
+import pytest
+
+from cashier.purchase.container import PItemContainer, PurchasedItem
+from cashier.purchase.formatter import OutFormatter
+from cashier.register import DO_IMP, DO_SALES_T, DO_TOTAL, create_register
+
+pytest_plugins = ("tests.unit.fixture.test_fix_formatter",)
+
+
+@pytest.fixture()
+def bench_lines() -> list[str]:
+    return [
+        f"{1 + line_i % 3} {'imported ' if line_i % 4 == 0 else ''}box of item_{line_i}"
+        + f" at {line_i % 100}.{line_i % 89:02d}"
+        for line_i in range(20_000)
+    ]
+
+
+def test_bench_parser(in_formatter, bench_lines):
+    start = time.perf_counter()
+    regex_res = [in_formatter._analyse_regex(line.strip()) for line in bench_lines]
+    regex_time = time.perf_counter() - start
+    start = time.perf_counter()
+    fast_res = [in_formatter.analyse_input(line) for line in bench_lines]
+    fast_time = time.perf_counter() - start
+    assert fast_res == regex_res
+    assert all(res[0] for res in fast_res)
+    print(
+        f"\nregex: {len(bench_lines) / regex_time:.0f} lines/s,"
+        + f" fast path: {len(bench_lines) / fast_time:.0f} lines/s,"
+        + f" speedup: {regex_time / fast_time:.2f}x"
+    )
+
+
+def test_bench_products():
+    lines = [
+        f"{1 + line_i % 3} {'imported ' if line_i % 4 == 0 else ''}"
+        + f"box of {'chocolates' if line_i % 5 == 0 else 'item'} {line_i % 100}"
+        + f" at {line_i % 100}.{line_i % 89:02d}"
+        for line_i in range(50_000)
+    ]
+    in_form = create_register(None)[0]
+    start = time.perf_counter()
+    items = [in_form.analyse_input(line)[1] for line in lines]
+    parse_time = time.perf_counter() - start
+    names = {id(item.name) for item in items if item is not None}
+    # every product is analysed once and its name is shared by all items
+    assert len(names) == len(in_form.products) == 100
+    print(f"\ninterned: {len(lines) / parse_time:.0f} lines/s, {len(names)} names")
+
+
+@pytest.mark.parametrize("out_format", ["text", "jsonl", "csv", "fixed"])
+def test_bench_out_formats(out_format):
+    out_form = OutFormatter(DO_TOTAL, DO_SALES_T, DO_IMP, out_format=out_format)
+    p_elems = [
+        PItemContainer(
+            id=item_i,
+            item=PurchasedItem(
+                imported=item_i % 4 == 0,
+                name=f"box of item_{item_i}",
+                price=Decimal(item_i % 5_000) / 100 + 1,
+                cnt=1 + item_i % 3,
+                taxed=item_i % 2 == 0,
+            ),
+            sales_taxes=Decimal(item_i % 50) / 100,
+        )
+        for item_i in range(50_000)
+    ]
+    start = time.perf_counter()
+    single = [out_form.out_list_item(p_el) for p_el in p_elems]
+    single_time = time.perf_counter() - start
+    start = time.perf_counter()
+    bulk = out_form.out_list_items(p_elems)
+    bulk_time = time.perf_counter() - start
+    assert bulk == single
+    print(
+        f"\n{out_format}: {len(p_elems) / single_time:.0f} lines/s,"
+        + f" bulk: {len(p_elems) / bulk_time:.0f} lines/s"
+    )
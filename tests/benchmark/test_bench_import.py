@@ -0,0 +1,63 @@
+import subprocess
+import sys
+
+import pytest
+
+# cumulative import time of the entry point in microseconds
+_BUDGET_US = 50_000
+# modules which only specific modes need
+_LAZY = ("numpy", "asyncio", "pkg_resources", "cashier.server", "cashier.config")
+
+
+def _import_times(code: str) -> dict[str, int]:
+    proc = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.removeprefix("import time:").split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_bench_import_main():
+    times = _import_times("import cashier.main")
+    print(f"\nimport cashier.main: {times['cashier.main'] / 1_000:.1f} ms")
+    assert times["cashier.main"] < _BUDGET_US
+    assert not [name for name in times if name.startswith(_LAZY)]
+    assert not [name for name in times if name.startswith("cashier.purchase")]
+
+
+@pytest.mark.parametrize(
+    ("argv", "loaded", "unloaded"),
+    [
+        (["--version"], set(), ("cashier.register", "cashier.purchase")),
+        (
+            ["--batch", "-"],
+            {"cashier.register"},
+            (
+                "tomllib",
+                "mmap",
+                "cashier.purchase.tax_rules",
+                "cashier.purchase.exemption_index",
+                "cashier.purchase.columnar_bill",
+            ),
+        ),
+    ],
+)
+def test_bench_import_modes(argv, loaded, unloaded):
+    code = (
+        "import sys\n"
+        + f"sys.argv = ['cashier', *{argv!r}]\n"
+        + "sys.stdin = __import__('io').StringIO('1 book at 1.00\\n')\n"
+        + "from cashier.main import main\n"
+        + "main()\n"
+    )
+    times = _import_times(code)
+    assert loaded <= set(times)
+    assert not [name for name in times if name.startswith((*_LAZY, *unloaded))]
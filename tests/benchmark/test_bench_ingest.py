@@ -0,0 +1,42 @@
+import os
+import time
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+
+from cashier.bench import generate_transcript
+from cashier.ingest import run_ingest
+from cashier.purchase.container import MoneyBackend
+from cashier.register import run_batch
+
+
+def test_bench_ingest(tmp_path):
+    transcript = tmp_path / "transcript.txt"
+    transcript.write_text("\n".join(generate_transcript(50_000, seed=29)) + "\n")
+    for money in MoneyBackend:
+        start = time.perf_counter()
+        with transcript.open() as fh_r:
+            run_batch(None, fh_r, StringIO(), money=money)
+        text_time = time.perf_counter() - start
+        start = time.perf_counter()
+        run_ingest(None, transcript, StringIO(), money=money)
+        mmap_time = time.perf_counter() - start
+        print(
+            f"\n{money}: text {50_000 / text_time:.0f} lines/s,"
+            + f" mmap {50_000 / mmap_time:.0f} lines/s"
+        )
+
+
+def test_bench_ingest_memory(tmp_path):
+    peaks = []
+    for items in (10_000, 100_000):
+        transcript = tmp_path / f"transcript_{items}.txt"
+        transcript.write_text("\n".join(generate_transcript(items, seed=31)) + "\n")
+        with Path(os.devnull).open("w") as sink:
+            tracemalloc.start()
+            run_ingest(None, transcript, sink, money=MoneyBackend.CENTS)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    # the largest purchase dominates, not the size of the file
+    assert peaks[1] < 2 * peaks[0]
+    print(f"\npeak: {peaks[0] / 1024:.0f} KiB, {peaks[1] / 1024:.0f} KiB")
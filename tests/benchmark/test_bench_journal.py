@@ -0,0 +1,67 @@
+import gc
+import time
+from decimal import Decimal
+
+from cashier.journal import BillJournal
+from cashier.purchase.bill import Bill
+from cashier.purchase.container import PItemContainer, PurchasedItem
+
+pytest_plugins = (
+    "tests.unit.fixture.test_fix_formatter",
+    "tests.unit.fixture.test_fix_taxes",
+)
+
+_BILLS = 1_000
+_ITEMS = 1_000
+_TAIL = 100_000
+
+
+_NAMES = [f"product {name_i}" for name_i in range(100)]
+_PRICES = [Decimal(price_i + 1) / 100 for price_i in range(5_000)]
+_TAXES = [Decimal(tax_i) / 20 for tax_i in range(20)]
+
+
+def _item(item_i: int) -> PItemContainer:
+    return PItemContainer(
+        id=item_i // _BILLS + 1,
+        item=PurchasedItem(
+            imported=item_i % 3 == 0,
+            name=_NAMES[item_i % 100],
+            price=_PRICES[item_i % 5_000],
+            cnt=1 + item_i % 4,
+            taxed=item_i % 2 == 0,
+        ),
+        sales_taxes=_TAXES[item_i % 20],
+    )
+
+
+def test_bench_journal_recover(tmp_path, out_formatter, tax_calc):
+    # open purchases of a session which never concluded one, like the register,
+    # a snapshot is due every 100_000 records
+    items = [_item(item_i) for item_i in range(_BILLS * _ITEMS)]
+    bills = {bill_id: Bill(out_formatter, tax_calc) for bill_id in range(1, _BILLS + 1)}
+    for bill_id, bill in bills.items():
+        bill.restore(items[bill_id - 1 :: _BILLS][: _ITEMS - _TAIL // _BILLS], 0)
+    journal = BillJournal(tmp_path, group_size=4_096, sync_interval=60)
+    journal.recover(out_formatter, tax_calc)
+    journal.snapshot(bills)
+    for item_i in range((_ITEMS - _TAIL // _BILLS) * _BILLS, len(items)):
+        journal.add_item(item_i % _BILLS + 1, items[item_i])
+    journal.close()
+    item_cnt = len(items)
+    # a recovering register starts without the purchases in memory
+    del items, bills
+    gc.collect()
+    start = time.perf_counter()
+    recovered = BillJournal(tmp_path).recover(out_formatter, tax_calc)
+    elapsed = time.perf_counter() - start
+    touched = recovered[_BILLS].last_id
+    touch_elapsed = time.perf_counter() - start - elapsed
+    print(
+        f"\n{item_cnt} items in {len(recovered)} purchases recovered in"
+        + f" {elapsed * 1_000:.1f}ms, first purchase used after"
+        + f" {touch_elapsed * 1_000:.1f}ms"
+    )
+    assert len(recovered) == _BILLS
+    assert touched == _ITEMS
+    assert elapsed < 0.5
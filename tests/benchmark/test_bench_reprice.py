@@ -0,0 +1,20 @@
+import time
+from io import StringIO
+
+from cashier.bench import generate_transcript
+from cashier.reprice import run_reprice
+
+
+def test_bench_reprice():
+    catalog = "\n".join(
+        line for line in generate_transcript(100_000, seed=37) if line[0].isdigit()
+    )
+    times = []
+    for scenarios in ([(0.05, 0.12)], [(0.05, 0.12), (0.1, 0.1), (0.0, 0.2), (0.1, 0.2)]):
+        start = time.perf_counter()
+        report = run_reprice(None, StringIO(catalog), scenarios, workers=2)
+        times.append(time.perf_counter() - start)
+        assert report.invalid == 0
+        print(f"\n{len(scenarios)} scenarios: {report.lines / times[-1]:.0f} lines/s")
+    # every line is parsed once, thus further scenarios add little
+    assert times[1] < 2 * times[0]
@@ -0,0 +1,76 @@
+import decimal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from cashier.purchase.container import PurchasedItem
+from cashier.purchase.tax_calculator import TaxCalculator
+from cashier.purchase.tax_rules import TaxRuleTable
+
+pytest_plugins = ("tests.unit.fixture.test_fix_taxes",)
+
+
+@pytest.fixture()
+def bench_items() -> list[PurchasedItem]:
+    return [
+        PurchasedItem(
+            imported=item_i % 3 == 0,
+            name=f"item_{item_i}",
+            price=Decimal(item_i % 5_000) / 100 + 1,
+            cnt=1 + item_i % 4,
+            taxed=item_i % 2 == 0,
+        )
+        for item_i in range(20_000)
+    ]
+
+
+def _tax_chunk(
+    tax_calc: TaxCalculator, items: list[PurchasedItem]
+) -> tuple[list[Decimal], str]:
+    decimal.getcontext().rounding = decimal.ROUND_CEILING
+    taxes = [tax_calc.tax(item) for item in items]
+    return taxes, decimal.getcontext().rounding
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4, 8])
+def test_bench_threaded_tax(tax_calc, bench_items, workers):
+    expected = [tax_calc.tax(item) for item in bench_items]
+    chunk = -(-len(bench_items) // workers)
+    chunks = [bench_items[pos : pos + chunk] for pos in range(0, len(bench_items), chunk)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda items: _tax_chunk(tax_calc, items), chunks))
+    elapsed = time.perf_counter() - start
+    assert [tax for res in results for tax in res[0]] == expected
+    assert all(res[1] == decimal.ROUND_CEILING for res in results)
+    print(f"\n{workers} thread(s): {len(bench_items) / elapsed:.0f} items/s")
+
+
+def test_bench_rule_table(tmp_path, bench_items):
+    rule_file = tmp_path / "rules.toml"
+    rule_file.write_text(
+        'region = "home"\n'
+        + '[[rules]]\nregion = "home"\ncategory = "basic"\nlevies = [0.1]\n'
+        + '[[rules]]\nregion = "home"\ncategory = "basic"\nimported = true\n'
+        + "levies = [0.1, 0.05]\n"
+        + '[[rules]]\nregion = "home"\ncategory = "exempt"\nimported = true\n'
+        + "levies = [0.05]\n"
+    )
+    columns = (
+        [int(item.price * 100) for item in bench_items],
+        [item.cnt for item in bench_items],
+        [item.imported for item in bench_items],
+        [item.taxed for item in bench_items],
+    )
+    results = []
+    for label, tax_calc in (
+        ("two rates", TaxCalculator(0.05, 0.1)),
+        ("rule table", TaxCalculator(0, 0, rules=TaxRuleTable(rule_file))),
+    ):
+        start = time.perf_counter()
+        results.append(tax_calc.tax_many_cents(*columns))
+        elapsed = time.perf_counter() - start
+        print(f"\n{label}: {len(bench_items) / elapsed:.0f} items/s")
+    assert results[0] == results[1]
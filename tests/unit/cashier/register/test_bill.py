@@ -1,4 +1,5 @@
 from decimal import Decimal
+from io import StringIO
 
 import pytest
 
@@ -87,3 +88,95 @@ class TestBill:
 
     def test_finish(self, fin_container):
         assert "".join(fin_container[0].finish()[1]) == fin_container[1]
+
+    def test_subtotal(self, bill):
+        assert bill.subtotal() == (Decimal("0"), Decimal("0"))
+        prices = ("12.49", "0.125", "14.99", "0.0001", "3")
+        for price in prices:
+            bill.add_item(
+                PurchasedItem(
+                    imported=True, name="i", price=Decimal(price), cnt=2, taxed=True
+                )
+            )
+        for rem_id, exp_out in ((4, ("9.20", "70.410")), (2, ("9.15", "70.11"))):
+            assert bill.rem_item(rem_id)
+            assert tuple(str(val) for val in bill.subtotal()) == exp_out
+        fin_out = bill.finish()[1].split("\n")
+        assert fin_out[-2:] == ["Sales Taxes: 9.15", "Total: 70.11"]
+        for rem_id in (1, 3, 5):
+            assert bill.rem_item(rem_id)
+        assert bill.subtotal() == (Decimal("0"), Decimal("0"))
+
+    def test_write_to(self, tax_calc, out_formatter, fin_container):
+        sink = StringIO()
+        assert Bill(out_formatter, tax_calc).write_to(sink) is False
+        assert not sink.getvalue()
+        assert fin_container[0].write_to(sink) is True
+        assert sink.getvalue() == f"{fin_container[1]}\n"
+        assert len(fin_container[0]) == 3
+
+    def test_restore(self, bill, fin_container):
+        old_bill = fin_container[0]
+        old_bill.rem_item(3)
+        restored = iter(list(old_bill.items()))
+        bill.restore(restored, old_bill.last_id)
+        assert next(restored, None) is not None
+        bill.restore(old_bill.items(), old_bill.last_id)
+        assert bill.subtotal() == old_bill.subtotal()
+        assert bill.finish() == old_bill.finish()
+        assert bill.last_id == 3
+        assert bill.get_item(2) is old_bill.get_item(2)
+        assert bill.get_item(3) is None
+
+    def test_aggregate(self, tax_calc, out_formatter):
+        bill = Bill(out_formatter, tax_calc, aggregate=True)
+        plain = Bill(out_formatter, tax_calc)
+        assert bill.aggregate
+        assert not plain.aggregate
+        scans = [
+            PurchasedItem(
+                imported=imp, name=name, price=Decimal(price), cnt=cnt, taxed=True
+            )
+            for imp, name, price, cnt in (
+                (False, "bar", "0.85", 1),
+                (True, "bar", "0.85", 1),
+                (False, "bar", "0.85", 1),
+                (False, "bar", "0.850", 1),
+                (False, "pen", "0.125", 1),
+                (False, "bar", "0.90", 1),
+            )
+        ]
+        for scan in scans:
+            assert bill.add_item(scan) == plain.add_item(scan)
+        assert (len(bill), len(plain), bill.last_id) == (4, 6, 6)
+        # the taxes are rounded once for the merged amount
+        assert bill.get_item(3) is bill.get_item(1)
+        assert bill.get_item(1).item.cnt == 3
+        assert bill.get_item(1).sales_taxes == Decimal("0.25")
+        assert bill.subtotal()[0] == plain.subtotal()[0] - Decimal("0.05")
+        assert bill.finish()[1].split("\n")[:2] == ["3 bar: 1.10", "1 imported bar: 1.00"]
+        assert bill.rem_item(3)
+        assert not bill.rem_item(3)
+        assert not bill.rem_item(7)
+        assert bill.get_item(1).item.cnt == 2
+        assert bill.rem_item(1)
+        assert bill.rem_item(5)
+        assert bill.subtotal() == (Decimal("0.35"), Decimal("2.95"))
+        assert bill.rem_item(4)
+        assert bill.get_item(4) is None
+        assert bill.add_item(scans[0]) == "added item (id: 7) successfully"
+        assert bill.get_item(7).id == 7
+        for rem_id in (2, 6, 7):
+            assert bill.rem_item(rem_id)
+        assert bill.subtotal() == (Decimal("0"), Decimal("0"))
+
+    def test_aggregate_restore(self, tax_calc, out_formatter, fin_container):
+        bill = Bill(out_formatter, tax_calc, aggregate=True)
+        bill.restore(fin_container[0].items(), fin_container[0].last_id)
+        assert bill.finish() == fin_container[0].finish()
+        bill.add_item(next(fin_container[0].items()).item)
+        assert len(bill) == 3
+        assert bill.subtotal() == (Decimal("1.50"), Decimal("42.32"))
+        assert bill.rem_item(4)
+        assert bill.rem_item(1)
+        assert len(bill) == 2
@@ -0,0 +1,90 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+
+from cashier.purchase.bill import Bill
+from cashier.purchase.columnar_bill import _I64_MSG, ColumnarBill
+from cashier.purchase.container import CentsItem, PurchasedItem
+
+pytest_plugins = (
+    "tests.unit.fixture.test_fix_formatter",
+    "tests.unit.fixture.test_fix_taxes",
+)
+
+_ITEM = PurchasedItem(imported=False, name="i", price=Decimal("1.00"), cnt=1, taxed=True)
+
+
+@pytest.fixture()
+def items() -> list[PurchasedItem]:
+    return [
+        PurchasedItem(
+            imported=item_i % 3 == 0,
+            name=f"item {item_i % 4}",
+            price=Decimal(f"{item_i}.{item_i % 7}5"),
+            cnt=item_i % 3 + 1,
+            taxed=item_i % 2 == 0,
+        )
+        for item_i in range(1, 30)
+    ]
+
+
+class TestColumnarBill:
+    def test_same_as_bill(self, tax_calc, out_formatter, items):
+        bill = Bill(out_formatter, tax_calc)
+        col_bill = ColumnarBill(out_formatter, tax_calc)
+        assert col_bill.finish() == (False, "")
+        for item in items:
+            assert col_bill.add_item(item) == bill.add_item(item)
+        for item_id in (3, 3, 7, 40, 0, 29):
+            assert col_bill.rem_item(item_id) == bill.rem_item(item_id)
+        assert col_bill.subtotal() == bill.subtotal()
+        assert col_bill.finish() == bill.finish()
+        assert len(col_bill) == len(items) - 3
+        assert col_bill.nbytes() > 0
+        sink = StringIO()
+        assert col_bill.write_to(sink)
+        assert sink.getvalue() == f"{bill.finish()[1]}\n"
+
+    def test_add_cents_item(self, tax_calc, out_formatter, items):
+        bill = ColumnarBill(out_formatter, tax_calc)
+        cents_bill = ColumnarBill(out_formatter, tax_calc)
+        for item in items:
+            c_item = CentsItem(
+                imported=item.imported,
+                name=item.name,
+                price=int(item.price * 100),
+                cnt=item.cnt,
+                taxed=item.taxed,
+            )
+            assert cents_bill.add_cents_item(c_item) == bill.add_item(item)
+        assert cents_bill.finish() == bill.finish()
+        c_item = CentsItem(imported=False, name="i", price=0, cnt=1, taxed=True)
+        assert cents_bill.add_cents_item(c_item) == "the item price can't be negative"
+        c_item = CentsItem(imported=False, name="i", price=10**22, cnt=1, taxed=True)
+        assert cents_bill.add_cents_item(c_item) == _I64_MSG
+        assert cents_bill.finish() == bill.finish()
+
+    def test_add_invalid(self, tax_calc, out_formatter):
+        col_bill = ColumnarBill(out_formatter, tax_calc)
+        for price, msg in (
+            ("-1", "the item price can't be negative"),
+            ("1.005", "the item price can't have more than two decimal places"),
+        ):
+            item = PurchasedItem(
+                imported=False, name="i", price=Decimal(price), cnt=1, taxed=True
+            )
+            assert col_bill.add_item(item) == msg
+        col_bill._ColumnarBill__max_id = 0
+        assert col_bill.add_item(item) == "the amount of items [0] reached max. value (0)"
+        assert col_bill.subtotal() == (Decimal("0"), Decimal("0"))
+
+    def test_add_int64(self, tax_calc, out_formatter):
+        col_bill = ColumnarBill(out_formatter, tax_calc)
+        for cnt, price in ((1, "99999999999999999999.00"), (2**63, "1.00")):
+            item = PurchasedItem(
+                imported=False, name="i", price=Decimal(price), cnt=cnt, taxed=True
+            )
+            assert col_bill.add_item(item) == _I64_MSG
+        assert col_bill.add_item(_ITEM) == "added item (id: 1) successfully"
+        assert col_bill.finish() == (True, "1 i: 1.10\nSales Taxes: 0.10\nTotal: 1.10")
@@ -0,0 +1,39 @@
+import pytest
+
+from cashier.purchase.exemption import ExemptionMatcher
+
+
+@pytest.fixture()
+def matcher() -> ExemptionMatcher:
+    return ExemptionMatcher(
+        ["book", "headache pills", "box of chocolates", "of chocolate bars", "", "book"]
+    )
+
+
+@pytest.fixture()
+def match_behavior() -> list[tuple[str, bool]]:
+    return [
+        ("book", False),
+        ("old book", False),
+        ("bookcase", True),
+        ("packet of headache pills", False),
+        ("headache", True),
+        ("pills", True),
+        ("imported box of chocolates", False),
+        ("box of chocolate bars", False),
+        ("box of cookies", True),
+        ("", True),
+    ]
+
+
+class TestExemptionMatcher:
+    def test_is_taxed(self, matcher, match_behavior):
+        for name_i, taxed_i in match_behavior:
+            assert matcher.is_taxed(name_i) is taxed_i
+
+    def test_stats(self, matcher, match_behavior):
+        assert len(matcher) == 4
+        assert matcher.build_time >= 0
+        assert matcher.lookup_latency([name_i for name_i, _ in match_behavior]) > 0
+        assert matcher.lookup_latency([]) == 0
+        assert isinstance(str(matcher), str)
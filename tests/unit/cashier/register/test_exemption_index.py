@@ -0,0 +1,103 @@
+import random
+from io import StringIO
+
+import pytest
+
+from cashier.purchase.exemption import ExemptionMatcher
+from cashier.purchase.exemption_index import ExemptionIndex, compile_index, is_index
+from cashier.register import create_register, run_batch
+from cashier.replay import run_replay
+
+_PHRASES = [
+    "book",
+    "headache  pills",
+    "box of chocolates",
+    "of chocolate bars",
+    "",
+    "book",
+]
+
+
+@pytest.fixture()
+def index(tmp_path) -> ExemptionIndex:
+    index_file = tmp_path / "exempt.idx"
+    assert compile_index(_PHRASES, index_file) == 4
+    return ExemptionIndex(index_file)
+
+
+@pytest.fixture()
+def match_behavior() -> list[tuple[str, bool]]:
+    return [
+        ("book", False),
+        ("old book", False),
+        ("bookcase", True),
+        ("packet of headache pills", False),
+        ("headache", True),
+        ("pills", True),
+        ("imported box of chocolates", False),
+        ("box of chocolate bars", False),
+        ("box of cookies", True),
+        ("", True),
+    ]
+
+
+class TestExemptionIndex:
+    def test_is_taxed(self, index, match_behavior):
+        for name_i, taxed_i in match_behavior:
+            assert index.is_taxed(name_i) is taxed_i
+        assert "headache pills" in index
+        assert "headache" not in index
+        assert len(index) == 4
+        assert isinstance(str(index), str)
+        index.close()
+
+    def test_same_as_matcher(self, tmp_path):
+        rnd = random.Random(15)  # noqa: S311
+        words = [f"w{word_i}" for word_i in range(200)]
+        phrases = [
+            " ".join(rnd.choice(words) for _ in range(rnd.randint(1, 3)))
+            for _ in range(500)
+        ]
+        compile_index(phrases, tmp_path / "exempt.idx")
+        index = ExemptionIndex(tmp_path / "exempt.idx")
+        matcher = ExemptionMatcher(phrases)
+        for _ in range(2_000):
+            name = " ".join(rnd.choice(words) for _ in range(rnd.randint(0, 5)))
+            assert index.is_taxed(name) is matcher.is_taxed(name)
+
+    def test_invalid_file(self, tmp_path):
+        text_file = tmp_path / "exempt.txt"
+        text_file.write_text("book\nchocolate bars\n")
+        assert not is_index(text_file)
+        assert not is_index(tmp_path / "missing")
+        with pytest.raises(ValueError, match="not an exemption index"):
+            ExemptionIndex(text_file)
+        (tmp_path / "empty").write_bytes(b"")
+        with pytest.raises(ValueError, match="not an exemption index"):
+            ExemptionIndex(tmp_path / "empty")
+
+    def test_register(self, tmp_path):
+        text_file, index_file = tmp_path / "exempt.txt", tmp_path / "exempt.idx"
+        text_file.write_text("\n".join(_PHRASES))
+        compile_index(_PHRASES, index_file)
+        assert is_index(index_file)
+        assert not create_register(index_file)[0].analyse_input("1 book at 1")[1].taxed
+        transcript = "1 book at 1.00\n1 box at 2.00\n#\n1 headache pills at 3.00\n##\n"
+        outputs = []
+        for tax_file in (text_file, index_file):
+            sink = StringIO()
+            run_batch(tax_file, StringIO(transcript), sink)
+            outputs.append(sink.getvalue())
+        sink = StringIO()
+        run_replay(index_file, StringIO(transcript), sink, chunk_size=1)
+        outputs.append(sink.getvalue())
+        assert outputs[0] == outputs[1] == outputs[2]
+
+    def test_register_empty(self, tmp_path):
+        text_file, index_file = tmp_path / "exempt.txt", tmp_path / "exempt.idx"
+        text_file.write_text("\n \n")
+        compile_index(["", " "], index_file)
+        for tax_file in (text_file, index_file):
+            in_form = create_register(tax_file)[0]
+            assert not in_form.analyse_input("1 book at 1.00")[1].taxed
+            assert in_form.analyse_input("1 box at 1.00")[1].taxed
@@ -1,8 +1,17 @@
+import csv
+import json
+import random
 from decimal import Decimal
 
 import pytest
 
-from cashier.purchase.container import PItemContainer, PurchasedItem
+from cashier.purchase.container import CentsItem, PItemContainer, PurchasedItem
+from cashier.purchase.formatter import (
+    OutFormatter,
+    OutLayout,
+    out_formats,
+    register_layout,
+)
 from cashier.register import DI_BUY, DI_TERM, DO_IMP, DO_SALES_T, DO_TOTAL
 
 pytest_plugins = ("tests.unit.fixture.test_fix_formatter",)
@@ -51,8 +60,96 @@ class TestOutFormatter:
                 == out_i[2]
             )
 
+    def test_cents(self, out_formatter, out_p_item_list):
+        assert out_formatter.out_sales_taxes_cents(-5) == f"{DO_SALES_T}: -0.05"
+        assert out_formatter.out_total_cents(123456) == f"{DO_TOTAL}: 1234.56"
+        for p_item, s_tax, out_str in out_p_item_list:
+            c_item = CentsItem(
+                imported=p_item.imported,
+                name=p_item.name,
+                price=int(p_item.price * 100),
+                cnt=p_item.cnt,
+                taxed=p_item.taxed,
+            )
+            assert out_formatter.out_list_item_cents(c_item, int(s_tax * 100)) == out_str
+
     def test_str(self, out_formatter):
         assert isinstance(str(out_formatter), str)
+        assert "layout: csv" in str(OutFormatter("a", "b", "c", out_format="csv"))
+
+    def test_list_items(self, out_formatter, out_p_item_list):
+        p_elems = [
+            PItemContainer(id=0, item=p_item, sales_taxes=s_tax)
+            for p_item, s_tax, _ in out_p_item_list
+        ]
+        assert out_formatter.out_list_items(p_elems) == [
+            out_str for *_, out_str in out_p_item_list
+        ]
+        assert out_formatter.out_header(3) == "output 3:"
+        assert out_formatter.out_format == "text"
+
+    def test_formats(self):
+        assert out_formats()[:4] == ["text", "jsonl", "csv", "fixed"]
+        p_item = PurchasedItem(
+            imported=True, name='box, "big"', price=Decimal("2.45"), cnt=2, taxed=True
+        )
+        p_elem = PItemContainer(id=0, item=p_item, sales_taxes=Decimal("1.00"))
+        c_item = CentsItem(imported=True, name=p_item.name, price=245, cnt=2, taxed=True)
+        outs = {}
+        for out_format in ("jsonl", "csv", "fixed"):
+            out_form = OutFormatter(
+                "To{tal}", "Sales, Taxes", "imp", out_format=out_format
+            )
+            outs[out_format] = [
+                out_form.out_header(1),
+                *out_form.out_list_items([p_elem, p_elem]),
+                out_form.out_sales_taxes(Decimal("1.00")),
+                out_form.out_total(Decimal("3.45")),
+            ]
+            assert outs[out_format][1] == out_form.out_list_item(p_elem)
+            assert outs[out_format][1] == out_form.out_list_item_cents(c_item, 100)
+            assert outs[out_format][3:] == [
+                out_form.out_sales_taxes_cents(100),
+                out_form.out_total_cents(345),
+            ]
+        assert [json.loads(line) for line in outs["jsonl"][1:]] == [
+            {"cnt": 2, "imported": True, "name": 'box, "big"', "price": "3.45"},
+            {"cnt": 2, "imported": True, "name": 'box, "big"', "price": "3.45"},
+            {"label": "Sales, Taxes", "sales_taxes": "1.00"},
+            {"label": "To{tal}", "total": "3.45"},
+        ]
+        assert json.loads(outs["jsonl"][0]) == {"output": 1}
+        assert list(csv.reader(outs["csv"])) == [
+            ["", "", "output 1", ""],
+            ["2", "imp", 'box, "big"', "3.45"],
+            ["2", "imp", 'box, "big"', "3.45"],
+            ["", "", "Sales, Taxes", "1.00"],
+            ["", "", "To{tal}", "3.45"],
+        ]
+        assert {len(line) for line in outs["fixed"][1:]} == {71}
+        assert outs["fixed"][1].split() == ["2", "imp", "box,", '"big"', "3.45"]
+        assert outs["fixed"][-1].split() == ["To{tal}", "3.45"]
+
+    def test_register_layout(self):
+        with pytest.raises(ValueError, match="tsv"):
+            OutFormatter("a", "b", "c", out_format="tsv")
+        register_layout(
+            "tsv",
+            OutLayout(
+                header="#{0}",
+                item="{0}\t{mark}\t{1}\t{2}",
+                marks=("-", "{imported}"),
+                sales_taxes="{label}\t{0}",
+                total="{label}\t{0}",
+            ),
+        )
+        out_form = OutFormatter("a", "b", "c", out_format="tsv")
+        p_item = PurchasedItem(
+            imported=False, name="box", price=Decimal("1"), cnt=1, taxed=True
+        )
+        p_elem = PItemContainer(id=0, item=p_item, sales_taxes=Decimal("0.10"))
+        assert out_form.out_list_item(p_elem) == "1\t-\tbox\t1.10"
+        assert out_form.out_total(Decimal(2)) == "a\t2"
 
 
 @pytest.fixture()
@@ -133,3 +230,46 @@ class TestInFormatter:
 
     def test_str(self, in_formatter):
         assert isinstance(str(in_formatter), str)
+
+    def test_analyse_fast_path(self, in_formatter):
+        for input_i in (
+            "1 box  at 2.50",
+            "1 imported\tbox at 2",
+            "1\tbox at 2",
+            "1 box at\t2",
+            "1 box at 2 at 3",
+            "1 box at 2.5.3",
+            "1 box at ٣",
+            "٣ box at 2",
+            "1  box at 2",
+            "1 box\nimported at 2",
+        ):
+            assert in_formatter.analyse_input(input_i) == in_formatter._analyse_regex(
+                input_i.strip()
+            )
+
+    def test_analyse_input_cents(self, in_formatter):
+        rnd = random.Random(14)  # noqa: S311
+        for _ in range(2_000):
+            frac = "".join(rnd.choice("0123456789") for _ in range(rnd.randint(0, 3)))
+            input_i = (
+                f"{rnd.randint(1, 9)} {rnd.choice(('', 'imported '))}box"
+                + f" at {rnd.randint(0, 999)}{'.' + frac if frac else ''}"
+            )
+            res_dec = in_formatter.analyse_input(input_i)
+            res_cents = in_formatter.analyse_input_cents(input_i)
+            assert res_dec[1] is not None
+            if len(frac) > 2:
+                assert res_cents == (False, None)
+                continue
+            assert res_cents[1] is not None
+            assert res_cents[1].price == int(res_dec[1].price * 100)
+            assert (res_cents[1].name, res_cents[1].imported, res_cents[1].cnt) == (
+                res_dec[1].name,
+                res_dec[1].imported,
+                res_dec[1].cnt,
+            )
+        assert in_formatter.analyse_input_cents("1 box at ٣.50")[1] == CentsItem(
+            imported=False, name="box", price=350, cnt=1, taxed=True
+        )
+        assert in_formatter.analyse_input_cents("box at 2") == (False, None)
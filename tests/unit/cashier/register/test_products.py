@@ -0,0 +1,59 @@
+from collections import Counter
+
+from cashier.purchase.formatter import InFormatter
+from cashier.purchase.products import NO_PID, ProductDictionary
+from cashier.register import DI_BUY, DI_TERM
+
+
+def _clean(name: str) -> tuple[str, bool]:
+    return name.replace("imported ", "").strip(), "imported" in name
+
+
+class TestProductDictionary:
+    def test_lookup(self):
+        calls: Counter[str] = Counter()
+
+        def _taxed(name: str) -> bool:
+            calls[name] += 1
+            return name != "book"
+
+        products = ProductDictionary(_clean, _taxed)
+        assert products.lookup("book") == (0, "book", False, False)
+        assert products.lookup("imported book ") == (0, "book", True, False)
+        assert products.lookup("pen") == (1, "pen", False, True)
+        assert products.lookup(" book") == (0, "book", False, False)
+        assert products.intern("pen") == 1
+        assert (len(products), products.name(1), products.is_taxed(0)) == (
+            2,
+            "pen",
+            False,
+        )
+        assert calls == {"book": 1, "pen": 1}
+        assert "products: 2" in str(products)
+
+    def test_full(self):
+        products = ProductDictionary(_clean, lambda name: name != "book", max_size=1)
+        assert products.lookup("pen")[0] == 0
+        assert products.lookup("book") == (NO_PID, "book", False, False)
+        assert products.lookup("imported pen") == (0, "pen", True, True)
+        assert (len(products), products.intern("book")) == (1, NO_PID)
+
+
+def test_in_formatter_interns():
+    calls: Counter[str] = Counter()
+
+    def _taxed(name: str) -> bool:
+        calls[name] += 1
+        return True
+
+    in_form = InFormatter(DI_TERM, DI_BUY, _taxed)
+    items = [
+        in_form.analyse_input("1 imported box of pens at 1.00")[1],
+        in_form.analyse_input("2 box of imported pens at 2.00")[1],
+        in_form.analyse_input_cents("3 box of pens at 3.00")[1],
+    ]
+    assert all(item is not None for item in items)
+    assert len({id(item.name) for item in items if item is not None}) == 1
+    assert calls == {"box of pens": 1}
+    assert len(in_form.products) == 1
+    assert in_form.product_info("box of pens") == (0, "box of pens", False, True)
@@ -1,8 +1,10 @@
+import decimal
+import random
 from decimal import Decimal
 
 import pytest
 
-from cashier.purchase.container import PurchasedItem
+from cashier.purchase.container import CentsItem, PurchasedItem
 from cashier.purchase.tax_calculator import TaxCalculator
 
 pytest_plugins = ("tests.unit.fixture.test_fix_taxes",)
@@ -122,3 +124,65 @@ class TestTaxCalculator:
 
     def test_str(self, tax_calc):
         assert isinstance(str(tax_calc), str)
+
+    @pytest.mark.parametrize("with_numpy", [True, False])
+    def test_tax_many(self, monkeypatch, tax_calc, taxed_imported_items, with_numpy):
+        if not with_numpy:
+            monkeypatch.setattr("cashier.purchase.cents._load_numpy", lambda: None)
+        items = [test_i[0] for test_i in taxed_imported_items[2]]
+        items.append(_p_it_cr(7, Decimal("10.125"), 3, True, True))
+        items.append(_p_it_cr(8, Decimal("10.00"), 3, False, False))
+        columns = (
+            [item.price for item in items],
+            [item.cnt for item in items],
+            [item.imported for item in items],
+            [item.taxed for item in items],
+        )
+        exp_taxes = [str(tax_calc.tax(item)) for item in items]
+        assert [str(tax_i) for tax_i in tax_calc.tax_many(*columns)] == exp_taxes
+        columns[0].pop()
+        with pytest.raises(ValueError, match="differ in length"):
+            tax_calc.tax_many(*columns)
+        cents = tax_calc.tax_many_cents(
+            [1000, -1000], [3, 1], [True, False], [True, True]
+        )
+        assert cents == [450, 100]
+        big_item = _p_it_cr(9, Decimal("99999999999999999999.00"), 1, False, True)
+        assert tax_calc.tax_many([big_item.price], [1], [False], [True]) == [
+            tax_calc.tax(big_item)
+        ]
+
+    def test_context_untouched(self, tax_calc, taxed_imported_items):
+        with decimal.localcontext() as ctx:
+            ctx.rounding = decimal.ROUND_CEILING
+            for test_i in taxed_imported_items[2]:
+                assert str(tax_calc.tax(test_i[0])) == test_i[1]
+            assert decimal.getcontext().rounding == decimal.ROUND_CEILING
+
+    def test_tax_cache(self, taxed_imported_items):
+        cached_calc = TaxCalculator(0.05, 0.1, cache_size=2)
+        assert TaxCalculator(0.05, 0.1).cache_info().max_size == 0
+        for _ in range(2):
+            for test_i in taxed_imported_items[2][:2]:
+                assert str(cached_calc.tax(test_i[0])) == test_i[1]
+        info = cached_calc.cache_info()
+        assert (info.hits, info.misses, info.size, info.max_size) == (2, 2, 2, 2)
+        cached_calc.new_normal_tax(0.2)
+        assert cached_calc.cache_info().size == 0
+        assert str(cached_calc.tax(taxed_imported_items[2][0][0])) == "2.50"
+        cached_calc.new_import_tax(0.0)
+        assert str(cached_calc.tax(taxed_imported_items[2][0][0])) == "2.00"
+
+    @pytest.mark.parametrize("rates", [(0.05, 0.1), (0.075, 0.125), (0.0, 0.2)])
+    def test_tax_cents(self, rates):
+        calc = TaxCalculator(*rates)
+        rnd = random.Random(14)  # noqa: S311
+        for _ in range(5_000):
+            price, cnt = rnd.randint(-100_000, 100_000), rnd.randint(1, 50)
+            imp, tax = rnd.random() < 0.5, rnd.random() < 0.5
+            c_item = CentsItem(imported=imp, name="item", price=price, cnt=cnt, taxed=tax)
+            p_item = _p_it_cr(0, Decimal(price).scaleb(-2), cnt, imp, tax)
+            assert calc.tax_cents(c_item) == int(calc.tax(p_item) * 100)
+        calc.new_normal_tax(0.3)
+        c_item = CentsItem(imported=False, name="item", price=1000, cnt=1, taxed=True)
+        assert calc.tax_cents(c_item) == 300
@@ -0,0 +1,156 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from cashier.purchase.container import CentsItem, PurchasedItem
+from cashier.purchase.tax_calculator import TaxCalculator
+from cashier.purchase.tax_rules import TaxRuleTable
+
+_RULES = """
+region = "home"
+
+[categories]
+luxury = ["perfume", "gold watch"]
+food = ["chocolate"]
+
+[[rules]]
+region = "home"
+category = "basic"
+levies = [0.1]
+
+[[rules]]
+region = "home"
+category = "basic"
+imported = true
+levies = [0.1, 0.05]
+
+[[rules]]
+region = "home"
+category = "exempt"
+imported = true
+levies = [0.05]
+
+[[rules]]
+region = "home"
+category = "luxury"
+imported = false
+levies = [0.1, 0.15]
+cap = 2.5
+
+[[rules]]
+region = "away"
+category = "basic"
+levies = [0.2]
+
+[[rules]]
+region = "away"
+category = "food"
+levies = [0.025]
+"""
+
+
+@pytest.fixture()
+def rule_file(tmp_path):
+    rule_file = tmp_path / "rules.toml"
+    rule_file.write_text(_RULES)
+    return rule_file
+
+
+def _item(name: str, price: str, cnt: int, imp: bool, tax: bool) -> PurchasedItem:
+    return PurchasedItem(
+        imported=imp, name=name, price=Decimal(price), cnt=cnt, taxed=tax
+    )
+
+
+class TestTaxRuleTable:
+    def test_two_rates(self, rule_file):
+        rules = TaxRuleTable(rule_file)
+        rule_calc = TaxCalculator(0, 0, rules=rules)
+        tax_calc = TaxCalculator(0.05, 0.1)
+        rnd = random.Random(20)  # noqa: S311
+        items = [
+            _item(
+                f"item {item_i}",
+                f"{rnd.randint(0, 500)}.{rnd.randint(0, 99):02d}",
+                rnd.randint(1, 5),
+                rnd.random() < 0.5,
+                rnd.random() < 0.5,
+            )
+            for item_i in range(2_000)
+        ]
+        items.append(_item("pen", "10.125", 3, True, True))
+        assert [rule_calc.tax(item) for item in items] == [
+            tax_calc.tax(item) for item in items
+        ]
+        columns = (
+            [item.price for item in items],
+            [item.cnt for item in items],
+            [item.imported for item in items],
+            [item.taxed for item in items],
+        )
+        assert rule_calc.tax_many(*columns) == tax_calc.tax_many(*columns)
+        cents = [int(price * 100) for price in columns[0][:-1]]
+        assert rule_calc.tax_many_cents(
+            cents, *(col[:-1] for col in columns[1:])
+        ) == tax_calc.tax_many_cents(cents, *(col[:-1] for col in columns[1:]))
+
+    def test_categories(self, rule_file):
+        rules = TaxRuleTable(rule_file)
+        assert rules.region == "home"
+        assert rules.category("perfume", False) == "luxury"
+        assert rules.category("fancy gold watch", True) == "luxury"
+        assert rules.category("gold", True) == "basic"
+        assert rules.category("gold", False) == "exempt"
+        assert rules.category(None, True) == "basic"
+        tax_calc = TaxCalculator(0.05, 0.1, rules=rules)
+        # 25% of 8.00 and 10.20, the latter capped at 2.50 per unit
+        assert tax_calc.tax(_item("perfume", "8.00", 1, False, True)) == Decimal("2.00")
+        assert tax_calc.tax(_item("perfume", "10.20", 2, False, True)) == Decimal("5.00")
+        # imported luxury falls back to the imported basic rule
+        assert tax_calc.tax(_item("perfume", "10.00", 1, True, True)) == Decimal("1.50")
+        c_item = CentsItem(imported=False, name="perfume", price=1_020, cnt=2, taxed=True)
+        assert tax_calc.tax_cents(c_item) == 500
+        names = ["perfume", "perfume", "book"]
+        assert tax_calc.tax_many_cents(
+            [800, 1_020, 1_000], [1, 2, 1], [False] * 3, [True, True, False], names=names
+        ) == [200, 500, 0]
+        assert "home" in str(tax_calc)
+
+    def test_region(self, rule_file):
+        tax_calc = TaxCalculator(0.05, 0.1, rules=TaxRuleTable(rule_file, "away"))
+        assert tax_calc.tax(_item("chocolate", "10.00", 1, True, True)) == Decimal("0.25")
+        assert tax_calc.tax(_item("book", "10.00", 1, True, False)) == Decimal("0.00")
+        assert tax_calc.tax(_item("wine", "10.00", 1, True, True)) == Decimal("2.00")
+        with pytest.raises(ValueError, match="no rules for the region HOME"):
+            TaxRuleTable(rule_file, "HOME")
+
+    @pytest.mark.parametrize(
+        ("text", "error"),
+        [
+            ("", ValueError),
+            ("region = 1", TypeError),
+            ('region = "a"\nrules = 1', TypeError),
+            ('region = "a"\n[[rules]]\nregion = "a"', TypeError),
+            (
+                'region = "a"\n[[rules]]\nregion = "a"\ncategory = "b"\nlevies = [-1]',
+                ValueError,
+            ),
+            (
+                'region = "a"\n[[rules]]\nregion = "a"\ncategory = "b"\ncap = 0.001',
+                ValueError,
+            ),
+            (
+                'region = "a"\n[[rules]]\nregion = "a"\ncategory = "b"\nimported = 1',
+                TypeError,
+            ),
+            ('region = "a"\n[categories]\nbasic = ["x"]', ValueError),
+            ('region = "a"\n[categories]\nfood = "x"', TypeError),
+            ('region = "a"\n[[rules]]\nregion = "b"\ncategory = "basic"', ValueError),
+        ],
+    )
+    def test_invalid(self, tmp_path, text, error):
+        rule_file = tmp_path / "rules.toml"
+        rule_file.write_text(text)
+        with pytest.raises(error):
+            TaxRuleTable(rule_file)
@@ -0,0 +1,37 @@
+import json
+import sys
+from unittest import mock
+
+import pytest
+
+from cashier.bench import compare, generate_transcript, main
+
+
+def test_generate_transcript():
+    lines = list(generate_transcript(25, items_per_bill=10, imported_ratio=1.0))
+    assert len(lines) == 28
+    assert lines[10] == "#"
+    assert lines[-1] == "##"
+    assert all(" imported " in line for line in lines[:10])
+
+
+def test_compare():
+    base = {"parse": {"ops_per_s": 100.0}, "tax": {"ops_per_s": 0.0}}
+    res = {"parse": {"ops_per_s": 80.0}, "tax": {"ops_per_s": 1.0}, "new": {}}
+    assert compare(res, base, 0.1) == ["parse"]
+    assert compare(res, base, 0.3) == []
+
+
+def test_main(tmp_path):
+    out_file = tmp_path / "bench.json"
+    args = ["cashier-bench", "-n", "200", "-r", "1", "-o", str(out_file)]
+    with mock.patch.object(sys, "argv", args):
+        main()
+    report = json.loads(out_file.read_text())
+    assert set(report["results"]) == {"parse", "exempt", "tax", "bill", "replay"}
+    assert report["results"]["replay"]["ops"] == 220
+    with (
+        mock.patch.object(sys, "argv", [*args, "-c", str(out_file), "-t", "-1"]),
+        pytest.raises(SystemExit),
+    ):
+        main()
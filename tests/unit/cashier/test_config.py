@@ -0,0 +1,123 @@
+import os
+import signal
+import time
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+
+from cashier.config import ConfigStore
+from cashier.purchase.bill import Bill
+from cashier.purchase.container import PurchasedItem
+from cashier.register import start_register
+
+_ITEM = PurchasedItem(
+    imported=True, name="box", price=Decimal("10.00"), cnt=1, taxed=True
+)
+
+
+@pytest.fixture()
+def config_file(tmp_path):
+    (tmp_path / "exempt.txt").write_text("box\n")
+    config_file = tmp_path / "cashier.toml"
+    config_file.write_text("import_taxes = 0.1\nbasic_taxes = 0.2\n")
+    return config_file
+
+
+def _rewrite(config_file, text: str) -> None:
+    stat = config_file.stat()
+    config_file.write_text(text)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestConfigStore:
+    def test_reload(self, config_file):
+        store = ConfigStore(None, config_file=config_file)
+        old = store.snapshot
+        assert (old.version, old.import_taxes, old.basic_taxes) == (0, 0.1, 0.2)
+        bill = Bill(old.out_form, old.tax_calc)
+        config_file.write_text('import_taxes = 0\nexemption_file = "exempt.txt"\n')
+        assert store.reload()
+        new = store.snapshot
+        assert (new.version, new.import_taxes, new.basic_taxes) == (1, 0.0, 0.1)
+        assert new.tax_file == config_file.parent / "exempt.txt"
+        assert not new.in_form.analyse_input("1 box at 1.00")[1].taxed
+        bill.add_item(_ITEM)
+        assert bill.subtotal() == (Decimal("3.00"), Decimal("13.00"))
+        assert str(new.tax_calc.tax(_ITEM)) == "1.00"
+        assert store.register()[2] is new.tax_calc
+
+    def test_invalid(self, config_file, capsys):
+        store = ConfigStore(None, config_file=config_file)
+        for text in ("import_taxes = 'a'", "exemption_file = 1", "import_taxes ="):
+            config_file.write_text(text)
+            assert not store.reload()
+            assert store.snapshot.version == 0
+        assert capsys.readouterr().out.count("configuration not loaded") == 3
+        default = ConfigStore(None, config_file=config_file)
+        assert (default.snapshot.import_taxes, default.snapshot.basic_taxes) == (
+            0.05,
+            0.1,
+        )
+        assert not ConfigStore(None).reload()
+
+    def test_rules(self, config_file, capsys):
+        rule_file = config_file.parent / "rules.toml"
+        rule_file.write_text(
+            'region = "a"\n[[rules]]\nregion = "b"\ncategory = "basic"\nlevies = [0.3]\n'
+        )
+        store = ConfigStore(None, config_file=config_file)
+        config_file.write_text('rule_file = "rules.toml"\nregion = "b"\n')
+        assert store.reload()
+        snapshot = store.snapshot
+        assert (snapshot.rule_file, snapshot.region) == (rule_file, "b")
+        assert str(snapshot.tax_calc.tax(_ITEM)) == "3.00"
+        config_file.write_text('rule_file = "missing.toml"\n')
+        assert not store.reload()
+        assert store.snapshot is snapshot
+        assert "configuration not loaded" in capsys.readouterr().out
+
+    def test_watch(self, config_file):
+        store = ConfigStore(None, config_file=config_file)
+        store.watch(0.01)
+        store.watch(0.01)
+        _rewrite(config_file, "basic_taxes = 0.3\n")
+        deadline = time.monotonic() + 5
+        while store.snapshot.version == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        store.stop()
+        store.stop()
+        assert (store.snapshot.version, store.snapshot.basic_taxes) == (1, 0.3)
+
+    @pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="requires SIGHUP")
+    def test_signal(self, config_file):
+        store = ConfigStore(None, config_file=config_file)
+        handler = signal.getsignal(signal.SIGHUP)
+        try:
+            assert store.reload_on_signal()
+            os.kill(os.getpid(), signal.SIGHUP)
+            deadline = time.monotonic() + 5
+            while store.snapshot.version == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            signal.signal(signal.SIGHUP, handler)
+            store.stop()
+        assert store.snapshot.version == 1
+
+
+def test_start_register_reload(config_file, capsys):
+    store = ConfigStore(None, config_file=config_file)
+    inputs = iter(["1 imported box at 10.00", "#", "1 imported box at 10.00", "##"])
+
+    def _input() -> str:
+        line = next(inputs)
+        if line == "#":
+            config_file.write_text("import_taxes = 0\nbasic_taxes = 0\n")
+            store.reload()
+        return line
+
+    with mock.patch("builtins.input", _input):
+        start_register(None, store.register)
+    out = capsys.readouterr().out
+    assert "1 imported box: 13.00" in out
+    assert "1 imported box: 10.00" in out
@@ -0,0 +1,151 @@
+import importlib.util
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+
+from cashier.bench import generate_transcript
+from cashier.export import BillExporter, ExportEngine, read_row_groups
+from cashier.purchase.bill import Bill
+from cashier.purchase.columnar_bill import ColumnarBill
+from cashier.purchase.container import MoneyBackend, PurchasedItem
+from cashier.register import run_batch
+
+pytest_plugins = (
+    "tests.unit.fixture.test_fix_formatter",
+    "tests.unit.fixture.test_fix_taxes",
+)
+
+_ITEMS = (
+    PurchasedItem(
+        imported=True, name="perfume", price=Decimal("27.99"), cnt=1, taxed=True
+    ),
+    PurchasedItem(
+        imported=False, name="book", price=Decimal("12.49"), cnt=2, taxed=False
+    ),
+    PurchasedItem(imported=False, name="pen", price=Decimal("0.125"), cnt=3, taxed=True),
+)
+_HAS_ARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+def _rows(path):
+    return [
+        row
+        for group in read_row_groups(path)
+        for row in zip(
+            group.bill_id,
+            group.item_id,
+            group.name,
+            group.imported,
+            group.taxed,
+            group.cnt,
+            group.price,
+            group.sales_taxes,
+            strict=True,
+        )
+    ]
+
+
+class TestBillExporter:
+    def test_binary(self, tmp_path, out_formatter, tax_calc):
+        bill = Bill(out_formatter, tax_calc)
+        c_bill = ColumnarBill(out_formatter, tax_calc)
+        for p_item in _ITEMS:
+            bill.add_item(p_item)
+            c_bill.add_item(p_item)
+        bill.rem_item(2)
+        exporter = BillExporter(tmp_path / "out.bin", ExportEngine.BINARY, 2)
+        assert exporter.engine is ExportEngine.BINARY
+        assert exporter.add_bill(1, bill) == 2
+        assert exporter.add_bill(7, c_bill) == 2
+        exporter.close()
+        assert exporter.rows == 4
+        assert [len(group) for group in read_row_groups(tmp_path / "out.bin")] == [2, 2]
+        rows = _rows(tmp_path / "out.bin")
+        assert rows[1] == (1, 3, "pen", False, True, 3, Decimal("0.125"), Decimal("0.05"))
+        assert rows[2] == (
+            7,
+            1,
+            "perfume",
+            True,
+            True,
+            1,
+            Decimal("27.99"),
+            Decimal("4.20"),
+        )
+        assert [row[2] for row in rows] == ["perfume", "pen", "perfume", "book"]
+
+    def test_text_rows(self, tmp_path, out_formatter, tax_calc):
+        bill = Bill(out_formatter, tax_calc)
+        big_item = PurchasedItem(
+            imported=False, name="yacht", price=Decimal("1e20"), cnt=2**63, taxed=False
+        )
+        for p_item in (*_ITEMS, big_item):
+            bill.add_item(p_item)
+        exporter = BillExporter(tmp_path / "out.bin", ExportEngine.BINARY, 2, scale=2)
+        assert exporter.add_bill(1, bill) == 4
+        exporter.close()
+        assert [len(group) for group in read_row_groups(tmp_path / "out.bin")] == [2, 2]
+        rows = _rows(tmp_path / "out.bin")
+        assert rows[1][5:] == (2, Decimal("12.49"), Decimal("0.00"))
+        assert rows[2][5:] == (3, Decimal("0.125"), Decimal("0.05"))
+        assert rows[3][5:] == (2**63, Decimal("1e20"), Decimal("0.00"))
+
+    def test_invalid(self, tmp_path, out_formatter, tax_calc):
+        bill = Bill(out_formatter, tax_calc)
+        bill.add_item(_ITEMS[2])
+        exporter = BillExporter(tmp_path / "out.bin", ExportEngine.BINARY, scale=2)
+        exporter.add_bill(1, bill)
+        exporter.close()
+        (tmp_path / "other.bin").write_bytes(b"CSHXJNL1\0\0\0\0")
+        with pytest.raises(ValueError, match="not a binary bill export"):
+            list(read_row_groups(tmp_path / "other.bin"))
+        truncated = (tmp_path / "out.bin").read_bytes() + b"\1\0\0\0\0\0"
+        (tmp_path / "out.bin").write_bytes(truncated)
+        with pytest.raises(ValueError, match="truncated"):
+            list(read_row_groups(tmp_path / "out.bin"))
+
+    @pytest.mark.skipif(_HAS_ARROW, reason="requires pyarrow to be missing")
+    def test_parquet_missing(self, tmp_path):
+        with pytest.raises(ValueError, match="pyarrow"):
+            BillExporter(tmp_path / "out.parquet", ExportEngine.PARQUET)
+        assert BillExporter(tmp_path / "out.bin").engine is ExportEngine.BINARY
+
+    @pytest.mark.skipif(not _HAS_ARROW, reason="requires pyarrow")
+    def test_parquet(self, tmp_path, out_formatter, tax_calc):
+        parquet = pytest.importorskip("pyarrow.parquet")
+        bill = Bill(out_formatter, tax_calc)
+        for p_item in _ITEMS:
+            bill.add_item(p_item)
+        exporter = BillExporter(tmp_path / "out.parquet", row_group_size=2)
+        exporter.add_bill(1, bill)
+        exporter.close()
+        table = parquet.read_table(tmp_path / "out.parquet")
+        assert table.column("name").to_pylist() == ["perfume", "book", "pen"]
+        assert table.column("price").to_pylist()[2] == Decimal("0.125")
+
+
+def test_run_batch_export(tmp_path):
+    transcript = "\n".join(generate_transcript(500, seed=18))
+    exporter = BillExporter(tmp_path / "out.bin", ExportEngine.BINARY, 64)
+    stats = run_batch(
+        None,
+        StringIO(transcript),
+        StringIO(),
+        money=MoneyBackend.CENTS,
+        exporter=exporter,
+    )
+    exporter.close()
+    rows = _rows(tmp_path / "out.bin")
+    assert len(rows) == exporter.rows == 500 - stats.invalid
+    assert len({row[0] for row in rows}) == stats.bills
+
+
+def test_run_batch_export_decimals(tmp_path):
+    exporter = BillExporter(tmp_path / "out.bin", ExportEngine.BINARY)
+    transcript = "1 pen at 0.12345\n1 book at 12.49\nq\nq\n"
+    stats = run_batch(None, StringIO(transcript), StringIO(), exporter=exporter)
+    exporter.close()
+    assert stats.bills == 1
+    rows = _rows(tmp_path / "out.bin")
+    assert [row[6] for row in rows] == [Decimal("0.12345"), Decimal("12.49")]
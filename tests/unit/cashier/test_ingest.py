@@ -0,0 +1,65 @@
+from io import StringIO
+
+import pytest
+
+from cashier.bench import generate_transcript
+from cashier.ingest import run_ingest
+from cashier.purchase.container import MoneyBackend
+from cashier.register import run_batch
+
+_EDGES = [
+    "1 book at 12.49\r\n",
+    "\n",
+    "  2 imported  box of chocolates at 10.005  \n",
+    "1 café at 3.00\n",
+    "1 \u00a0tea at 1.00\n",
+    "3\tpen at 1.50\n",
+    "1 hat at 2 at 3.00\n",
+    "x at 1.00\n",
+    "1 bad at 1.\n",
+    "1 imported music CD at 14.99\n",
+    " # \r\n",
+    "#\u00a0\n",
+    "1 imported bottle of perfume at 27.99\n",
+]
+
+
+def _compare(tmp_path, text: str, **kwargs) -> tuple[str, str]:
+    transcript = tmp_path / "transcript.txt"
+    transcript.write_bytes(text.encode())
+    outs = []
+    stats = []
+    for run in (
+        lambda sink: run_batch(None, transcript.open(), sink, **kwargs),
+        lambda sink: run_ingest(None, transcript, sink, **kwargs),
+    ):
+        sink = StringIO()
+        res = run(sink)
+        outs.append(sink.getvalue())
+        stats.append((res.lines, res.invalid, res.bills))
+    assert stats[0] == stats[1]
+    return outs[0], outs[1]
+
+
+@pytest.mark.parametrize("money", list(MoneyBackend))
+def test_run_ingest(tmp_path, money):
+    text = "\n".join(generate_transcript(3_000, seed=23)) + "\n"
+    batch_out, ingest_out = _compare(tmp_path, text, money=money)
+    assert batch_out.count("\n") > 3_000
+    assert ingest_out == batch_out
+
+
+@pytest.mark.parametrize("money", list(MoneyBackend))
+@pytest.mark.parametrize("tail", ["", "\n", "##\n1 box at 1.00\n", "##"])
+def test_run_ingest_edges(tmp_path, money, tail):
+    batch_out, ingest_out = _compare(tmp_path, "".join(_EDGES) + tail, money=money)
+    assert "output 3:" in batch_out
+    assert ingest_out == batch_out
+
+
+def test_run_ingest_options(tmp_path):
+    text = "1 pen at 0.85\n" * 3 + "1 book at 2.00\n#\n1 box at 1.00\n"
+    batch_out, ingest_out = _compare(tmp_path, text, aggregate=True, out_format="csv")
+    assert "3,,pen,1.10" in batch_out
+    assert ingest_out == batch_out
+    assert _compare(tmp_path, "") == ("", "")
@@ -0,0 +1,58 @@
+import json
+from io import StringIO
+
+from cashier import instrument
+from cashier.purchase.container import MoneyBackend
+from cashier.purchase.exemption_index import compile_index
+from cashier.purchase.formatter import InFormatter
+from cashier.register import run_batch
+
+
+def test_instrument():
+    original = InFormatter.analyse_input
+    instrument.enable()
+    instrument.reset()
+    try:
+        assert instrument.is_enabled()
+        source = StringIO("1 book at 1.00\n1 music CD at 2.00\nx\n#\n##\n")
+        run_batch(None, source, StringIO())
+    finally:
+        instrument.disable()
+    assert InFormatter.analyse_input is original
+    assert not instrument.is_enabled()
+    stages = instrument.report()
+    assert {stage: summary["count"] for stage, summary in stages.items()} == {
+        "parse": 3,
+        "exempt": 2,
+        "tax": 2,
+        "bill_add": 2,
+        "bill_write": 1,
+    }
+    assert stages["parse"]["p50_us"] <= stages["parse"]["p99_us"]
+    json_out, text_out = StringIO(), StringIO()
+    instrument.dump("json", json_out)
+    instrument.dump("text", text_out)
+    assert json.loads(json_out.getvalue()) == stages
+    assert "parse: 3 calls" in text_out.getvalue()
+    instrument.reset()
+    assert instrument.report() == {}
+
+
+def test_instrument_cents(tmp_path):
+    compile_index(["book"], tmp_path / "exempt.idx")
+    instrument.enable()
+    instrument.reset()
+    try:
+        source = StringIO("1 book at 1.00\n1 music CD at 2.00\nx\n#\n##\n")
+        run_batch(tmp_path / "exempt.idx", source, StringIO(), money=MoneyBackend.CENTS)
+    finally:
+        instrument.disable()
+    stages = instrument.report()
+    instrument.reset()
+    assert {stage: summary["count"] for stage, summary in stages.items()} == {
+        "parse_cents": 3,
+        "exempt_index": 2,
+        "tax_cents": 2,
+        "columnar_add": 2,
+        "columnar_write": 1,
+    }
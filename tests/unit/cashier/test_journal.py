@@ -0,0 +1,137 @@
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+
+from cashier.journal import BillJournal
+from cashier.purchase.bill import Bill
+from cashier.purchase.container import PurchasedItem
+from cashier.register import start_register
+
+pytest_plugins = (
+    "tests.unit.fixture.test_fix_formatter",
+    "tests.unit.fixture.test_fix_taxes",
+)
+
+_ITEMS = (
+    PurchasedItem(
+        imported=True, name="perfume", price=Decimal("27.99"), cnt=1, taxed=True
+    ),
+    PurchasedItem(
+        imported=False, name="book", price=Decimal("12.49"), cnt=2, taxed=False
+    ),
+    PurchasedItem(imported=False, name="pen", price=Decimal("0.125"), cnt=3, taxed=True),
+)
+
+
+def _fill(journal, bills, bill_id, out_formatter, tax_calc):
+    bills[bill_id] = Bill(out_formatter, tax_calc)
+    journal.open_bill(bill_id)
+    for p_item in _ITEMS:
+        bills[bill_id].add_item(p_item)
+        journal.add_item(bill_id, bills[bill_id].get_item(bills[bill_id].last_id))
+
+
+def _check(recovered, bills):
+    assert list(recovered) == sorted(bills)
+    for bill_id, bill in bills.items():
+        assert recovered[bill_id].finish() == bill.finish()
+        assert recovered[bill_id].subtotal() == bill.subtotal()
+        assert recovered[bill_id].last_id == bill.last_id
+
+
+class TestBillJournal:
+    def test_recover(self, tmp_path, out_formatter, tax_calc):
+        journal = BillJournal(tmp_path, group_size=2, sync_interval=60)
+        assert journal.recover(out_formatter, tax_calc) == {}
+        bills: dict[int, Bill] = {}
+        for bill_id in (1, 2, 3):
+            _fill(journal, bills, bill_id, out_formatter, tax_calc)
+        bills[2].rem_item(3)
+        journal.rem_item(2, 3)
+        journal.close_bill(1)
+        del bills[1]
+        journal.close()
+        _check(BillJournal(tmp_path).recover(out_formatter, tax_calc), bills)
+
+    def test_torn_tail(self, tmp_path, out_formatter, tax_calc):
+        journal = BillJournal(tmp_path, group_size=1_000, sync_interval=60)
+        journal.recover(out_formatter, tax_calc)
+        bills: dict[int, Bill] = {}
+        _fill(journal, bills, 1, out_formatter, tax_calc)
+        journal.commit()
+        _fill(journal, {}, 2, out_formatter, tax_calc)
+        journal.close()
+        journal_file = tmp_path / "journal-00000000.bin"
+        journal_file.write_bytes(journal_file.read_bytes()[:-5])
+        journal = BillJournal(tmp_path)
+        _check(journal.recover(out_formatter, tax_calc), bills)
+        _fill(journal, bills, 3, out_formatter, tax_calc)
+        journal.close()
+        _check(BillJournal(tmp_path).recover(out_formatter, tax_calc), bills)
+
+    def test_append_after_recover(self, tmp_path, out_formatter, tax_calc):
+        journal = BillJournal(tmp_path)
+        journal.recover(out_formatter, tax_calc)
+        bills = {1: Bill(out_formatter, tax_calc)}
+        journal.open_bill(1)
+        for p_item in _ITEMS[1:]:
+            bills[1].add_item(p_item)
+            journal.add_item(1, bills[1].get_item(bills[1].last_id))
+            journal.close()
+            journal = BillJournal(tmp_path)
+            _check(journal.recover(out_formatter, tax_calc), bills)
+        journal.close()
+        _check(BillJournal(tmp_path).recover(out_formatter, tax_calc), bills)
+
+    def test_snapshot(self, tmp_path, out_formatter, tax_calc):
+        journal = BillJournal(tmp_path, snapshot_every=4)
+        journal.recover(out_formatter, tax_calc)
+        bills: dict[int, Bill] = {}
+        _fill(journal, bills, 1, out_formatter, tax_calc)
+        assert journal.snapshot_due
+        bills[1].rem_item(3)
+        journal.rem_item(1, 3)
+        journal.snapshot(bills)
+        assert not journal.snapshot_due
+        _fill(journal, bills, 2, out_formatter, tax_calc)
+        bills[1].rem_item(1)
+        journal.rem_item(1, 1)
+        bills[1].add_item(_ITEMS[0])
+        journal.add_item(1, bills[1].get_item(bills[1].last_id))
+        journal.close()
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "journal-00000001.bin",
+            "snapshot.bin",
+        ]
+        _check(BillJournal(tmp_path).recover(out_formatter, tax_calc), bills)
+
+    def test_commit_without_recover(self, tmp_path):
+        journal = BillJournal(tmp_path)
+        journal.open_bill(1)
+        with pytest.raises(RuntimeError):
+            journal.commit()
+
+
+def test_start_register_journal(tmp_path, capsys):
+    inputs = ["1 imported box at 10.00", "#", "1 book at 12.49"]
+    with mock.patch("builtins.input", side_effect=[*inputs, KeyboardInterrupt]):
+        with pytest.raises(KeyboardInterrupt):
+            start_register(None, journal=BillJournal(tmp_path))
+    with mock.patch("builtins.input", side_effect=["##"]):
+        start_register(None, journal=BillJournal(tmp_path))
+    out = capsys.readouterr().out.split("### OUTPUT [start]")[-1]
+    assert "output 1:\n1 imported box: 11.50" in out
+    assert "output 2:\n1 book: 12.49" in out
+    with mock.patch("builtins.input", side_effect=["##"]):
+        start_register(None, journal=BillJournal(tmp_path))
+    assert "output 1:" not in capsys.readouterr().out
+
+
+def test_start_register_journal_large(tmp_path, capsys):
+    inputs = ["5000000000 book at 1.00", f"{2**64} book at 1.00", "1 pen at 1.00", "##"]
+    with mock.patch("builtins.input", side_effect=inputs):
+        start_register(None, journal=BillJournal(tmp_path))
+    out = capsys.readouterr().out
+    assert out.count("too large to be journaled") == 1
+    assert "Total: 5000000001.10" in out
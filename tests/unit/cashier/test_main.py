@@ -0,0 +1,31 @@
+import io
+import sys
+from unittest import mock
+
+import pytest
+
+from cashier.main import main
+
+
+@pytest.mark.parametrize(
+    ("rules", "args"),
+    [
+        (None, ["-b", "-"]),
+        ('region = "a"\n', ["-b", "-"]),
+        ('region = "a"\n[[rules]]\nregion = "b"\ncategory = "basic"\n', ["-b", "-"]),
+        ("region =\n", ["-b", "-", "-w", "2"]),
+        ('region = "a"\n', []),
+    ],
+)
+def test_main_rules(tmp_path, capsys, rules, args):
+    rule_file = tmp_path / "rules.toml"
+    if rules is not None:
+        rule_file.write_text(rules)
+    with (
+        mock.patch.object(sys, "argv", ["cashier", "-r", str(rule_file), *args]),
+        mock.patch.object(sys, "stdin", io.StringIO("1 book at 1.00\n")),
+        pytest.raises(SystemExit) as exc_info,
+    ):
+        main()
+    assert exc_info.value.code == 2
+    assert "error: invalid rule file" in capsys.readouterr().err
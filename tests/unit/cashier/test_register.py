@@ -6,7 +6,9 @@ from unittest.mock import patch
 
 import pytest
 
-from cashier.register import decide_if_taxed, start_register
+from cashier.bench import generate_transcript
+from cashier.purchase.container import MoneyBackend
+from cashier.register import decide_if_taxed, run_batch, start_register
 
 
 @pytest.fixture()
@@ -104,3 +106,90 @@ def test_register_file_mock(mock_stdout, create_default_out, register_call):
         start_register(Path("abc"))
     for line_i, line in enumerate(mock_stdout.getvalue().split("\n")):
         assert line == create_default_out[line_i]
+
+
+def test_run_batch():
+    source = StringIO(
+        "undefined\n1 chocolate at 1.00\n#\n#\n1 book at 2.00\n##\n1 x at 1\n"
+    )
+    sink = StringIO()
+    stats = run_batch(None, source, sink)
+    assert sink.getvalue().split("\n") == [
+        "output 1:",
+        "1 chocolate: 1.00",
+        "Sales Taxes: 0.00",
+        "Total: 1.00",
+        "output 3:",
+        "1 book: 2.00",
+        "Sales Taxes: 0.00",
+        "Total: 2.00",
+        "",
+    ]
+    assert (stats.lines, stats.invalid, stats.bills) == (6, 1, 3)
+    assert stats.lines_per_second > 0
+
+
+def test_run_batch_cents():
+    transcript = "\n".join(generate_transcript(2_000, seed=14))
+    outputs = []
+    for money in MoneyBackend:
+        sink = StringIO()
+        stats = run_batch(None, StringIO(transcript), sink, money=money)
+        outputs.append((sink.getvalue(), stats))
+    assert outputs[0][0].count("\n") > 2_000
+    assert outputs[0][0] == outputs[1][0]
+    assert outputs[0][1].bills == outputs[1][1].bills
+    source = "1 box at 1.005\n1 book at 2.00\n##\n"
+    stats = run_batch(None, StringIO(source), StringIO(), money=MoneyBackend.CENTS)
+    assert stats.invalid == 1
+
+
+def test_run_batch_rules(tmp_path):
+    rule_file = tmp_path / "rules.toml"
+    rule_file.write_text(
+        'region = "a"\n[categories]\nfood = ["chocolate"]\n'
+        + '[[rules]]\nregion = "a"\ncategory = "basic"\nlevies = [0.1, 0.1]\n'
+        + '[[rules]]\nregion = "b"\ncategory = "food"\nlevies = [0.05]\n'
+    )
+    source = "1 chocolate bar at 10.00\n1 imported box at 10.00\n##\n"
+    for money in MoneyBackend:
+        for region, out in (("a", "2.00\nSales Taxes: 4.00"), ("b", "10.50\n")):
+            sink = StringIO()
+            run_batch(
+                None,
+                StringIO(source),
+                sink,
+                money=money,
+                rule_file=rule_file,
+                region=region,
+            )
+            assert out in sink.getvalue()
+
+
+def test_run_batch_aggregate():
+    source = "1 pen at 0.85\n" * 3 + "1 book at 2.00\n#\n1 box at 1.00\n##\n"
+    sink = StringIO()
+    stats = run_batch(None, StringIO(source), sink, aggregate=True)
+    assert stats.bills == 2
+    assert sink.getvalue().split("\n")[1:4] == [
+        "3 pen: 1.10",
+        "1 book: 2.00",
+        "Sales Taxes: 0.25",
+    ]
+    with pytest.raises(ValueError, match="aggregated"):
+        run_batch(None, StringIO(source), sink, money=MoneyBackend.CENTS, aggregate=True)
+
+
+@pytest.mark.parametrize("money", list(MoneyBackend))
+def test_run_batch_format(money):
+    source = "1 book at 12.49\n1 imported box at 10.00\n#\n##\n"
+    sink = StringIO()
+    run_batch(None, StringIO(source), sink, money=money, out_format="csv")
+    assert sink.getvalue().split("\n") == [
+        ",,output 1,",
+        "1,,book,12.49",
+        "1,imported,box,11.50",
+        ",,Sales Taxes,1.50",
+        ",,Total,23.99",
+        "",
+    ]
@@ -0,0 +1,45 @@
+from io import StringIO
+
+import pytest
+
+from cashier.purchase.container import MoneyBackend
+from cashier.register import run_batch
+from cashier.replay import run_replay
+
+
+@pytest.fixture()
+def transcript() -> str:
+    lines = []
+    for bill_i in range(40):
+        lines.extend(
+            f"{item_i + 1} {'imported ' if item_i % 2 else ''}book {bill_i}"
+            + f" at 1{item_i}.25"
+            for item_i in range(bill_i % 4)
+        )
+        lines.append("undefined" if bill_i == 7 else "#")
+    lines.extend(["##", "1 book at 1.00"])
+    return "\n".join(lines) + "\n"
+
+
+@pytest.mark.parametrize(("workers", "chunk_size"), [(1, 1), (2, 3), (3, 64)])
+def test_run_replay(transcript, workers, chunk_size):
+    exp_sink = StringIO()
+    exp_stats = run_batch(None, StringIO(transcript), exp_sink)
+    sink = StringIO()
+    stats = run_replay(
+        None, StringIO(transcript), sink, workers=workers, chunk_size=chunk_size
+    )
+    assert sink.getvalue() == exp_sink.getvalue()
+    assert (stats.lines, stats.invalid, stats.bills) == (
+        exp_stats.lines,
+        exp_stats.invalid,
+        exp_stats.bills,
+    )
+
+
+def test_run_replay_cents(transcript):
+    exp_sink = StringIO()
+    run_batch(None, StringIO(transcript), exp_sink)
+    sink = StringIO()
+    run_replay(None, StringIO(transcript), sink, money=MoneyBackend.CENTS)
+    assert sink.getvalue() == exp_sink.getvalue()
@@ -0,0 +1,83 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+
+from cashier.purchase.cents import from_cents
+from cashier.purchase.tax_calculator import TaxCalculator
+from cashier.register import create_register
+from cashier.reprice import run_reprice
+
+_SCENARIOS = [(0.05, 0.12), (0.1, 0.2), (0.0, 0.0)]
+
+
+@pytest.fixture()
+def catalog() -> str:
+    lines = [
+        f"{item_i % 5 + 1} {'imported ' if item_i % 3 else ''}"
+        + f"{('pen', 'book', 'chocolate bar')[item_i % 3]} at {item_i}.{item_i % 100:02}"
+        for item_i in range(50)
+    ]
+    lines.extend(["#", "2 pen at 1.001", "1 pen at 99999999999999999999.00", "undefined"])
+    return "\n".join(lines) + "\n"
+
+
+def _expected(catalog: str, import_t: float, basic_t: float) -> tuple[Decimal, int]:
+    in_form = create_register(None)[0]
+    tax_calc = TaxCalculator(import_t, basic_t)
+    net, taxes = Decimal(0), 0
+    for line in catalog.splitlines():
+        p_item = in_form.analyse_input(line)[1]
+        if p_item is not None:
+            net += p_item.price * p_item.cnt
+            taxes += int(tax_calc.tax(p_item).scaleb(2))
+    return net, taxes
+
+
+@pytest.mark.parametrize(("workers", "chunk_size"), [(1, 1), (2, 7), (3, 4096)])
+def test_run_reprice(catalog, workers, chunk_size):
+    report = run_reprice(
+        None, StringIO(catalog), _SCENARIOS, workers=workers, chunk_size=chunk_size
+    )
+    assert (report.lines, report.invalid) == (54, 2)
+    net, base_tax = _expected(catalog, 0.05, 0.1)
+    assert report.baseline.sales_taxes == from_cents(base_tax)
+    assert report.baseline.total == net + from_cents(base_tax)
+    assert report.baseline.tax_delta == Decimal("0.00")
+    for result, (import_t, basic_t) in zip(report.scenarios, _SCENARIOS, strict=True):
+        _, taxes = _expected(catalog, import_t, basic_t)
+        assert (result.import_taxes, result.basic_taxes) == (import_t, basic_t)
+        assert result.sales_taxes == from_cents(taxes)
+        assert result.total == net + from_cents(taxes)
+        assert result.tax_delta == result.total_delta == from_cents(taxes - base_tax)
+    assert report.scenarios[2].sales_taxes == Decimal("0.00")
+    assert report.scenarios[1].tax_delta > 0
+
+
+def test_run_reprice_decimals():
+    report = run_reprice(None, StringIO("2 pen at 0.125\n"), [(0.0, 0.0)])
+    assert report.invalid == 0
+    assert report.baseline.sales_taxes == Decimal("0.05")
+    assert report.baseline.total == Decimal("0.30")
+    assert report.scenarios[0].total == Decimal("0.250")
+
+
+def test_run_reprice_empty():
+    report = run_reprice(None, StringIO(""), [(0.1, 0.1)], baseline=(0.0, 0.0))
+    assert (report.lines, report.invalid) == (0, 0)
+    assert report.scenarios[0].total == Decimal("0.00")
+
+
+def test_run_reprice_exemptions(tmp_path):
+    tax_file = tmp_path / "exempt.txt"
+    tax_file.write_text("pen\n")
+    report = run_reprice(tax_file, StringIO("1 pen at 10.00\n"), [(0.5, 0.5)])
+    assert report.baseline.sales_taxes == Decimal("0.00")
+    assert report.scenarios[0].sales_taxes == Decimal("0.00")
+    taxed = run_reprice(None, StringIO("1 pen at 10.00\n"), [(0.5, 0.5)])
+    assert taxed.scenarios[0].tax_delta == Decimal("4.00")
+
+
+def test_run_reprice_negative():
+    with pytest.raises(ValueError, match="negative"):
+        run_reprice(None, StringIO(""), [(0.05, -0.1)])
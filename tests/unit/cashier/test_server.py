@@ -0,0 +1,91 @@
+import asyncio
+
+from cashier.server import RegisterServer, run_load
+
+
+async def _session(port: int, lines: list[str]) -> list[str]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write("".join(f"{line}\n" for line in lines).encode())
+    await writer.drain()
+    out = (await reader.read()).decode().split("\n")
+    writer.close()
+    await writer.wait_closed()
+    return out
+
+
+async def _run_server(lines: list[str]):
+    server = RegisterServer(None)
+    async with await server.serve_tcp("127.0.0.1", 0) as sock:
+        port = sock.sockets[0].getsockname()[1]
+        outs = await asyncio.gather(_session(port, lines), _session(port, lines[1:]))
+        report = await run_load("127.0.0.1", port, sessions=20, lines=30)
+        return outs, report, server.sessions
+
+
+def test_register_server():
+    lines = ["undefined", "1 chocolate at 1.00", "#", "1 imported book at 10.00", "##"]
+    outs, report, sessions = asyncio.run(_run_server(lines))
+    assert outs[0] == [
+        "input pattern was not recognised",
+        "added item (id: 1) successfully",
+        "input 1 [finished]",
+        "added item (id: 1) successfully",
+        "output 1:",
+        "1 chocolate: 1.00",
+        "Sales Taxes: 0.00",
+        "Total: 1.00",
+        "output 2:",
+        "1 imported book: 10.50",
+        "Sales Taxes: 0.50",
+        "Total: 10.50",
+        "",
+    ]
+    assert outs[1] == outs[0][1:]
+    assert (report.sessions, report.lines) == (20, 600)
+    assert 0 < report.p50 <= report.p99
+    assert sessions == 0
+
+
+def test_register_server_reload(tmp_path):
+    config_file = tmp_path / "cashier.toml"
+    config_file.write_text("import_taxes = 0.1\n")
+    server = RegisterServer(None, config_file=config_file)
+    bill_list = [server._new_bill()]
+    assert server._answer(bill_list, "1 imported box at 10.00\n").startswith("added")
+    config_file.write_text("import_taxes = 0\n")
+    assert server.config.reload()
+    assert server._answer(bill_list, "1 imported box at 10.00\n").startswith("added")
+    assert server._answer(bill_list, "#\n") == "input 1 [finished]"
+    assert server._answer(bill_list, "1 imported box at 10.00\n").startswith("added")
+    assert [str(bill.subtotal()[0]) for bill, _ in bill_list] == ["4.00", "1.00"]
+
+
+def test_register_server_aggregate():
+    server = RegisterServer(None, aggregate=True)
+    bill_list = [server._new_bill()]
+    for scan_i in range(1, 4):
+        answer = server._answer(bill_list, "1 pen at 0.85\n")
+        assert answer == f"added item (id: {scan_i}) successfully"
+    bill = bill_list[0][0]
+    assert len(bill) == 1
+    assert str(bill.subtotal()[0]) == "0.25"
+
+
+async def _run_aborted() -> tuple[bytes, int]:
+    server = RegisterServer(None, buffer_limit=64)
+    async with await server.serve_tcp("127.0.0.1", 0) as sock:
+        port = sock.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"1 " + b"x" * 200 + b" at 1.00\n")
+        await writer.drain()
+        out = await reader.read()
+        writer.close()
+        await writer.wait_closed()
+        return out, server.sessions
+
+
+def test_register_server_aborted(capsys):
+    assert asyncio.run(_run_aborted()) == (b"", 0)
+    captured = capsys.readouterr()
+    assert "session aborted" in captured.err
+    assert not captured.out